@@ -1,11 +1,28 @@
+const axios = require('axios');
 const Delivery = require('../models/Delivery');
 const Match = require('../models/Match');
 const { getPhaseFromOver } = require('../models/PhaseConstants');
 
+// ML Service base URL
+const ML_SERVICE_URL = process.env.ML_SERVICE_URL || 'http://localhost:8000';
+
 // A) Phase Analysis - batting/bowling stats by powerplay/middle/death phases
 const getPhaseAnalysis = async (req, res) => {
+  const { team, player, season } = req.query;
+
+  // Served from the ml-service's precomputed phase cube (same response);
+  // the aggregation pipelines below are the fallback
+  try {
+    const response = await axios.get(`${ML_SERVICE_URL}/ml/analytics/phase`, {
+      params: { team, player, season },
+      timeout: 2000
+    });
+    return res.json(response.data);
+  } catch (error) {
+    console.warn('Phase cube unavailable, using aggregation:', error.message);
+  }
+
   try {
-    const { team, player, season } = req.query;
 
     let matchFilter = {};
     if (season) {
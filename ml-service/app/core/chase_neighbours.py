@@ -0,0 +1,189 @@
+"""
+Nearest-neighbour index over historical chase states.
+
+A KD-tree over (overs_left, wickets, required_rr, target) built from the
+vectorized second-innings states. Each axis is divided by its "similar
+situation" tolerance so a distance of 1 is roughly one neighbourhood width
+on any axis. The tree answers k-nearest and radius queries without scanning
+the dataset, which gives both a neighbour-weighted win probability and a
+list of real matches that passed through a similar state.
+
+The index is persisted next to the models, tagged with the deliveries
+content hash, and rebuilt when the data changes.
+
+Usage:
+    python -m app.core.chase_neighbours
+"""
+import sys
+import threading
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.neighbors import KDTree
+
+from app.core.data_loader import get_data_store
+from app.core.match_states import build_chase_states
+
+INDEX_VERSION = 1
+
+# Per-axis scale: overs_left, wickets, required_rr, target
+AXIS_SCALE = np.array([2.0, 1.0, 2.0, 20.0])
+
+DEFAULT_K = 50
+
+
+def get_index_path():
+    """Location of the persisted neighbour index"""
+    return Path(__file__).parent.parent / "models" / "chase_neighbours.joblib"
+
+def _scaled_point(required_runs, overs_remaining, wickets, target):
+    required_rr = required_runs / overs_remaining if overs_remaining > 0 else 20
+    point = np.array([[overs_remaining, wickets, required_rr, target]], dtype=float)
+    return point / AXIS_SCALE
+
+
+class ChaseNeighbourIndex:
+    """KD-tree over historical chase states plus the per-state metadata"""
+
+    def __init__(self, tree, states, source_digest=None):
+        self.tree = tree
+        self.states = states
+        self.source_digest = source_digest
+
+    @classmethod
+    def from_deliveries(cls, deliveries_df, source_digest=None):
+        """Build the index from a ball-by-ball deliveries frame"""
+        states = build_chase_states(deliveries_df)
+        # Only live chase situations: balls left to bowl and runs still needed
+        states = states.select((states.overs_left > 0) & (states.runs_needed > 0))
+        points = np.column_stack([
+            states.overs_left,
+            states.wickets,
+            states.required_rr,
+            states.target,
+        ]) / AXIS_SCALE
+        return cls(KDTree(points), states, source_digest)
+
+    def __len__(self):
+        return len(self.states)
+
+    def query(self, required_runs, overs_remaining, wickets, target, k=DEFAULT_K):
+        """Return (distances, state indices) of the k nearest historical states"""
+        k = min(k, len(self))
+        if k == 0:
+            return np.empty(0), np.empty(0, dtype=np.intp)
+        point = _scaled_point(required_runs, overs_remaining, wickets, target)
+        distances, indices = self.tree.query(point, k=k)
+        return distances[0], indices[0]
+
+    def query_radius(self, required_runs, overs_remaining, wickets, target, radius=1.0):
+        """Return (distances, state indices) of all states within ``radius``"""
+        point = _scaled_point(required_runs, overs_remaining, wickets, target)
+        indices, distances = self.tree.query_radius(point, r=radius, return_distance=True, sort_results=True)
+        return distances[0], indices[0]
+
+    def win_probability(self, required_runs, overs_remaining, wickets, target, k=DEFAULT_K):
+        """
+        Inverse-distance weighted share of the k nearest states whose chase
+        was won. Returns (probability, neighbours used).
+        """
+        distances, indices = self.query(required_runs, overs_remaining, wickets, target, k)
+        if len(indices) == 0:
+            return None, 0
+        weights = 1.0 / (distances + 0.1)
+        won = self.states.won[indices]
+        return float(np.dot(weights, won) / weights.sum()), len(indices)
+
+    def similar_matches(self, required_runs, overs_remaining, wickets, target, limit=5):
+        """
+        Closest historical matches to the query state, one entry per match.
+        """
+        distances, indices = self.query(required_runs, overs_remaining, wickets, target, k=limit * 10)
+        results = []
+        seen = set()
+        for distance, idx in zip(distances, indices):
+            match_id = int(self.states.match_id[idx])
+            if match_id in seen:
+                continue
+            seen.add(match_id)
+            results.append({
+                "match_id": match_id,
+                "overs_left": round(float(self.states.overs_left[idx]), 1),
+                "wickets": int(self.states.wickets[idx]),
+                "runs_needed": int(self.states.runs_needed[idx]),
+                "target": int(self.states.target[idx]),
+                "won": bool(self.states.won[idx]),
+                "distance": round(float(distance), 3),
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+    def save(self, path=None):
+        path = Path(path) if path is not None else get_index_path()
+        path.parent.mkdir(exist_ok=True)
+        joblib.dump({
+            'version': INDEX_VERSION,
+            'axis_scale': AXIS_SCALE,
+            'source_digest': self.source_digest,
+            'tree': self.tree,
+            'states': self.states,
+        }, path)
+        return path
+
+    @classmethod
+    def load(cls, path=None):
+        """Load a persisted index, or None if it is missing or outdated"""
+        path = Path(path) if path is not None else get_index_path()
+        if not path.exists():
+            return None
+        data = joblib.load(path)
+        if data.get('version') != INDEX_VERSION or not np.array_equal(data.get('axis_scale'), AXIS_SCALE):
+            return None
+        return cls(data['tree'], data['states'], data['source_digest'])
+
+
+def build_neighbour_index(save=True):
+    """Build the index from the current deliveries data and optionally persist it"""
+    store = get_data_store()
+    index = ChaseNeighbourIndex.from_deliveries(store.deliveries, store.fingerprint('deliveries'))
+    if save:
+        path = index.save()
+        print(f"Chase neighbour index saved to {path} ({len(index)} states)")
+    return index
+
+
+# Global index instance
+_index = None
+_index_lock = threading.Lock()
+
+def get_neighbour_index():
+    """
+    Get the neighbour index for the current deliveries data, loading the
+    persisted copy or rebuilding it when the data has changed.
+    """
+    global _index
+    digest = get_data_store().fingerprint('deliveries')
+    if _index is not None and _index.source_digest == digest:
+        return _index
+
+    with _index_lock:
+        if _index is not None and _index.source_digest == digest:
+            return _index
+        index = ChaseNeighbourIndex.load()
+        if index is None or index.source_digest != digest:
+            index = build_neighbour_index(save=False)
+            try:
+                index.save()
+            except OSError as e:
+                print(f"Could not persist chase neighbour index: {e}")
+        _index = index
+    return _index
+
+if __name__ == "__main__":
+    try:
+        build_neighbour_index(save=True)
+    except Exception as e:
+        print(f"Building chase neighbour index failed: {str(e)}")
+        sys.exit(1)
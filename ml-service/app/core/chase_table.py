@@ -0,0 +1,215 @@
+"""
+Precomputed chase win-probability lookup table.
+
+Historical second-innings states are bucketed by (overs left, wickets,
+required run rate) and stored as win counts and sample sizes. A 3-D prefix
+sum over the grid turns the "similar situation" neighbourhood used by the
+live predictor (±2 overs, ±1 wicket, ±2 RRR) into a constant-time box sum.
+
+The table is saved next to the trained models and tagged with the content
+hash of the deliveries file it was built from; it is rebuilt automatically
+when that hash changes.
+
+Usage:
+    python -m app.core.chase_table
+"""
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.core.data_loader import get_data_store
+from app.core.match_states import build_chase_states
+
+TABLE_VERSION = 1
+
+# Only states with 0 < overs_left <= MAX_OVERS_LEFT are recorded
+MAX_OVERS_LEFT = 15.0
+
+# Bucket grids: (lowest value, step, number of buckets). Values are rounded to
+# the nearest bucket and clipped into the end buckets. Overs left are kept at
+# ball resolution since they are always whole tenths.
+OVERS_GRID = (0.0, 0.1, 151)
+WICKETS_GRID = (0, 1, 11)
+RR_GRID = (-4.0, 0.25, 161)
+
+# Neighbourhood half-widths for "similar" situations
+OVERS_TOLERANCE = 2.0
+WICKETS_TOLERANCE = 1
+RR_TOLERANCE = 2.0
+
+
+def get_table_path():
+    """Location of the persisted lookup table"""
+    return Path(__file__).parent.parent / "models" / "chase_table.npz"
+
+def _bucket(values, grid):
+    low, step, count = grid
+    idx = np.rint((np.asarray(values, dtype=float) - low) / step).astype(np.int64)
+    return np.clip(idx, 0, count - 1)
+
+def _bucket_range(value, tolerance, grid):
+    """Half-open range of buckets whose centres lie within value ± tolerance"""
+    low, step, count = grid
+    # Small epsilon so values sitting exactly on the tolerance edge are kept
+    lo = int(np.ceil((value - tolerance - low) / step - 1e-9))
+    hi = int(np.floor((value + tolerance - low) / step + 1e-9)) + 1
+    return min(max(lo, 0), count - 1), min(max(hi, 1), count)
+
+def _second_innings_states(deliveries_df):
+    """
+    Collect (overs_left, wickets, required_rr, won) for every recorded
+    second-innings ball with 0 < overs_left <= MAX_OVERS_LEFT.
+    """
+    states = build_chase_states(deliveries_df)
+    keep = (states.overs_left > 0) & (states.overs_left <= MAX_OVERS_LEFT)
+    states = states.select(keep)
+    return states.overs_left, states.wickets, states.required_rr, states.won
+
+
+class ChaseProbabilityTable:
+    """Bucketed win counts / sample sizes with O(1) neighbourhood queries"""
+
+    def __init__(self, wins, samples, source_digest=None):
+        self.wins = wins
+        self.samples = samples
+        self.source_digest = source_digest
+        self._wins_cum = self._prefix_sum(wins)
+        self._samples_cum = self._prefix_sum(samples)
+
+    @staticmethod
+    def _prefix_sum(grid):
+        # Zero-padded on the leading edge of each axis so box sums need no
+        # bounds checks
+        padded = np.zeros(tuple(n + 1 for n in grid.shape), dtype=np.int64)
+        padded[1:, 1:, 1:] = grid.cumsum(0).cumsum(1).cumsum(2)
+        return padded
+
+    @classmethod
+    def from_states(cls, overs_left, wickets, required_rr, won, source_digest=None):
+        """Build the table from arrays of historical chase states"""
+        shape = (OVERS_GRID[2], WICKETS_GRID[2], RR_GRID[2])
+        flat = np.ravel_multi_index(
+            (_bucket(overs_left, OVERS_GRID),
+             _bucket(wickets, WICKETS_GRID),
+             _bucket(required_rr, RR_GRID)),
+            shape,
+        )
+        size = int(np.prod(shape))
+        samples = np.bincount(flat, minlength=size).reshape(shape)
+        wins = np.bincount(flat, weights=np.asarray(won, dtype=float), minlength=size)
+        wins = wins.round().astype(np.int64).reshape(shape)
+        return cls(wins, samples.astype(np.int64), source_digest)
+
+    @classmethod
+    def from_deliveries(cls, deliveries_df, source_digest=None):
+        """Build the table from a ball-by-ball deliveries frame"""
+        overs_left, wickets, required_rr, won = _second_innings_states(deliveries_df)
+        return cls.from_states(overs_left, wickets, required_rr, won, source_digest)
+
+    def _box(self, cum, lo, hi):
+        (a0, b0, c0), (a1, b1, c1) = lo, hi
+        return int(
+            cum[a1, b1, c1]
+            - cum[a0, b1, c1] - cum[a1, b0, c1] - cum[a1, b1, c0]
+            + cum[a0, b0, c1] + cum[a0, b1, c0] + cum[a1, b0, c0]
+            - cum[a0, b0, c0]
+        )
+
+    def lookup(self, required_runs, overs_remaining, wickets):
+        """
+        Return (wins, samples) for historical states similar to the query.
+
+        Similarity is the live predictor's neighbourhood (±2 overs left,
+        ±1 wicket, ±2 required run rate) at bucket resolution.
+        """
+        required_rr = required_runs / overs_remaining if overs_remaining > 0 else 20
+        ranges = (
+            _bucket_range(overs_remaining, OVERS_TOLERANCE, OVERS_GRID),
+            _bucket_range(wickets, WICKETS_TOLERANCE, WICKETS_GRID),
+            _bucket_range(required_rr, RR_TOLERANCE, RR_GRID),
+        )
+        lo = tuple(r[0] for r in ranges)
+        hi = tuple(r[1] for r in ranges)
+        return self._box(self._wins_cum, lo, hi), self._box(self._samples_cum, lo, hi)
+
+    def save(self, path=None):
+        path = Path(path) if path is not None else get_table_path()
+        path.parent.mkdir(exist_ok=True)
+        np.savez_compressed(
+            path,
+            version=TABLE_VERSION,
+            source_digest=self.source_digest or "",
+            grids=np.array([OVERS_GRID, WICKETS_GRID, RR_GRID], dtype=float),
+            wins=self.wins.astype(np.int32),
+            samples=self.samples.astype(np.int32),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path=None):
+        """Load a persisted table, or None if it is missing or outdated"""
+        path = Path(path) if path is not None else get_table_path()
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            grids = np.array([OVERS_GRID, WICKETS_GRID, RR_GRID], dtype=float)
+            if int(data['version']) != TABLE_VERSION or not np.array_equal(data['grids'], grids):
+                return None
+            return cls(data['wins'], data['samples'], str(data['source_digest']) or None)
+
+
+def build_chase_table(save=True):
+    """Build the table from the current deliveries data and optionally persist it"""
+    store = get_data_store()
+    deliveries_df = store.deliveries
+    table = ChaseProbabilityTable.from_deliveries(deliveries_df, store.fingerprint('deliveries'))
+    if save:
+        path = table.save()
+        print(f"Chase table saved to {path} ({int(table.samples.sum())} states)")
+    return table
+
+
+# Global table instance
+_table = None
+_table_lock = threading.Lock()
+
+def get_chase_table():
+    """
+    Get the lookup table for the current deliveries data.
+
+    Loads the persisted table on first use and rebuilds it whenever the
+    deliveries content hash no longer matches.
+    """
+    global _table
+    digest = get_data_store().fingerprint('deliveries')
+    if _table is not None and _table.source_digest == digest:
+        return _table
+
+    with _table_lock:
+        if _table is not None and _table.source_digest == digest:
+            return _table
+        table = ChaseProbabilityTable.load()
+        if table is None or table.source_digest != digest:
+            table = build_chase_table(save=False)
+            try:
+                table.save()
+            except OSError as e:
+                print(f"Could not persist chase table: {e}")
+        _table = table
+    return _table
+
+def get_loaded_chase_table():
+    """
+    The table already in memory, or None. Never loads, rebuilds or checks
+    the data hash, so it is safe to call on the event loop.
+    """
+    return _table
+
+if __name__ == "__main__":
+    try:
+        build_chase_table(save=True)
+    except Exception as e:
+        print(f"Building chase table failed: {str(e)}")
+        sys.exit(1)
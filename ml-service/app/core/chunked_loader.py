@@ -0,0 +1,147 @@
+"""
+Chunked, dtype-declared streaming reader for the deliveries CSV.
+
+``load_deliveries_data`` parses the whole file into one frame with int64 and
+object columns, which peaks at several times the file size. This reader
+declares compact dtypes up front (int8/int16/int32 for ids and counts,
+``category`` for names) and yields fixed-size chunks, so a consumer holds
+one chunk at a time. ``features_score_prediction.build_training_data_chunked``
+builds the score features this way.
+
+Categories are per chunk; ``load_deliveries_compact`` unions them when a
+single compact frame is wanted.
+
+The report compares the peak traced allocation (tracemalloc: Python objects
+and NumPy buffers) of a full read plus feature build against streaming at
+each chunk size:
+
+    python -m app.core.chunked_loader [--chunk-sizes 10000,50000,200000] [--data-dir DIR]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from app.core.data_loader import get_data_path, MATCHES_FILE, DELIVERIES_FILE
+from app.core.vocabulary import get_vocabulary
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+DELIVERIES_DTYPES = {
+    'match_id': 'int32',
+    'inning': 'int8',
+    'batting_team': 'category',
+    'bowling_team': 'category',
+    'over': 'int8',
+    'ball': 'int8',
+    'batsman': 'category',
+    'non_striker': 'category',
+    'bowler': 'category',
+    'is_super_over': 'int8',
+    'wide_runs': 'int8',
+    'bye_runs': 'int8',
+    'legbye_runs': 'int8',
+    'noball_runs': 'int8',
+    'penalty_runs': 'int8',
+    'batsman_runs': 'int8',
+    'extra_runs': 'int8',
+    'total_runs': 'int16',
+    'player_dismissed': 'category',
+    'dismissal_kind': 'category',
+    'fielder': 'category',
+}
+
+
+def iter_deliveries(path=None, chunksize=DEFAULT_CHUNK_SIZE, usecols=None):
+    """
+    Yield the deliveries file as DataFrames of at most ``chunksize`` rows
+    with compact dtypes.
+
+    Args:
+        path: CSV path (default: the shared deliveries file)
+        chunksize: Rows per chunk
+        usecols: Optional subset of columns to read
+    """
+    path = Path(path or get_data_path() / DELIVERIES_FILE)
+    dtypes = DELIVERIES_DTYPES
+    if usecols is not None:
+        dtypes = {k: v for k, v in DELIVERIES_DTYPES.items() if k in usecols}
+    with pd.read_csv(path, dtype=dtypes, usecols=usecols, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield chunk
+
+def concat_chunks(chunks):
+    """Concatenate chunks, unioning per-chunk categories so columns stay categorical"""
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    columns = {}
+    for name in chunks[0].columns:
+        if isinstance(chunks[0][name].dtype, pd.CategoricalDtype):
+            columns[name] = pd.Series(union_categoricals([c[name] for c in chunks]), name=name)
+        else:
+            columns[name] = pd.concat([c[name] for c in chunks], ignore_index=True)
+    return pd.DataFrame(columns)
+
+def load_deliveries_compact(path=None, chunksize=DEFAULT_CHUNK_SIZE, usecols=None):
+    """The whole deliveries file as one compact-dtype frame"""
+    return concat_chunks(iter_deliveries(path, chunksize, usecols))
+
+def _measure(fn):
+    """(result, peak traced MiB, seconds) of ``fn()``"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / 2**20, time.perf_counter() - start
+
+def memory_report(chunk_sizes, data_dir=None):
+    """
+    Peak memory and time of building the score features from a full read
+    and from streamed chunks of each size.
+
+    Returns a list of dicts with chunk_size (0 = full read), peak_mib,
+    seconds and rows.
+    """
+    from app.core.features_score_prediction import build_training_data, build_training_data_chunked
+
+    data_dir = Path(data_dir or get_data_path())
+    deliveries_path = data_dir / DELIVERIES_FILE
+    matches_df = pd.read_csv(data_dir / MATCHES_FILE)
+    vocabulary = get_vocabulary(data_dir)
+
+    rows = []
+    (X, _, _), peak, seconds = _measure(
+        lambda: build_training_data(pd.read_csv(deliveries_path), matches_df, vocabulary=vocabulary))
+    rows.append({"chunk_size": 0, "peak_mib": peak, "seconds": seconds, "rows": len(X)})
+
+    for chunk_size in chunk_sizes:
+        (X, _, _), peak, seconds = _measure(
+            lambda: build_training_data_chunked(iter_deliveries(deliveries_path, chunk_size), matches_df,
+                                                vocabulary=vocabulary))
+        rows.append({"chunk_size": chunk_size, "peak_mib": peak, "seconds": seconds, "rows": len(X)})
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Peak memory of streamed vs. full deliveries ingestion")
+    parser.add_argument("--chunk-sizes", default="10000,50000,200000",
+                        help="Comma-separated chunk sizes in rows")
+    parser.add_argument("--data-dir", default=None, help="Directory with the CSVs (default: data/)")
+    args = parser.parse_args(argv)
+
+    chunk_sizes = [int(c) for c in args.chunk_sizes.split(",") if c.strip()]
+    print(f"{'chunk size':>12}  {'peak MiB':>9}  {'seconds':>8}  {'matches':>8}")
+    for row in memory_report(chunk_sizes, args.data_dir):
+        label = "full read" if row["chunk_size"] == 0 else f"{row['chunk_size']:,}"
+        print(f"{label:>12}  {row['peak_mib']:9.1f}  {row['seconds']:8.2f}  {row['rows']:8d}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
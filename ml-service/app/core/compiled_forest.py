@@ -0,0 +1,224 @@
+"""
+Array-backed evaluator for trained random forests.
+
+``compile_forest`` flattens every tree of a fitted RandomForestClassifier or
+RandomForestRegressor into contiguous NumPy arrays (feature, threshold,
+left/right child, leaf value), with all trees concatenated and addressed by
+global node index. ``CompiledForest`` then walks all trees at once, one depth
+level per step, for a single row or a small batch. There is no sklearn input
+validation or joblib dispatch in the request path, and results match sklearn
+within float tolerance.
+
+The predictors compile their forest once at model load; set
+ML_COMPILED_TREES=0 to fall back to sklearn.
+
+Usage (benchmark and parity check against sklearn on the saved models):
+    python -m app.core.compiled_forest [--rows 1] [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+
+class CompiledForest:
+    """
+    Flattened forest.
+
+    Attributes:
+        feature    int32  split feature per node (0 at leaves)
+        threshold  float64  split threshold per node (+inf at leaves)
+        left       int32  global index of the left child (self at leaves)
+        right      int32  global index of the right child (self at leaves)
+        value      float64  (n_nodes, n_outputs) leaf value: class
+                   probabilities for classifiers, prediction for regressors
+        roots      int32  global index of each tree's root
+        max_depth  int    deepest tree, i.e. number of steps to reach a leaf
+        is_classifier  bool
+        classes    class labels (classifiers only)
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth,
+                 is_classifier, classes=None, n_features=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.is_classifier = bool(is_classifier)
+        self.classes = classes
+        self.n_features = n_features
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """Global leaf index reached in every tree, shape (n_rows, n_trees)"""
+        # sklearn compares float32 inputs against float64 thresholds; cast the
+        # same way so rows on a threshold go the same direction
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.repeat(self.roots[None, :], X.shape[0], axis=0)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def _mean_value(self, X):
+        leaves = self.apply(X)
+        return self.value[leaves].mean(axis=1)
+
+    def predict_proba(self, X):
+        """Class probabilities, shape (n_rows, n_classes)"""
+        if not self.is_classifier:
+            raise ValueError("predict_proba is only available for classifiers")
+        return self._mean_value(X)
+
+    def predict(self, X):
+        """Regression prediction, or most likely class for classifiers"""
+        mean = self._mean_value(X)
+        if self.is_classifier:
+            return np.asarray(self.classes)[mean.argmax(axis=1)]
+        return mean[:, 0]
+
+
+def compile_forest(model):
+    """Flatten a fitted sklearn random forest into a CompiledForest"""
+    if not hasattr(model, 'estimators_'):
+        raise ValueError("Model is not a fitted tree ensemble")
+    if getattr(model, 'n_outputs_', 1) != 1:
+        raise ValueError("Only single-output forests are supported")
+
+    is_classifier = hasattr(model, 'classes_')
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        node_ids = np.arange(n_nodes)
+        is_leaf = tree.children_left == -1
+
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+        if is_classifier:
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1.0
+            values.append(counts / totals)
+        else:
+            values.append(tree.value[:, 0, :1])
+
+        roots.append(offset)
+        offset += n_nodes
+        max_depth = max(max_depth, tree.max_depth)
+
+    return CompiledForest(
+        feature=np.ascontiguousarray(np.concatenate(features), dtype=np.int32),
+        threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+        left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.int32),
+        right=np.ascontiguousarray(np.concatenate(rights), dtype=np.int32),
+        value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+        roots=np.asarray(roots, dtype=np.int32),
+        max_depth=max_depth,
+        is_classifier=is_classifier,
+        classes=getattr(model, 'classes_', None),
+        n_features=getattr(model, 'n_features_in_', None),
+    )
+
+def compiled_or_original(model):
+    """
+    The compiled version of ``model`` for request-path inference, or the
+    model itself if it cannot be compiled or ML_COMPILED_TREES=0.
+    Both expose the same predict / predict_proba interface.
+    """
+    if os.environ.get("ML_COMPILED_TREES", "1").lower() in ("0", "false", "no"):
+        return model
+    try:
+        return compile_forest(model)
+    except Exception as e:
+        print(f"Using sklearn model, forest compilation failed: {e}")
+        return model
+
+
+def _sample_rows(forest, n_rows, seed=0):
+    """Random rows spanning the range of every feature's split thresholds"""
+    rng = np.random.default_rng(seed)
+    n_features = forest.n_features or int(forest.feature.max()) + 1
+    X = np.zeros((n_rows, n_features))
+    for f in range(n_features):
+        splits = forest.threshold[(forest.feature == f) & np.isfinite(forest.threshold)]
+        if len(splits):
+            X[:, f] = rng.uniform(splits.min() - 1, splits.max() + 1, n_rows)
+    return X
+
+def _time_per_call(fn, X, repeat):
+    fn(X)  # warm
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(X)
+    return (time.perf_counter() - start) / repeat
+
+def benchmark(model, rows=1, repeat=200, check_rows=2000):
+    """
+    Compare a sklearn forest with its compiled version.
+
+    Returns a dict with the max absolute difference over ``check_rows``
+    random rows and the per-call latency of both implementations.
+    """
+    forest = compile_forest(model)
+    X_check = _sample_rows(forest, check_rows)
+    X_bench = X_check[:rows]
+
+    if forest.is_classifier:
+        reference, compiled = model.predict_proba, forest.predict_proba
+    else:
+        reference, compiled = model.predict, forest.predict
+
+    max_diff = float(np.abs(reference(X_check) - compiled(X_check)).max())
+    sklearn_time = _time_per_call(reference, X_bench, repeat)
+    compiled_time = _time_per_call(compiled, X_bench, repeat)
+    return {
+        "max_abs_diff": max_diff,
+        "sklearn_ms": sklearn_time * 1000,
+        "compiled_ms": compiled_time * 1000,
+        "speedup": sklearn_time / compiled_time if compiled_time else float('inf'),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark compiled forests against sklearn")
+    parser.add_argument("--rows", type=int, default=1, help="Rows per call")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls to time")
+    args = parser.parse_args(argv)
+
+    models_dir = Path(__file__).parent.parent / "models"
+    for name in ("match_winner_model.pkl", "score_prediction_model.pkl"):
+        path = models_dir / name
+        if not path.exists():
+            print(f"{name}: not found, skipped")
+            continue
+        model = joblib.load(path)['model']
+        result = benchmark(model, rows=args.rows, repeat=args.repeat)
+        print(
+            f"{name}: sklearn {result['sklearn_ms']:.3f} ms, "
+            f"compiled {result['compiled_ms']:.3f} ms, "
+            f"speedup {result['speedup']:.1f}x, "
+            f"max |diff| {result['max_abs_diff']:.2e}"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
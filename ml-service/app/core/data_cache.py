@@ -0,0 +1,293 @@
+"""
+Columnar binary cache for the CSV datasets.
+
+Each CSV is converted once into a directory of ``.npy`` column files plus a
+JSON manifest, stored in a ``cache/`` directory next to the CSV
+(``data/cache/<csv stem>/<content hash>/`` for the shipped datasets).
+Numeric columns are memory-mapped on load (``np.load(mmap_mode='r')``), so a
+warm start only touches the pages that are actually read. Text columns are
+stored as int32 codes and are decoded back to object columns, so cached
+frames look exactly like ``pd.read_csv`` output. Team, venue and player
+columns use the shared vocabulary (app.core.vocabulary, saved as
+``cache/vocabulary.json``), so their codes can also be read directly with
+``read_codes``; other text columns keep a category list in the manifest.
+
+Usage:
+    python -m app.core.data_cache rebuild [--name matches|deliveries]
+    python -m app.core.data_cache validate [--name matches|deliveries]
+    python -m app.core.data_cache clear
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.core.data_loader import (
+    get_data_path,
+    file_digest,
+    MATCHES_FILE,
+    DELIVERIES_FILE,
+)
+from app.core.vocabulary import domain_of, get_vocabulary, save_vocabulary
+
+CACHE_FORMAT_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+
+DATASETS = {
+    "matches": MATCHES_FILE,
+    "deliveries": DELIVERIES_FILE,
+}
+
+
+def get_cache_root(data_path=None):
+    """Directory holding the column caches of a data directory (data/cache)"""
+    return Path(data_path or get_data_path()) / "cache"
+
+def cache_dir_for(source_path, digest):
+    """Cache directory for a given source file and content hash"""
+    source_path = Path(source_path)
+    return get_cache_root(source_path.parent) / source_path.stem / digest[:16]
+
+def _is_text(series):
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+def write_cache(source_path, digest=None, df=None):
+    """
+    Convert a CSV into its columnar cache and return the cache directory.
+
+    Older cache entries for the same source are removed afterwards.
+    """
+    source_path = Path(source_path)
+    if digest is None:
+        digest = file_digest(source_path)
+    if df is None:
+        df = pd.read_csv(source_path)
+
+    target = cache_dir_for(source_path, digest)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    vocabulary = get_vocabulary(source_path.parent)
+
+    # Write into a temp dir first so readers never see a half-written cache
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".tmp-", dir=target.parent))
+    try:
+        columns = []
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            file_name = f"c{i}.npy"
+            domain = domain_of(name)
+            if domain is not None and _is_text(series):
+                np.save(tmp_dir / file_name, vocabulary.encode(domain, series))
+                columns.append({
+                    "name": name,
+                    "kind": "vocab",
+                    "file": file_name,
+                    "domain": domain,
+                    # The codes are only valid against this vocabulary prefix
+                    "vocab_size": vocabulary.size(domain),
+                    "vocab_digest": vocabulary.digest(domain),
+                })
+            elif _is_text(series):
+                codes, categories = pd.factorize(series, use_na_sentinel=True)
+                np.save(tmp_dir / file_name, codes.astype(np.int32))
+                columns.append({
+                    "name": name,
+                    "kind": "text",
+                    "file": file_name,
+                    "categories": [str(c) for c in categories],
+                })
+            else:
+                np.save(tmp_dir / file_name, series.to_numpy())
+                columns.append({
+                    "name": name,
+                    "kind": "numeric",
+                    "file": file_name,
+                    "dtype": str(series.dtype),
+                })
+
+        manifest = {
+            "format_version": CACHE_FORMAT_VERSION,
+            "source": source_path.name,
+            "digest": digest,
+            "rows": int(len(df)),
+            "columns": columns,
+        }
+        with open(tmp_dir / MANIFEST_NAME, "w") as fh:
+            json.dump(manifest, fh)
+        save_vocabulary(source_path.parent)
+
+        if target.exists():
+            shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_dir, target)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    evict_stale(source_path, keep=target.name)
+    return target
+
+def evict_stale(source_path, keep=None):
+    """Remove cache entries for a source other than ``keep``"""
+    stem_dir = get_cache_root(Path(source_path).parent) / Path(source_path).stem
+    if not stem_dir.exists():
+        return
+    for entry in stem_dir.iterdir():
+        if entry.name != keep:
+            shutil.rmtree(entry, ignore_errors=True)
+
+def _read_manifest(cache_dir):
+    manifest_path = Path(cache_dir) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path) as fh:
+        manifest = json.load(fh)
+    if manifest.get("format_version") != CACHE_FORMAT_VERSION:
+        return None
+    return manifest
+
+def _vocab_matches(vocabulary, column):
+    size = column["vocab_size"]
+    domain = column["domain"]
+    return vocabulary.size(domain) >= size and vocabulary.digest(domain, size) == column["vocab_digest"]
+
+def _valid_manifest(source_path, digest):
+    """(cache dir, manifest) of a valid entry, or (cache dir, None)"""
+    cache_dir = cache_dir_for(source_path, digest)
+    manifest = _read_manifest(cache_dir)
+    if manifest is None or manifest.get("digest") != digest:
+        return cache_dir, None
+    vocabulary = get_vocabulary(Path(source_path).parent)
+    for column in manifest["columns"]:
+        if column["kind"] == "vocab" and not _vocab_matches(vocabulary, column):
+            # Vocabulary was cleared or rebuilt since this entry was written
+            return cache_dir, None
+    return cache_dir, manifest
+
+def read_cache(source_path, digest):
+    """
+    Load a cached frame for ``source_path`` at content hash ``digest``.
+
+    Returns None when there is no valid cache entry.
+    """
+    cache_dir, manifest = _valid_manifest(source_path, digest)
+    if manifest is None:
+        return None
+
+    vocabulary = get_vocabulary(Path(source_path).parent)
+    data = {}
+    for column in manifest["columns"]:
+        values = np.load(cache_dir / column["file"], mmap_mode="r")
+        if column["kind"] == "vocab":
+            data[column["name"]] = vocabulary.decode(column["domain"], values)
+        elif column["kind"] == "text":
+            categories = np.array(column["categories"] + [np.nan], dtype=object)
+            # Code -1 (missing) indexes the trailing NaN
+            data[column["name"]] = categories.take(values)
+        else:
+            data[column["name"]] = values
+
+    # copy=False keeps the memory-mapped numeric columns as-is
+    return pd.DataFrame(data, copy=False)
+
+def read_codes(source_path, digest, column_name):
+    """
+    Memory-mapped int32 vocabulary codes of one cached column.
+
+    Returns None when there is no valid cache entry or the column is not
+    stored as vocabulary codes.
+    """
+    cache_dir, manifest = _valid_manifest(source_path, digest)
+    if manifest is None:
+        return None
+    for column in manifest["columns"]:
+        if column["name"] == column_name and column["kind"] == "vocab":
+            return np.load(cache_dir / column["file"], mmap_mode="r")
+    return None
+
+def load_csv(source_path, digest=None):
+    """
+    Load a CSV through the columnar cache, building the cache on a miss.
+
+    Falls back to a plain ``pd.read_csv`` if the cache cannot be written
+    (e.g. a read-only data directory).
+    """
+    source_path = Path(source_path)
+    if digest is None:
+        digest = file_digest(source_path)
+
+    df = read_cache(source_path, digest)
+    if df is not None:
+        return df
+
+    df = pd.read_csv(source_path)
+    try:
+        write_cache(source_path, digest, df)
+        cached = read_cache(source_path, digest)
+        if cached is not None:
+            return cached
+    except OSError as e:
+        print(f"Could not write data cache for {source_path.name}: {e}")
+    return df
+
+def validate_cache(source_path):
+    """
+    Check that the cache for a source matches its current contents.
+
+    Returns (ok, message).
+    """
+    source_path = Path(source_path)
+    if not source_path.exists():
+        return False, f"source missing: {source_path}"
+
+    digest = file_digest(source_path)
+    cached = read_cache(source_path, digest)
+    if cached is None:
+        return False, f"no cache for current content ({digest[:16]})"
+
+    expected = pd.read_csv(source_path)
+    if list(cached.columns) != list(expected.columns) or len(cached) != len(expected):
+        return False, "shape mismatch"
+    try:
+        pd.testing.assert_frame_equal(cached, expected, check_dtype=False)
+    except AssertionError as e:
+        return False, f"content mismatch: {e}"
+    return True, f"ok ({len(cached)} rows, {digest[:16]})"
+
+def _selected(name):
+    data_path = get_data_path()
+    names = [name] if name else list(DATASETS)
+    return [(key, data_path / DATASETS[key]) for key in names]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the columnar data cache")
+    parser.add_argument("command", choices=["rebuild", "validate", "clear"])
+    parser.add_argument("--name", choices=list(DATASETS), default=None,
+                        help="Only act on one dataset (default: all)")
+    args = parser.parse_args(argv)
+
+    if args.command == "clear":
+        shutil.rmtree(get_cache_root(), ignore_errors=True)
+        print(f"Removed {get_cache_root()}")
+        return 0
+
+    failed = False
+    for key, path in _selected(args.name):
+        if not path.exists():
+            print(f"{key}: source missing ({path}), skipped")
+            continue
+        if args.command == "rebuild":
+            target = write_cache(path)
+            print(f"{key}: cache written to {target}")
+        else:
+            ok, message = validate_cache(path)
+            print(f"{key}: {message}")
+            failed = failed or not ok
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,15 @@
 import pandas as pd
 import os
+import threading
+import hashlib
 from pathlib import Path
 
+from app.core.metrics import timed
+
+
+MATCHES_FILE = "matches_cleaned_original_mode.csv"
+DELIVERIES_FILE = "deliveries_cleaned_original_mode.csv"
+
 
 def get_data_path():
     """Get the path to the shared top-level data directory.
@@ -21,29 +29,173 @@ def get_data_path():
     project_root = Path(__file__).resolve().parents[3]
     return project_root / "data"
 
+def file_digest(path, chunk_size=1 << 20):
+    """Return the sha256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _DatasetEntry:
+    """A single CSV held in memory together with the signature it was loaded from"""
+
+    def __init__(self, path):
+        self.path = path
+        self.frame = None
+        self.signature = None
+        self.digest = None
+        self.version = 0
+        self.codes = {}
+
+
+class DataStore:
+    """
+    Process-wide, load-once holder for the matches and deliveries data.
+
+    Frames are parsed the first time they are requested and then shared by
+    every predictor and trainer. Each access does a cheap ``os.stat`` on the
+    source file; when its mtime/size changes the content hash is recomputed
+    and, if the content really changed, the frame is reloaded.
+
+    The returned DataFrames are shared, not copied: callers must treat them as
+    read-only and take their own ``.copy()`` before mutating anything.
+    """
+
+    def __init__(self, data_path=None):
+        self.data_path = Path(data_path) if data_path is not None else get_data_path()
+        self._lock = threading.RLock()
+        self._entries = {
+            "matches": _DatasetEntry(self.data_path / MATCHES_FILE),
+            "deliveries": _DatasetEntry(self.data_path / DELIVERIES_FILE),
+        }
+
+    def _read(self, path, digest):
+        # Imported here to avoid a circular import (data_cache uses get_data_path)
+        from app.core.data_cache import load_csv
+        return load_csv(path, digest)
+
+    def _get(self, name):
+        entry = self._entries[name]
+        if not entry.path.exists():
+            raise FileNotFoundError(f"{name.capitalize()} file not found: {entry.path}")
+
+        stat = os.stat(entry.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        frame = entry.frame
+        if frame is not None and entry.signature == signature:
+            return frame
+
+        with self._lock:
+            # Another thread may have finished the reload while we waited
+            if entry.frame is not None and entry.signature == signature:
+                return entry.frame
+
+            digest = file_digest(entry.path)
+            if entry.frame is not None and entry.digest == digest:
+                # Touched but unchanged, no need to re-parse
+                entry.signature = signature
+                return entry.frame
+
+            frame = self._read(entry.path, digest)
+            entry.frame = frame
+            entry.digest = digest
+            entry.signature = signature
+            entry.version += 1
+            entry.codes = {}
+            print(f"Loaded {len(frame)} {name} from {entry.path}")
+            return frame
+
+    @property
+    def matches(self):
+        """Shared matches DataFrame (read-only)"""
+        return self._get("matches")
+
+    @property
+    def deliveries(self):
+        """Shared deliveries DataFrame (read-only)"""
+        return self._get("deliveries")
+
+    def fingerprint(self, name):
+        """Content hash of the currently loaded dataset, loading it if needed"""
+        self._get(name)
+        return self._entries[name].digest
+
+    def digest(self, name):
+        """
+        Content hash of a dataset's file, without parsing it: the loaded
+        frame's hash when it is current, otherwise a hash of the file
+        """
+        entry = self._entries[name]
+        if not entry.path.exists():
+            raise FileNotFoundError(f"{name.capitalize()} file not found: {entry.path}")
+        stat = os.stat(entry.path)
+        if entry.frame is not None and entry.signature == (stat.st_mtime_ns, stat.st_size):
+            return entry.digest
+        return file_digest(entry.path)
+
+    def codes(self, name, column):
+        """
+        int32 vocabulary codes of a team/venue/player column
+        (see app.core.vocabulary), read from the data cache when possible.
+        """
+        # Imported here to avoid a circular import (both use get_data_path)
+        from app.core.data_cache import read_codes
+        from app.core.vocabulary import domain_of, get_vocabulary
+
+        domain = domain_of(column)
+        if domain is None:
+            raise KeyError(f"{column} is not a vocabulary column")
+        frame = self._get(name)
+        entry = self._entries[name]
+        codes = entry.codes.get(column)
+        if codes is None:
+            with self._lock:
+                codes = read_codes(entry.path, entry.digest, column)
+                if codes is None:
+                    codes = get_vocabulary(self.data_path).encode(domain, frame[column])
+                entry.codes[column] = codes
+        return codes
+
+    def version(self, name):
+        """Number of times the dataset has been (re)loaded in this process"""
+        return self._entries[name].version
+
+    def invalidate(self, name=None):
+        """Drop cached frames so the next access re-reads them from disk"""
+        with self._lock:
+            names = [name] if name else list(self._entries)
+            for key in names:
+                entry = self._entries[key]
+                entry.frame = None
+                entry.signature = None
+                entry.digest = None
+                entry.codes = {}
+
+
+# Global data store instance
+_store = None
+_store_lock = threading.Lock()
+
+def get_data_store():
+    """Get or create the global data store instance"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DataStore()
+    return _store
+
 def load_matches_data():
-    """Load matches_cleaned_original_mode.csv"""
-    data_path = get_data_path()
-    matches_file = data_path / "matches_cleaned_original_mode.csv"
-    
-    if not matches_file.exists():
-        raise FileNotFoundError(f"Matches file not found: {matches_file}")
-    
-    df = pd.read_csv(matches_file)
-    print(f"Loaded {len(df)} matches from {matches_file}")
-    return df
+    """Load matches_cleaned_original_mode.csv (shared, read-only)"""
+    with timed("load_matches_data"):
+        return get_data_store().matches
 
 def load_deliveries_data():
-    """Load deliveries_cleaned_original_mode.csv"""
-    data_path = get_data_path()
-    deliveries_file = data_path / "deliveries_cleaned_original_mode.csv"
-    
-    if not deliveries_file.exists():
-        raise FileNotFoundError(f"Deliveries file not found: {deliveries_file}")
-    
-    df = pd.read_csv(deliveries_file)
-    print(f"Loaded {len(df)} deliveries from {deliveries_file}")
-    return df
+    """Load deliveries_cleaned_original_mode.csv (shared, read-only)"""
+    with timed("load_deliveries_data"):
+        return get_data_store().deliveries
 
 def load_all_data():
     """Load both matches and deliveries data"""
@@ -0,0 +1,140 @@
+"""
+Bounded worker pool for CPU-bound prediction work.
+
+The route handlers are ``async def``; calling sklearn/pandas code directly
+would block the event loop and stall every other request on the worker.
+``run_blocking`` dispatches the call to a thread or process pool instead,
+rejects work once the pool and its queue are full, and gives up waiting
+after a per-request timeout.
+
+Configured through the environment:
+    ML_EXECUTOR         "thread" (default) or "process"
+    ML_POOL_SIZE        worker threads/processes (default: min(4, CPU count))
+    ML_QUEUE_DEPTH      requests allowed to wait for a free worker (default 64)
+    ML_REQUEST_TIMEOUT  seconds to wait for a result (default 30, 0 disables)
+
+With the process pool every process loads its own copy of the models
+(shared via the memory-mapped artifacts), and functions passed to
+``run_blocking`` must be importable module-level functions.
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+class ExecutorOverloaded(Exception):
+    """Raised when the pool and its queue are full"""
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class BoundedExecutor:
+    """A thread/process pool that admits at most ``pool_size + queue_depth`` calls"""
+
+    def __init__(self, kind=None, pool_size=None, queue_depth=None, timeout=None):
+        self.kind = (kind or os.environ.get("ML_EXECUTOR", "thread")).lower()
+        if self.kind not in ("thread", "process"):
+            raise ValueError("ML_EXECUTOR must be 'thread' or 'process'")
+        self.pool_size = pool_size or _env_int("ML_POOL_SIZE", min(4, os.cpu_count() or 1))
+        self.queue_depth = queue_depth if queue_depth is not None else _env_int("ML_QUEUE_DEPTH", 64)
+        timeout = timeout if timeout is not None else _env_float("ML_REQUEST_TIMEOUT", 30.0)
+        self.timeout = timeout if timeout > 0 else None
+
+        self._pool = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @property
+    def capacity(self):
+        return self.pool_size + self.queue_depth
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.kind == "process":
+                        self._pool = ProcessPoolExecutor(max_workers=self.pool_size)
+                    else:
+                        self._pool = ThreadPoolExecutor(
+                            max_workers=self.pool_size, thread_name_prefix="ml-predict"
+                        )
+        return self._pool
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in the pool and await its result"""
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise ExecutorOverloaded(
+                    f"Prediction queue is full ({self.in_flight} of {self.capacity} slots in use)"
+                )
+            self.in_flight += 1
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_pool(), functools.partial(fn, *args, **kwargs))
+        # Release the slot when the work really finishes, not when we stop
+        # waiting for it, so timed-out work still counts against capacity
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+
+    def _release(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self):
+        return {
+            "kind": self.kind,
+            "pool_size": self.pool_size,
+            "queue_depth": self.queue_depth,
+            "timeout": self.timeout,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+# Global executor instance
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """Get or create the global bounded executor"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = BoundedExecutor()
+    return _executor
+
+async def run_blocking(fn, *args, **kwargs):
+    """Await ``fn(*args, **kwargs)`` on the global bounded executor"""
+    return await get_executor().run(fn, *args, **kwargs)
+
+def shutdown_executor():
+    if _executor is not None:
+        _executor.shutdown()
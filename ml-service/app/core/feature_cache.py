@@ -0,0 +1,208 @@
+"""
+Content-addressed cache of training feature matrices.
+
+``build_training_data`` repeats the deliveries/matches merge, the
+cumulative groupbys and the season parsing on every training run, even when
+only model hyper-parameters changed. This module stores its outputs
+(X, y and the fitted encoders) in ``data/cache/features/<model>/<key>/``.
+Score features are built from the deliveries file streamed in chunks
+(app.core.chunked_loader), so a build only holds one chunk of deliveries
+and the per-match summaries in memory.
+The key hashes:
+
+    - the content digests of the input CSVs (already computed by the
+      DataStore when it has loaded them; the deliveries file is otherwise
+      hashed without being parsed)
+    - the source of the feature module and of every module it builds with
+      (feature_encoding.py, vocabulary.py), so any change to the feature
+      code produces a new key
+
+A hit loads the matrices straight from ``.npy`` files. When an entry is
+written, older entries for the same model are stale (different data or
+feature code) and are evicted, as in the columnar data cache.
+
+Set ``ML_FEATURE_CACHE=0`` to always rebuild.
+
+Usage:
+    python -m app.core.feature_cache build [--model match_winner|score_prediction]
+    python -m app.core.feature_cache clear
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.core.data_loader import get_data_store, DELIVERIES_FILE
+from app.core.chunked_loader import iter_deliveries
+from app.core.data_cache import get_cache_root
+from app.core.vocabulary import get_vocabulary
+
+FEATURE_CACHE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+# model -> (feature module, datasets passed to build_training_data, in order)
+FEATURE_BUILDERS = {
+    "match_winner": ("app.core.features_match_winner", ("matches",)),
+    "score_prediction": ("app.core.features_score_prediction", ("deliveries", "matches")),
+}
+
+# Modules the feature builds depend on, hashed together with the feature module
+SHARED_MODULES = ("app.core.feature_encoding", "app.core.vocabulary", "app.core.chunked_loader")
+
+
+def is_enabled():
+    return os.environ.get("ML_FEATURE_CACHE", "1").lower() not in ("0", "false", "no")
+
+def get_feature_cache_root(store=None):
+    store = store or get_data_store()
+    return get_cache_root(store.data_path) / "features"
+
+def code_version(module_name):
+    """Hash of the source of the feature module and of SHARED_MODULES"""
+    digest = hashlib.sha256()
+    for name in (module_name,) + SHARED_MODULES:
+        digest.update(Path(importlib.import_module(name).__file__).read_bytes())
+    return digest.hexdigest()
+
+def cache_key(name, store=None):
+    store = store or get_data_store()
+    module_name, datasets = FEATURE_BUILDERS[name]
+    payload = json.dumps({
+        "version": FEATURE_CACHE_VERSION,
+        "model": name,
+        "data": {dataset: store.digest(dataset) for dataset in datasets},
+        "code": code_version(module_name),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _entry_dir(name, key, store=None):
+    return get_feature_cache_root(store) / name / key[:16]
+
+def read_entry(name, key, store=None):
+    """Return (X, y, encoders) for ``key``, or None when not cached"""
+    entry = _entry_dir(name, key, store)
+    manifest_path = entry / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    try:
+        with open(manifest_path) as fh:
+            manifest = json.load(fh)
+        if manifest.get("version") != FEATURE_CACHE_VERSION or manifest.get("key") != key:
+            return None
+        index = pd.Index(np.load(entry / "index.npy"), name=manifest["index_name"])
+        X = pd.DataFrame(
+            {column: np.load(entry / f"x{i}.npy") for i, column in enumerate(manifest["columns"])},
+            index=index,
+        )
+        y = np.load(entry / "y.npy")
+        encoders = joblib.load(entry / "encoders.joblib")
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring unreadable feature cache {entry}: {e}")
+        return None
+    return X, y, encoders
+
+def write_entry(name, key, X, y, encoders, store=None):
+    """Store a feature build and evict the older entries of the same model"""
+    target = _entry_dir(name, key, store)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write into a temp dir first so readers never see a half-written entry
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".tmp-", dir=target.parent))
+    try:
+        for i, column in enumerate(X.columns):
+            np.save(tmp_dir / f"x{i}.npy", X[column].to_numpy())
+        np.save(tmp_dir / "index.npy", X.index.to_numpy())
+        np.save(tmp_dir / "y.npy", np.asarray(y))
+        joblib.dump(encoders, tmp_dir / "encoders.joblib")
+        manifest = {
+            "version": FEATURE_CACHE_VERSION,
+            "key": key,
+            "rows": int(len(X)),
+            "columns": list(X.columns),
+            "index_name": X.index.name,
+        }
+        with open(tmp_dir / MANIFEST_NAME, "w") as fh:
+            json.dump(manifest, fh)
+
+        if target.exists():
+            shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_dir, target)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    evict_stale(name, keep=target.name, store=store)
+    return target
+
+def evict_stale(name, keep=None, store=None):
+    """Remove cached feature builds of a model other than ``keep``"""
+    model_dir = get_feature_cache_root(store) / name
+    if not model_dir.exists():
+        return
+    for entry in model_dir.iterdir():
+        if entry.name != keep:
+            shutil.rmtree(entry, ignore_errors=True)
+
+def _build(name, store):
+    module_name, datasets = FEATURE_BUILDERS[name]
+    module = importlib.import_module(module_name)
+    vocabulary = get_vocabulary(store.data_path)
+    if name == "score_prediction":
+        chunks = iter_deliveries(store.data_path / DELIVERIES_FILE, usecols=module.DELIVERY_COLUMNS)
+        return module.build_training_data_chunked(chunks, store.matches, vocabulary=vocabulary)
+    frames = [getattr(store, dataset) for dataset in datasets]
+    return module.build_training_data(*frames, vocabulary=vocabulary)
+
+def load_training_data(name, store=None):
+    """
+    Training (X, y, encoders) for a model from the shared data store,
+    served from the feature cache when the data and feature code are
+    unchanged.
+    """
+    store = store or get_data_store()
+    if not is_enabled():
+        return _build(name, store)
+
+    key = cache_key(name, store)
+    cached = read_entry(name, key, store)
+    if cached is not None:
+        print(f"Loaded {name} training features from cache ({len(cached[0])} samples)")
+        return cached
+
+    X, y, encoders = _build(name, store)
+    try:
+        write_entry(name, key, X, y, encoders, store)
+    except OSError as e:
+        print(f"Could not write feature cache for {name}: {e}")
+    return X, y, encoders
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the training feature cache")
+    parser.add_argument("command", choices=["build", "clear"])
+    parser.add_argument("--model", choices=list(FEATURE_BUILDERS), default=None,
+                        help="Only act on one model (default: all)")
+    args = parser.parse_args(argv)
+
+    if args.command == "clear":
+        root = get_feature_cache_root()
+        shutil.rmtree(root, ignore_errors=True)
+        print(f"Removed {root}")
+        return 0
+
+    names = [args.model] if args.model else list(FEATURE_BUILDERS)
+    for name in names:
+        X, _, _ = load_training_data(name)
+        print(f"{name}: {len(X)} rows cached in {_entry_dir(name, cache_key(name))}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Compiled categorical feature encoders shared by training and inference.
+
+Fitted LabelEncoders are compiled once (at training time or model load) into
+plain dictionaries mapping category -> code, with a precomputed fallback for
+unseen categories. Encoding a request is then a handful of dict lookups into
+a freshly allocated row, with no sklearn or pandas calls, and the same object
+encodes whole columns for training and batches for inference. Team, venue and
+player columns are encoded through their int32 vocabulary ids
+(app.core.vocabulary): one lookup table per feature maps ids to codes.
+"""
+import copy
+import re
+
+import numpy as np
+
+from app.core.vocabulary import domain_of, get_vocabulary
+
+DEFAULT_SEASON = 2008.0  # First IPL season
+UNSEEN_CODE = 0
+
+_YEAR_PATTERN = re.compile(r'(\d{4})')
+_DIGITS_PATTERN = re.compile(r'(\d+)')
+
+
+def parse_season(value):
+    """Season number from values like 2017, '2017' or 'IPL-2017'"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value) if value == value else DEFAULT_SEASON
+    season_str = str(value)
+    if season_str.isdigit():
+        return float(season_str)
+    match = _YEAR_PATTERN.search(season_str) or _DIGITS_PATTERN.search(season_str)
+    return float(match.group(1)) if match else DEFAULT_SEASON
+
+
+def extend_encoders(encoders, columns):
+    """
+    Append unseen categories to fitted encoders without renumbering.
+
+    Existing categories keep their codes, so trees trained on earlier codes
+    stay valid; new categories get the next free codes. The returned
+    encoders are copies and their ``classes_`` are no longer sorted, so they
+    must only be used through CompiledEncoder (never ``LabelEncoder.transform``).
+
+    Args:
+        encoders: Dictionary of fitted LabelEncoders keyed by feature name
+        columns: Dictionary of feature name -> iterable of new values
+
+    Returns:
+        New dictionary of encoders
+    """
+    extended = dict(encoders)
+    for feature_name, values in columns.items():
+        encoder = encoders.get(feature_name)
+        if encoder is None:
+            continue
+        known = {str(c) for c in encoder.classes_}
+        new = []
+        for value in values:
+            value = str(value)
+            if value not in known:
+                known.add(value)
+                new.append(value)
+        if new:
+            encoder = copy.copy(encoder)
+            encoder.classes_ = np.concatenate([
+                np.asarray(encoders[feature_name].classes_, dtype=object),
+                np.asarray(new, dtype=object),
+            ])
+            extended[feature_name] = encoder
+    return extended
+
+
+class CompiledEncoder:
+    """
+    Dictionary-backed transformer from input dictionaries to feature rows.
+
+    Column order is: categorical features (in the order given), season_num,
+    then numeric passthrough features.
+
+    Args:
+        encoders: Dictionary of fitted LabelEncoders keyed by feature name
+        categorical: Sequence of (input_key, feature_name) pairs
+        numeric: Sequence of (input_key, feature_name) pairs copied as floats
+            (missing values become 0)
+    """
+
+    def __init__(self, encoders, categorical, numeric=()):
+        self.categorical = list(categorical)
+        self.numeric = list(numeric)
+        self.maps = {}
+        for _, feature_name in self.categorical:
+            encoder = encoders.get(feature_name)
+            classes = encoder.classes_ if encoder is not None else []
+            self.maps[feature_name] = {str(c): i for i, c in enumerate(classes)}
+        self.feature_names = (
+            [f'{name}_encoded' for _, name in self.categorical]
+            + ['season_num']
+            + [name for _, name in self.numeric]
+        )
+        self.n_features = len(self.feature_names)
+        self._season_col = len(self.categorical)
+        self._tables = {}
+
+    def encode_value(self, feature_name, value):
+        """Code for a single category, UNSEEN_CODE if it was not seen in training"""
+        return self.maps[feature_name].get(str(value), UNSEEN_CODE)
+
+    def _vocab_table(self, feature_name, vocabulary, domain):
+        """Feature codes indexed by vocabulary id, plus a trailing slot for MISSING"""
+        size = vocabulary.size(domain)
+        cached = self._tables.get(feature_name)
+        if cached is not None and cached[0] is vocabulary and len(cached[1]) == size + 1:
+            return cached[1]
+        mapping = self.maps[feature_name]
+        table = np.fromiter(
+            (mapping.get(name, UNSEEN_CODE) for name in vocabulary.names(domain)),
+            dtype=np.int64, count=size,
+        )
+        # Missing values encode like str(nan) did before
+        table = np.append(table, mapping.get('nan', UNSEEN_CODE))
+        self._tables[feature_name] = (vocabulary, table)
+        return table
+
+    def encode_codes(self, feature_name, codes, domain, vocabulary=None):
+        """Vector of codes for int32 vocabulary ids of ``domain``"""
+        vocabulary = vocabulary or get_vocabulary()
+        table = self._vocab_table(feature_name, vocabulary, domain)
+        # MISSING (-1) indexes the trailing slot
+        return table[np.asarray(codes)]
+
+    def encode_column(self, feature_name, values, vocabulary=None):
+        """Vector of codes for an iterable of categories"""
+        domain = domain_of(feature_name)
+        if domain is not None:
+            vocabulary = vocabulary or get_vocabulary()
+            return self.encode_codes(feature_name, vocabulary.encode(domain, values), domain, vocabulary)
+        mapping = self.maps[feature_name]
+        return np.fromiter(
+            (mapping.get(str(v), UNSEEN_CODE) for v in values),
+            dtype=np.int64,
+        )
+
+    def _fill(self, row, input_dict):
+        col = 0
+        for input_key, feature_name in self.categorical:
+            value = input_dict.get(input_key)
+            row[col] = UNSEEN_CODE if value is None else self.maps[feature_name].get(str(value), UNSEEN_CODE)
+            col += 1
+        season = input_dict.get('season')
+        row[col] = DEFAULT_SEASON if season is None else parse_season(season)
+        col += 1
+        for input_key, _ in self.numeric:
+            row[col] = float(input_dict.get(input_key, 0))
+            col += 1
+
+    def transform_one(self, input_dict):
+        """Feature row of shape (1, n_features) for a single input dictionary"""
+        row = np.empty((1, self.n_features))
+        self._fill(row[0], input_dict)
+        return row
+
+    def transform_many(self, input_dicts):
+        """Feature matrix of shape (len(input_dicts), n_features)"""
+        matrix = np.empty((len(input_dicts), self.n_features))
+        for i, input_dict in enumerate(input_dicts):
+            self._fill(matrix[i], input_dict)
+        return matrix
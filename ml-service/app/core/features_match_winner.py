@@ -4,12 +4,31 @@ from sklearn.preprocessing import LabelEncoder
 import joblib
 from pathlib import Path
 
-def build_training_data(matches_df):
+from app.core.feature_encoding import CompiledEncoder, parse_season, extend_encoders, DEFAULT_SEASON
+from app.core.vocabulary import get_vocabulary
+
+# (input key, feature name) for the categorical inputs, in feature order
+INPUT_KEY_MAPPING = [
+    ('team1', 'team1'),
+    ('team2', 'team2'),
+    ('venue', 'venue'),
+    ('tossWinner', 'toss_winner'),
+    ('tossDecision', 'toss_decision'),
+]
+
+def build_training_data(matches_df, encoders=None, vocabulary=None):
     """
     Build training data for match winner prediction
     
+    Args:
+        matches_df: Matches to build rows for
+        encoders: Existing encoders to reuse (extended with unseen categories,
+            existing codes unchanged), or None to fit new ones
+        vocabulary: Vocabulary of the data directory the matches come from
+            (default: the shared data directory)
+    
     Returns:
-        X: Feature DataFrame
+        X: Feature DataFrame indexed by match id
         y: Target array (1 if team1 wins, 0 if team2 wins)
         encoders: Dictionary of fitted encoders
     """
@@ -20,8 +39,9 @@ def build_training_data(matches_df):
     df = df.dropna(subset=['winner'])
     df = df[df['winner'].str.strip() != '']
     
-    # Create target variable: 1 if team1 wins, 0 if team2 wins
-    df['team1_wins'] = (df['winner'] == df['team1']).astype(int)
+    # Create target variable: 1 if team1 wins, 0 if team2 wins (compared as team ids)
+    vocabulary = vocabulary or get_vocabulary()
+    df['team1_wins'] = (vocabulary.encode('team', df['winner']) == vocabulary.encode('team', df['team1'])).astype(int)
     
     # Select features for training
     feature_columns = ['team1', 'team2', 'venue', 'toss_winner', 'toss_decision', 'season']
@@ -33,38 +53,33 @@ def build_training_data(matches_df):
     
     # Extract season number from season column (handle formats like 'IPL-2017')
     if 'season' in df.columns:
-        season_str = df['season'].astype(str)
-
-        # First try to grab a 4-digit year
-        season_year = season_str.str.extract(r'(\d{4})')[0]
-
-        # Fallback: any digits
-        season_any = season_str.str.extract(r'(\d+)')[0]
-
-        # Convert to numeric, coercing errors to NaN
-        season_num = pd.to_numeric(season_year, errors='coerce')
-        season_num = season_num.fillna(pd.to_numeric(season_any, errors='coerce'))
-        season_num = season_num.fillna(2008).astype(float)  # Default to first IPL season
-
-        df['season_num'] = season_num
+        df['season_num'] = df['season'].map(parse_season).astype(float)
     else:
-        df['season_num'] = 2008.0
-    
-    # Initialize encoders
-    encoders = {}
+        df['season_num'] = DEFAULT_SEASON
     
-    # Encode categorical features
+    # Fit encoders, then encode through the compiled transformer so training
+    # and inference share one encoding implementation
     categorical_features = ['team1', 'team2', 'venue', 'toss_winner', 'toss_decision']
     
+    if encoders is None:
+        encoders = {}
+        for feature in categorical_features:
+            if feature in df.columns:
+                encoders[feature] = LabelEncoder().fit(df[feature].astype(str))
+    else:
+        encoders = extend_encoders(encoders, {
+            feature: df[feature] for feature in categorical_features if feature in df.columns
+        })
+    
+    transformer = compile_encoders(encoders)
     for feature in categorical_features:
         if feature in df.columns:
-            encoder = LabelEncoder()
-            df[f'{feature}_encoded'] = encoder.fit_transform(df[feature].astype(str))
-            encoders[feature] = encoder
+            df[f'{feature}_encoded'] = transformer.encode_column(feature, df[feature], vocabulary)
     
     # Create feature matrix
     feature_cols = [f'{f}_encoded' for f in categorical_features if f in df.columns] + ['season_num']
     X = df[feature_cols].copy()
+    X.index = pd.Index(df['id'].to_numpy(), name='match_id')
     y = df['team1_wins'].values
     
     print(f"Built training data: {X.shape[0]} samples, {X.shape[1]} features")
@@ -72,59 +87,38 @@ def build_training_data(matches_df):
     
     return X, y, encoders
 
+def compile_encoders(encoders):
+    """
+    Compile fitted encoders into the dictionary-backed transformer used for
+    both training and inference. Already compiled transformers pass through.
+    """
+    if isinstance(encoders, CompiledEncoder):
+        return encoders
+    categorical = [(key, name) for key, name in INPUT_KEY_MAPPING if name in encoders]
+    return CompiledEncoder(encoders, categorical)
+
 def build_single_feature_row(input_dict, encoders):
     """
     Build feature row for a single prediction
     
     Args:
         input_dict: Dictionary with keys: team1, team2, venue, tossWinner, tossDecision, season
-        encoders: Dictionary of fitted encoders
+        encoders: Compiled transformer (preferred) or dictionary of fitted encoders
     
     Returns:
         Feature array for prediction
     """
-    features = {}
-    
-    # Map input keys to feature names
-    key_mapping = {
-        'team1': 'team1',
-        'team2': 'team2', 
-        'venue': 'venue',
-        'tossWinner': 'toss_winner',
-        'tossDecision': 'toss_decision',
-        'season': 'season'
-    }
-    
-    # Encode categorical features
-    for input_key, feature_name in key_mapping.items():
-        if input_key in input_dict and feature_name in encoders:
-            value = str(input_dict[input_key])
-            encoder = encoders[feature_name]
-            
-            # Handle unseen categories
-            try:
-                encoded_value = encoder.transform([value])[0]
-            except ValueError:
-                # Use the most frequent class for unseen categories
-                encoded_value = 0
-            
-            features[f'{feature_name}_encoded'] = encoded_value
-    
-    # Handle season
-    if 'season' in input_dict:
-        season_str = str(input_dict['season'])
-        if season_str.isdigit():
-            features['season_num'] = float(season_str)
-        else:
-            # Extract year from formats like 'IPL-2017'
-            import re
-            match = re.search(r'(\d{4})', season_str)
-            features['season_num'] = float(match.group(1)) if match else 2008.0
-    else:
-        features['season_num'] = 2008.0
+    return compile_encoders(encoders).transform_one(input_dict)
+
+def build_feature_matrix(input_dicts, encoders):
+    """
+    Build the feature matrix for many predictions at once
     
-    # Create feature array in correct order
-    feature_order = [f'{f}_encoded' for f in ['team1', 'team2', 'venue', 'toss_winner', 'toss_decision'] if f in encoders] + ['season_num']
-    feature_array = np.array([features.get(col, 0) for col in feature_order]).reshape(1, -1)
+    Args:
+        input_dicts: List of dictionaries shaped like build_single_feature_row input
+        encoders: Compiled transformer (preferred) or dictionary of fitted encoders
     
-    return feature_array
+    Returns:
+        Feature array of shape (len(input_dicts), n_features), rows in input order
+    """
+    return compile_encoders(encoders).transform_many(input_dicts)
@@ -3,97 +3,154 @@ import numpy as np
 from sklearn.preprocessing import LabelEncoder
 import joblib
 
-def build_training_data(deliveries_df, matches_df):
+from app.core.feature_encoding import CompiledEncoder, parse_season, extend_encoders
+from app.core.vocabulary import MISSING, get_vocabulary
+
+# (input key, feature name) for the categorical inputs, in feature order
+INPUT_KEY_MAPPING = [
+    ('battingTeam', 'batting_team'),
+    ('bowlingTeam', 'bowling_team'),
+    ('venue', 'venue'),
+]
+
+# Current match state, copied through as floats after season_num
+NUMERIC_KEY_MAPPING = [
+    ('wickets', 'final_wickets'),
+    ('overs', 'final_over'),
+]
+
+# Deliveries columns read by first_innings_summary
+DELIVERY_COLUMNS = ['match_id', 'inning', 'ball', 'total_runs', 'player_dismissed',
+                    'batting_team', 'bowling_team']
+
+# How per-match summaries of consecutive delivery chunks combine
+SUMMARY_AGG = {
+    'final_score': 'sum',
+    'final_wickets': 'sum',
+    'final_over': 'last',
+    'batting_team': 'first',
+    'bowling_team': 'first',
+}
+
+def _team_ids(vocabulary, values):
+    """Nullable int32 team ids, so 'first' skips missing teams like it skips NaN"""
+    codes = vocabulary.encode('team', values)
+    return pd.arrays.IntegerArray(codes, codes == MISSING)
+
+def first_innings_summary(deliveries_df, vocabulary=None):
+    """
+    Per-match first innings totals (runs, wickets, last over, team ids)
+    
+    Args:
+        deliveries_df: Deliveries, in file order; may be one chunk of the file
+        vocabulary: Vocabulary the team ids refer to (default: the shared
+            data directory's)
+    
+    Returns:
+        DataFrame with one row per match_id and the SUMMARY_AGG columns
+    """
+    first_innings = deliveries_df[deliveries_df['inning'] == 1]
+    vocabulary = vocabulary or get_vocabulary()
+    
+    # Derive a wicket flag from player_dismissed (since there is no explicit is_wicket column)
+    dismissed = first_innings['player_dismissed']
+    is_wicket = dismissed.notna() & dismissed.astype(str).str.strip().ne('')
+    
+    # Over number of each ball (ball 1-6 of each over); int64 so compact
+    # chunk dtypes give the same features as a full read
+    balls = pd.DataFrame({
+        'match_id': first_innings['match_id'].to_numpy(dtype=np.int64),
+        'final_score': first_innings['total_runs'].to_numpy(dtype=np.int64),
+        'final_wickets': is_wicket.to_numpy(dtype=np.int64),
+        'final_over': (first_innings['ball'].to_numpy(dtype=np.int64) - 1) // 6,
+        'batting_team': _team_ids(vocabulary, first_innings['batting_team']),
+        'bowling_team': _team_ids(vocabulary, first_innings['bowling_team']),
+    })
+    return balls.groupby('match_id').agg(SUMMARY_AGG).reset_index()
+
+def combine_summaries(summaries):
+    """Merge first innings summaries of consecutive chunks (a match may span two)"""
+    return pd.concat(list(summaries), ignore_index=True).groupby('match_id').agg(SUMMARY_AGG).reset_index()
+
+def build_training_data(deliveries_df, matches_df, encoders=None, vocabulary=None):
     """
     Build training data for first innings score prediction
     
+    Args:
+        deliveries_df: Deliveries of the matches to build rows for
+        matches_df: Matches (only the ones referenced by deliveries are used)
+        encoders: Existing encoders to reuse (extended with unseen categories,
+            existing codes unchanged), or None to fit new ones
+        vocabulary: Vocabulary of the data directory the data comes from
+            (default: the shared data directory)
+    
     Returns:
-        X: Feature DataFrame
+        X: Feature DataFrame indexed by match id
         y: Target array (final first innings scores)
         encoders: Dictionary of fitted encoders
     """
-    # Merge deliveries with matches to get additional context
-    deliveries_with_matches = deliveries_df.merge(
-        matches_df[['id', 'season', 'venue', 'team1', 'team2']], 
-        left_on='match_id', 
-        right_on='id', 
-        how='left'
-    )
-    
-    # Filter for first innings only
-    first_innings = deliveries_with_matches[deliveries_with_matches['inning'] == 1].copy()
+    vocabulary = vocabulary or get_vocabulary()
+    summary = first_innings_summary(deliveries_df, vocabulary)
+    return build_training_data_from_summary(summary, matches_df, encoders, vocabulary)
 
-    # Derive a wicket flag from player_dismissed (since there is no explicit is_wicket column)
-    first_innings['is_wicket_flag'] = (
-        first_innings['player_dismissed']
-        .fillna('')
-        .astype(str)
-        .str.strip()
-        .ne('')
-        .astype(int)
+def build_training_data_chunked(chunks, matches_df, encoders=None, vocabulary=None):
+    """
+    Build the same training data from an iterable of delivery chunks
+    (e.g. ``chunked_loader.iter_deliveries``); only one chunk and the
+    per-match summaries are held in memory at a time.
+    """
+    vocabulary = vocabulary or get_vocabulary()
+    summary = combine_summaries(first_innings_summary(chunk, vocabulary) for chunk in chunks)
+    return build_training_data_from_summary(summary, matches_df, encoders, vocabulary)
+
+def build_training_data_from_summary(summary, matches_df, encoders=None, vocabulary=None):
+    """Feature matrix from per-match first innings summaries"""
+    # Add match context
+    match_final_stats = summary.merge(
+        matches_df[['id', 'season', 'venue']],
+        left_on='match_id',
+        right_on='id',
+        how='left'
     )
     
-    # Calculate cumulative statistics for each match
-    first_innings['cumulative_runs'] = first_innings.groupby('match_id')['total_runs'].cumsum()
-    first_innings['cumulative_wickets'] = first_innings.groupby('match_id')['is_wicket_flag'].cumsum()
-    
-    # Calculate over number (ball 1-6 of each over)
-    first_innings['over_num'] = (first_innings['ball'] - 1) // 6
-    first_innings['ball_in_over'] = ((first_innings['ball'] - 1) % 6) + 1
-    
-    # Get final statistics for each match (last ball of first innings)
-    match_final_stats = first_innings.groupby('match_id').agg({
-        'cumulative_runs': 'last',
-        'cumulative_wickets': 'last',
-        'over_num': 'last',
-        'batting_team': 'first',
-        'bowling_team': 'first',
-        'season': 'first',
-        'venue': 'first'
-    }).reset_index()
-    
-    # Rename columns for clarity
-    match_final_stats.rename(columns={
-        'cumulative_runs': 'final_score',
-        'cumulative_wickets': 'final_wickets',
-        'over_num': 'final_over'
-    }, inplace=True)
-    
-    # Handle missing values
+    # Handle missing values; teams stay vocabulary ids and only the distinct
+    # teams are decoded, to fit or extend the encoders
+    vocabulary = vocabulary or get_vocabulary()
+    unknown_team = vocabulary.encode('team', ['Unknown'])[0]
     match_final_stats['venue'] = match_final_stats['venue'].fillna('Unknown')
-    match_final_stats['batting_team'] = match_final_stats['batting_team'].fillna('Unknown')
-    match_final_stats['bowling_team'] = match_final_stats['bowling_team'].fillna('Unknown')
+    team_ids = {
+        feature: match_final_stats[feature].fillna(unknown_team).to_numpy(dtype=np.int32)
+        for feature in ('batting_team', 'bowling_team')
+    }
+    categories = {
+        feature: pd.Series(vocabulary.decode('team', np.unique(ids)), dtype=object)
+        for feature, ids in team_ids.items()
+    }
+    categories['venue'] = match_final_stats['venue']
     
     # Extract season number (handle formats like 'IPL-2017')
-    season_str = match_final_stats['season'].astype(str)
-
-    # First try to grab a 4-digit year
-    season_year = season_str.str.extract(r'(\d{4})')[0]
-
-    # Fallback: any digits
-    season_any = season_str.str.extract(r'(\d+)')[0]
-
-    # Convert to numeric, coercing errors to NaN
-    season_num = pd.to_numeric(season_year, errors='coerce')
-    season_num = season_num.fillna(pd.to_numeric(season_any, errors='coerce'))
-    season_num = season_num.fillna(2008).astype(float)
-
-    match_final_stats['season_num'] = season_num
-    
-    # Initialize encoders
-    encoders = {}
+    match_final_stats['season_num'] = match_final_stats['season'].map(parse_season).astype(float)
     
-    # Encode categorical features
+    # Fit encoders, then encode through the compiled transformer so training
+    # and inference share one encoding implementation
     categorical_features = ['batting_team', 'bowling_team', 'venue']
     
-    for feature in categorical_features:
-        encoder = LabelEncoder()
-        match_final_stats[f'{feature}_encoded'] = encoder.fit_transform(match_final_stats[feature].astype(str))
-        encoders[feature] = encoder
+    if encoders is None:
+        encoders = {}
+        for feature in categorical_features:
+            encoders[feature] = LabelEncoder().fit(categories[feature].astype(str))
+    else:
+        encoders = extend_encoders(encoders, categories)
+    
+    transformer = compile_encoders(encoders)
+    for feature, ids in team_ids.items():
+        match_final_stats[f'{feature}_encoded'] = transformer.encode_codes(feature, ids, 'team', vocabulary)
+    match_final_stats['venue_encoded'] = transformer.encode_column('venue', match_final_stats['venue'], vocabulary)
     
     # Create feature matrix
     feature_cols = [f'{f}_encoded' for f in categorical_features] + ['season_num', 'final_wickets', 'final_over']
     X = match_final_stats[feature_cols].copy()
+    X.index = pd.Index(match_final_stats['match_id'].to_numpy(), name='match_id')
     y = match_final_stats['final_score'].values
     
     # Remove outliers (scores > 300 or < 50 are likely data errors)
@@ -106,60 +163,63 @@ def build_training_data(deliveries_df, matches_df):
     
     return X, y, encoders
 
+def compile_encoders(encoders):
+    """
+    Compile fitted encoders into the dictionary-backed transformer used for
+    both training and inference. Already compiled transformers pass through.
+    """
+    if isinstance(encoders, CompiledEncoder):
+        return encoders
+    return CompiledEncoder(encoders, INPUT_KEY_MAPPING, NUMERIC_KEY_MAPPING)
+
 def build_single_feature_row(input_dict, encoders):
     """
     Build feature row for a single score prediction
     
     Args:
         input_dict: Dictionary with keys: battingTeam, bowlingTeam, venue, season, currentRuns, wickets, overs
-        encoders: Dictionary of fitted encoders
+        encoders: Compiled transformer (preferred) or dictionary of fitted encoders
     
     Returns:
         Feature array for prediction
     """
-    features = {}
+    return compile_encoders(encoders).transform_one(input_dict)
+
+def build_feature_matrix(input_dicts, encoders):
+    """
+    Build the feature matrix for many score predictions at once
     
-    # Map input keys to feature names
-    key_mapping = {
-        'battingTeam': 'batting_team',
-        'bowlingTeam': 'bowling_team',
-        'venue': 'venue'
-    }
+    Args:
+        input_dicts: List of dictionaries shaped like build_single_feature_row input
+        encoders: Compiled transformer (preferred) or dictionary of fitted encoders
     
-    # Encode categorical features
-    for input_key, feature_name in key_mapping.items():
-        if input_key in input_dict and feature_name in encoders:
-            value = str(input_dict[input_key])
-            encoder = encoders[feature_name]
-            
-            # Handle unseen categories
-            try:
-                encoded_value = encoder.transform([value])[0]
-            except ValueError:
-                # Use the most frequent class for unseen categories
-                encoded_value = 0
-            
-            features[f'{feature_name}_encoded'] = encoded_value
-    
-    # Handle season
-    if 'season' in input_dict:
-        season_str = str(input_dict['season'])
-        if season_str.isdigit():
-            features['season_num'] = float(season_str)
-        else:
-            # Extract year from formats like 'IPL-2017'
-            import re
-            match = re.search(r'(\d{4})', season_str)
-            features['season_num'] = float(match.group(1)) if match else 2008.0
-    else:
-        features['season_num'] = 2008.0
+    Returns:
+        Feature array of shape (len(input_dicts), n_features), rows in input order
+    """
+    return compile_encoders(encoders).transform_many(input_dicts)
+
+def build_feature_grid(input_dict, encoders, overs_values, wickets_values):
+    """
+    Build feature rows for a grid of (overs, wickets) states sharing the same
+    teams, venue and season
+    
+    Args:
+        input_dict: Base state, same keys as build_single_feature_row
+        encoders: Compiled transformer (preferred) or dictionary of fitted encoders
+        overs_values: Sequence of overs to evaluate
+        wickets_values: Sequence of wickets to evaluate
     
-    # Add current match state features
-    features['final_wickets'] = float(input_dict.get('wickets', 0))
-    features['final_over'] = float(input_dict.get('overs', 0))
+    Returns:
+        Feature array of shape (len(overs_values) * len(wickets_values), n_features),
+        ordered by overs first, then wickets
+    """
+    base_row = build_single_feature_row(input_dict, encoders)[0]
+    overs_values = np.asarray(overs_values, dtype=float)
+    wickets_values = np.asarray(wickets_values, dtype=float)
     
-    # Create feature array in correct order
-    feature_order = [f'{f}_encoded' for f in ['batting_team', 'bowling_team', 'venue']] + ['season_num', 'final_wickets', 'final_over']
-    feature_array = np.array([features.get(col, 0) for col in feature_order]).reshape(1, -1)
+    grid = np.tile(base_row, (len(overs_values) * len(wickets_values), 1))
+    # Column order: ..., season_num, final_wickets, final_over
+    grid[:, -2] = np.tile(wickets_values, len(overs_values))
+    grid[:, -1] = np.repeat(overs_values, len(wickets_values))
     
-    return feature_array
+    return grid
@@ -0,0 +1,291 @@
+"""
+Cross-validated hyper-parameter search for the match winner and score models.
+
+Every (candidate, fold) pair is an independent task that fits one
+RandomForest with ``n_jobs=1``. Tasks run in parallel on a process pool
+(``--jobs``, default all cores). The training matrix is sent to each worker
+once, through the pool initializer.
+
+Each finished fold is written to a small JSON file keyed by a hash of the
+training data, the parameters, the fold and the CV settings. A rerun after an
+interruption only fits the missing folds, and changing the grid only fits
+the new candidates.
+
+``--train`` then fits and saves the final model with the best parameters
+through the model's trainer (the same split, metrics and artifacts as a
+regular training run).
+
+``--scaling 2,4`` reruns the whole search (without the fold cache) once
+per job count and reports wall-clock time, speedup over one job and
+parallel efficiency (speedup / jobs).
+
+Usage:
+    python -m app.core.hyperparameter_search match_winner [--folds 5] [--jobs 4] [--train]
+    python -m app.core.hyperparameter_search score_prediction --scaling 2,4
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+SEARCH_CACHE_VERSION = 1
+
+PARAM_GRIDS = {
+    "match_winner": {
+        'n_estimators': [100, 200],
+        'max_depth': [6, 10, None],
+        'min_samples_split': [2, 5],
+        'min_samples_leaf': [1, 2, 4],
+    },
+    "score_prediction": {
+        'n_estimators': [100, 200],
+        'max_depth': [10, 15, None],
+        'min_samples_split': [2, 5],
+        'min_samples_leaf': [1, 2, 4],
+    },
+}
+# Higher is better for both (MAE is negated)
+METRIC_NAMES = {"match_winner": "accuracy", "score_prediction": "neg_mae"}
+
+
+def get_cache_dir():
+    return Path(__file__).parent.parent / "models" / "search_cache"
+
+def load_training_data(model_name):
+    """Full training matrix for one model, as numpy arrays"""
+    from app.core import feature_cache
+    X, y, _ = feature_cache.load_training_data(model_name)
+    return X.to_numpy(dtype=np.float64), np.asarray(y)
+
+def candidates(grid):
+    """All parameter combinations of a grid, in a stable order"""
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+def make_folds(model_name, y, n_folds, seed):
+    from sklearn.model_selection import KFold, StratifiedKFold
+    if model_name == "match_winner":
+        splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    else:
+        splitter = KFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    return list(splitter.split(np.zeros(len(y)), y))
+
+def data_digest(X, y):
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    return digest.hexdigest()
+
+def task_key(model_name, digest, params, fold, n_folds, seed):
+    payload = json.dumps({
+        "version": SEARCH_CACHE_VERSION, "model": model_name, "data": digest,
+        "params": params, "fold": fold, "folds": n_folds, "seed": seed,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+class FoldCache:
+    """One JSON file per finished (candidate, fold) task"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def get(self, key):
+        path = self.directory / f"{key}.json"
+        try:
+            with open(path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, result):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=self.directory)
+        with os.fdopen(fd, "w") as fh:
+            json.dump(result, fh)
+        os.replace(tmp_name, self.directory / f"{key}.json")
+
+
+# Worker side: the matrix is installed once per process by the initializer
+_worker_X = None
+_worker_y = None
+
+def _init_worker(X, y):
+    global _worker_X, _worker_y
+    _worker_X, _worker_y = X, y
+
+def _fit_fold(model_name, params, train_idx, test_idx):
+    from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+    X, y = _worker_X, _worker_y
+    start = time.perf_counter()
+    if model_name == "match_winner":
+        model = RandomForestClassifier(random_state=42, n_jobs=1, **params)
+        model.fit(X[train_idx], y[train_idx])
+        score = float((model.predict(X[test_idx]) == y[test_idx]).mean())
+    else:
+        model = RandomForestRegressor(random_state=42, n_jobs=1, **params)
+        model.fit(X[train_idx], y[train_idx])
+        score = -float(np.abs(model.predict(X[test_idx]) - y[test_idx]).mean())
+    return {"score": score, "fit_seconds": time.perf_counter() - start}
+
+def run_search(model_name, X, y, grid=None, n_folds=5, jobs=None, seed=42,
+               cache=None, log=print):
+    """
+    Evaluate every candidate of ``grid`` with ``n_folds``-fold CV.
+
+    Returns a dict with the ranked candidates, the best parameters, the
+    number of folds fitted vs. taken from the cache, and the wall-clock time.
+    """
+    grid = grid or PARAM_GRIDS[model_name]
+    jobs = jobs or os.cpu_count() or 1
+    folds = make_folds(model_name, y, n_folds, seed)
+    digest = data_digest(X, y)
+    params_list = candidates(grid)
+
+    results = {}
+    pending = []
+    for c, params in enumerate(params_list):
+        for f, (train_idx, test_idx) in enumerate(folds):
+            key = task_key(model_name, digest, params, f, n_folds, seed)
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                results[(c, f)] = cached
+            else:
+                pending.append((c, f, key))
+
+    total = len(params_list) * n_folds
+    log(f"{model_name}: {len(params_list)} candidates x {n_folds} folds = {total} fits, "
+        f"{total - len(pending)} cached, {jobs} job(s)")
+
+    start = time.perf_counter()
+    if jobs == 1:
+        _init_worker(X, y)
+        for c, f, key in pending:
+            result = _fit_fold(model_name, params_list[c], *folds[f])
+            results[(c, f)] = result
+            if cache is not None:
+                cache.put(key, result)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(X, y)) as pool:
+            futures = {
+                pool.submit(_fit_fold, model_name, params_list[c], *folds[f]): (c, f, key)
+                for c, f, key in pending
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                c, f, key = futures[future]
+                result = future.result()
+                results[(c, f)] = result
+                # Written as folds finish, so an interrupted search resumes here
+                if cache is not None:
+                    cache.put(key, result)
+                if done % max(1, len(futures) // 10) == 0:
+                    log(f"  {done}/{len(futures)} fits done")
+    wall = time.perf_counter() - start
+
+    ranked = []
+    for c, params in enumerate(params_list):
+        scores = [results[(c, f)]["score"] for f in range(n_folds)]
+        ranked.append({
+            "params": params,
+            "mean_score": float(np.mean(scores)),
+            "std_score": float(np.std(scores)),
+            "fold_scores": scores,
+        })
+    ranked.sort(key=lambda r: r["mean_score"], reverse=True)
+
+    return {
+        "model": model_name,
+        "metric": METRIC_NAMES[model_name],
+        "folds": n_folds,
+        "jobs": jobs,
+        "fits": len(pending),
+        "cached_fits": total - len(pending),
+        "wall_seconds": wall,
+        "best_params": ranked[0]["params"],
+        "best_score": ranked[0]["mean_score"],
+        "candidates": ranked,
+    }
+
+def train_with_params(model_name, params):
+    """Train and save ``model_name`` with ``params`` through its trainer"""
+    if model_name == "match_winner":
+        from app.core.trainer_match_winner import train_match_winner_model
+        return train_match_winner_model(params)
+    from app.core.trainer_score_prediction import train_score_prediction_model
+    return train_score_prediction_model(params)
+
+def scaling_report(model_name, X, y, job_counts, grid=None, n_folds=5, seed=42, log=print):
+    """
+    Wall-clock time, speedup and efficiency of an uncached search per job count.
+
+    Speedup is relative to the single-job run, which is always timed first.
+    """
+    job_counts = [1] + sorted(set(j for j in job_counts if j > 1))
+    rows = []
+    baseline = None
+    for jobs in job_counts:
+        result = run_search(model_name, X, y, grid=grid, n_folds=n_folds, jobs=jobs,
+                            seed=seed, cache=None, log=lambda *_: None)
+        wall = result["wall_seconds"]
+        baseline = baseline or wall
+        speedup = baseline / wall if wall else float("inf")
+        rows.append({"jobs": jobs, "wall_seconds": wall, "speedup": speedup,
+                     "efficiency": speedup / jobs})
+        log(f"  jobs={jobs:<3} {wall:8.2f} s  speedup {speedup:5.2f}x  efficiency {speedup / jobs:5.1%}")
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validated hyper-parameter search")
+    parser.add_argument("model", choices=list(PARAM_GRIDS))
+    parser.add_argument("--folds", type=int, default=5, help="CV folds (default 5)")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=42, help="Fold shuffling seed")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not write the fold cache")
+    parser.add_argument("--scaling", default=None,
+                        help="Comma-separated job counts to time, e.g. 2,4 (1 job is always timed)")
+    parser.add_argument("--train", action="store_true",
+                        help="Train and save the model with the best parameters")
+    parser.add_argument("--output", default=None, help="Write the full report as JSON")
+    args = parser.parse_args(argv)
+    if args.train and args.scaling:
+        parser.error("--train cannot be combined with --scaling")
+
+    X, y = load_training_data(args.model)
+    report = {}
+
+    if args.scaling:
+        job_counts = [int(j) for j in args.scaling.split(",") if j.strip()]
+        print(f"{args.model}: scaling over 1 and {job_counts} job(s)")
+        report["scaling"] = scaling_report(args.model, X, y, job_counts, n_folds=args.folds, seed=args.seed)
+    else:
+        cache = None if args.no_cache else FoldCache(get_cache_dir() / args.model)
+        result = run_search(args.model, X, y, n_folds=args.folds, jobs=args.jobs,
+                            seed=args.seed, cache=cache)
+        report["search"] = result
+        print(f"\n{args.model}: {result['fits']} fits in {result['wall_seconds']:.1f}s "
+              f"({result['cached_fits']} from cache)")
+        print(f"Top candidates ({result['metric']}):")
+        for row in result["candidates"][:5]:
+            print(f"  {row['mean_score']:.4f} +/- {row['std_score']:.4f}  {row['params']}")
+
+        if args.train:
+            print(f"\nTraining {args.model} with {result['best_params']}")
+            train_with_params(args.model, result["best_params"])
+            report["trained_params"] = result["best_params"]
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
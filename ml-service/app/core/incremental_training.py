@@ -0,0 +1,287 @@
+"""
+Incremental model updates for newly appended matches.
+
+Both trainers store their per-match training rows (feature matrix, target
+and match ids) and an ingest log in the model artifact. An incremental run:
+
+    1. finds matches whose ids are not among the stored rows
+    2. builds features for those matches only, reusing the stored encoders
+       (unseen teams/venues get new codes, existing codes are unchanged)
+    3. scores the current model on the new rows (out-of-sample check)
+    4. updates the forest, either
+         extend  - warm_start: fit ``extra_trees`` new trees on the most
+                   recent ``window`` rows and keep at most ``max_trees``
+                   trees, dropping the oldest
+         window  - refit from scratch on the most recent ``window`` rows
+    5. saves the model (pickle and memory-mapped artifact) with the new
+       rows and an ingest log entry, so the next run continues from there
+
+Artifacts from before incremental training have no stored rows; the first
+incremental run then falls back to a full training.
+
+Only finished data is ingested. A match waits for its result (match
+winner) or for its first innings to end, i.e. second-innings deliveries or
+a result (score), and is checked again on every run until then. Finished
+matches that yield no training row (no winner, or a first innings total
+outside the plausible 50-300 range) are recorded as skipped in the ingest
+log, so later runs do not rebuild them.
+
+Usage:
+    python -m app.core.incremental_training [match_winner|score_prediction|all]
+        [--mode extend|window] [--extra-trees 20] [--max-trees 300]
+        [--window 1500] [--dry-run]
+"""
+import argparse
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.core.data_loader import load_matches_data
+from app.core.model_artifacts import save_mmap_artifact
+from app.core.match_states import result_recorded, first_innings_complete
+
+MODES = ('extend', 'window')
+DEFAULT_EXTRA_TREES = 20
+DEFAULT_MAX_TREES = 300
+DEFAULT_WINDOW = 1500
+
+ModelSpec = namedtuple("ModelSpec", ["name", "model_file", "is_classifier"])
+
+MODEL_SPECS = {
+    "match_winner": ModelSpec("match_winner", "match_winner_model.pkl", True),
+    "score_prediction": ModelSpec("score_prediction", "score_prediction_model.pkl", False),
+}
+
+
+def get_models_dir():
+    return Path(__file__).parent.parent / "models"
+
+def training_rows(X, y):
+    """Per-match training rows in the form stored in the model artifact"""
+    return {
+        'match_id': X.index.to_numpy(dtype=np.int64),
+        'X': X.to_numpy(dtype=np.float64),
+        'y': np.asarray(y),
+    }
+
+def ingest_entry(mode, rows_added, n_trees, **extra):
+    """One ingest log record"""
+    entry = {
+        'mode': mode,
+        'time': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        'rows_added': int(rows_added),
+        'n_trees': int(n_trees),
+    }
+    entry.update(extra)
+    return entry
+
+def _skipped_ids(model_data):
+    """Finished matches that earlier runs found no training row for"""
+    skipped = set()
+    for entry in model_data.get('ingest_log', []):
+        skipped.update(entry.get('skipped_match_ids', []))
+    return skipped
+
+def _new_data(spec, match_ids):
+    """
+    (matches, deliveries) of the given matches. Deliveries are only read for
+    the score model, streamed in chunks so only these matches' balls are
+    held in memory.
+    """
+    matches_df = load_matches_data()
+    new_matches = matches_df[matches_df['id'].isin(match_ids)]
+    if spec.name == "match_winner":
+        return new_matches, None
+
+    from app.core.chunked_loader import iter_deliveries, concat_chunks
+    from app.core.features_score_prediction import DELIVERY_COLUMNS
+    new_deliveries = concat_chunks(
+        chunk[chunk['match_id'].isin(match_ids)]
+        for chunk in iter_deliveries(usecols=DELIVERY_COLUMNS)
+    )
+    return new_matches, new_deliveries
+
+def _finished_ids(spec, matches_df, deliveries_df):
+    """
+    The matches whose training data can no longer change: a recorded result
+    (match winner) or a finished first innings (score)
+    """
+    if spec.name == "match_winner":
+        finished = result_recorded(matches_df)
+    else:
+        finished = first_innings_complete(matches_df, deliveries_df)
+    return [int(i) for i in matches_df['id'][finished]]
+
+def _build_rows(spec, matches_df, deliveries_df, match_ids, encoders):
+    """Features for the given matches only, extending ``encoders``"""
+    new_matches = matches_df[matches_df['id'].isin(match_ids)]
+    if spec.name == "match_winner":
+        from app.core.features_match_winner import build_training_data
+        return build_training_data(new_matches, encoders=encoders)
+
+    from app.core.features_score_prediction import build_training_data
+    new_deliveries = deliveries_df[deliveries_df['match_id'].isin(match_ids)]
+    if new_deliveries.empty:
+        return pd.DataFrame(), np.array([]), encoders
+    return build_training_data(new_deliveries, new_matches, encoders=encoders)
+
+def _full_training(spec):
+    if spec.name == "match_winner":
+        from app.core.trainer_match_winner import train_match_winner_model
+        train_match_winner_model()
+    else:
+        from app.core.trainer_score_prediction import train_score_prediction_model
+        train_score_prediction_model()
+
+def _window(rows, size, season_col):
+    """Indices of the ``size`` most recent rows by (season, match id)"""
+    order = np.lexsort((rows['match_id'], rows['X'][:, season_col]))
+    return order[-size:] if size and size < len(order) else order
+
+def _new_model(spec, model_data):
+    """Unfitted forest with the hyper-parameters the model was trained with"""
+    if spec.is_classifier:
+        from sklearn.ensemble import RandomForestClassifier
+        from app.core.trainer_match_winner import MODEL_PARAMS
+        return RandomForestClassifier(**model_data.get('model_params', MODEL_PARAMS))
+    from sklearn.ensemble import RandomForestRegressor
+    from app.core.trainer_score_prediction import MODEL_PARAMS
+    return RandomForestRegressor(**model_data.get('model_params', MODEL_PARAMS))
+
+def _holdout_metric(spec, model, X, y):
+    """Score of the current model on rows it has not seen"""
+    if spec.is_classifier:
+        return {'new_rows_accuracy': float((model.predict(X) == y).mean())}
+    return {'new_rows_mae': float(np.abs(model.predict(X) - y).mean())}
+
+def update_model(name, mode='extend', extra_trees=DEFAULT_EXTRA_TREES,
+                 max_trees=DEFAULT_MAX_TREES, window=DEFAULT_WINDOW, dry_run=False):
+    """
+    Absorb new matches into a trained model.
+
+    Returns the ingest log entry that was (or, with ``dry_run``, would be)
+    recorded, or None when there was nothing new.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Mode must be one of: {', '.join(MODES)}")
+    spec = MODEL_SPECS[name]
+    model_path = get_models_dir() / spec.model_file
+    if not model_path.exists():
+        raise FileNotFoundError(f"{model_path} not found; train the model first")
+
+    model_data = joblib.load(model_path)
+    rows = model_data.get('training_rows')
+    if rows is None:
+        print(f"{name}: artifact has no ingest record, running a full training")
+        if not dry_run:
+            _full_training(spec)
+        return None
+
+    start = time.perf_counter()
+    known = set(rows['match_id'].tolist()) | _skipped_ids(model_data)
+    match_ids = load_matches_data()['id'].to_numpy()
+    new_ids = [int(i) for i in match_ids if int(i) not in known]
+    if not new_ids:
+        print(f"{name}: no new matches")
+        return None
+
+    new_matches, new_deliveries = _new_data(spec, new_ids)
+    finished_ids = _finished_ids(spec, new_matches, new_deliveries)
+    pending = len(new_ids) - len(finished_ids)
+    if not finished_ids:
+        print(f"{name}: {len(new_ids)} new matches, none finished yet")
+        return None
+
+    X_new, y_new, encoders = _build_rows(spec, new_matches, new_deliveries, finished_ids,
+                                         model_data['encoders'])
+    skipped = sorted(set(finished_ids) - set(X_new.index.tolist()))
+    if len(X_new) == 0:
+        entry = ingest_entry(mode, 0, len(model_data['model'].estimators_),
+                             matches_added=0, skipped_match_ids=skipped, pending_matches=pending)
+        print(f"{name}: {len(finished_ids)} finished matches, none with training data "
+              f"({'would be ' if dry_run else ''}recorded as skipped)")
+        if not dry_run:
+            model_data['ingest_log'] = list(model_data.get('ingest_log', [])) + [entry]
+            joblib.dump(model_data, model_path)
+            save_mmap_artifact(model_data, model_path)
+        return entry
+    if list(X_new.columns) != list(model_data['feature_names']):
+        raise ValueError("Feature columns changed; run a full training instead")
+
+    model = model_data['model']
+    metrics = _holdout_metric(spec, model, X_new, y_new)
+
+    new_rows = training_rows(X_new, y_new)
+    combined = {key: np.concatenate([rows[key], new_rows[key]]) for key in rows}
+    season_col = list(model_data['feature_names']).index('season_num')
+    recent = _window(combined, window, season_col)
+    X_fit = pd.DataFrame(combined['X'][recent], columns=model_data['feature_names'])
+    y_fit = combined['y'][recent]
+
+    if spec.is_classifier and len(np.unique(y_fit)) < len(model.classes_):
+        raise ValueError("Training window does not contain every class; use a larger --window")
+
+    if dry_run:
+        entry = ingest_entry(mode, len(X_new), len(model.estimators_),
+                             matches_added=len(X_new), window_rows=len(recent),
+                             skipped_match_ids=skipped, pending_matches=pending, **metrics)
+        print(f"{name}: would ingest {len(X_new)} rows ({len(X_new)} matches, "
+              f"{len(skipped)} skipped, {pending} unfinished), {metrics}")
+        return entry
+
+    if mode == 'extend':
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + extra_trees)
+        model.fit(X_fit, y_fit)
+        if len(model.estimators_) > max_trees:
+            # Oldest trees were fit on the oldest data
+            model.estimators_ = model.estimators_[-max_trees:]
+        model.set_params(warm_start=False, n_estimators=len(model.estimators_))
+    else:
+        model = _new_model(spec, model_data).fit(X_fit, y_fit)
+
+    entry = ingest_entry(mode, len(X_new), len(model.estimators_),
+                         matches_added=len(X_new), window_rows=len(recent),
+                         skipped_match_ids=skipped, pending_matches=pending,
+                         seconds=round(time.perf_counter() - start, 3), **metrics)
+    model_data['model'] = model
+    model_data['encoders'] = encoders
+    model_data['training_rows'] = combined
+    model_data['ingest_log'] = list(model_data.get('ingest_log', [])) + [entry]
+
+    joblib.dump(model_data, model_path)
+    save_mmap_artifact(model_data, model_path)
+    print(f"{name}: ingested {len(X_new)} rows ({len(skipped)} matches skipped, {pending} unfinished), "
+          f"{len(model.estimators_)} trees, {metrics}")
+    return entry
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally update trained models with new matches")
+    parser.add_argument("model", nargs="?", default="all", choices=list(MODEL_SPECS) + ["all"])
+    parser.add_argument("--mode", choices=MODES, default="extend")
+    parser.add_argument("--extra-trees", type=int, default=DEFAULT_EXTRA_TREES,
+                        help="Trees added per run in extend mode")
+    parser.add_argument("--max-trees", type=int, default=DEFAULT_MAX_TREES,
+                        help="Oldest trees are dropped beyond this many (extend mode)")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW,
+                        help="Most recent training rows used for fitting (0 = all)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be ingested")
+    args = parser.parse_args(argv)
+
+    names = list(MODEL_SPECS) if args.model == "all" else [args.model]
+    for name in names:
+        try:
+            update_model(name, mode=args.mode, extra_trees=args.extra_trees,
+                         max_trees=args.max_trees, window=args.window, dry_run=args.dry_run)
+        except Exception as e:
+            print(f"{name}: incremental update failed: {e}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+"""
+Session-based, ball-by-ball live predictions.
+
+A client opens a session for a match and then pushes individual deliveries
+instead of cumulative totals. Each session keeps a compact running state
+(runs, wickets, legal balls, target), so a delivery is an O(1) update. The
+prediction for the new state is:
+
+    first innings   score model projection through the micro-batcher (so
+                    concurrent sessions share model calls), run-rate
+                    heuristic when the match context or model is missing
+    second innings  chase-table lookup (constant time, done inline once the
+                    table is loaded; the table is refreshed for new data by
+                    the stateless endpoints and warm-up)
+
+Updates are returned to the caller and published to the session's
+subscribers (server-sent events).
+
+Sessions live in one worker's memory. Idle sessions are evicted by a
+periodic sweep and whenever a new session needs room.
+
+Configured through the environment:
+    ML_LIVE_MAX_SESSIONS   open sessions per worker (default 1000)
+    ML_LIVE_IDLE_SECONDS   idle time before a session is evicted (default 900)
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+from app.core.executor import run_blocking
+from app.core.metrics import timed
+
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_IDLE_SECONDS = 900.0
+SWEEP_INTERVAL_SECONDS = 30.0
+SUBSCRIBER_QUEUE_SIZE = 32
+
+MAX_LEGAL_BALLS = 120
+MAX_WICKETS = 10
+EXTRAS = ("wide", "noball", "bye", "legbye", "penalty")
+# Extras that do not count as one of the over's six balls
+UNCOUNTED_EXTRAS = ("wide", "noball")
+
+
+class SessionNotFound(Exception):
+    """Unknown, closed or evicted session"""
+
+
+class SessionLimitReached(Exception):
+    """Every session slot is taken by an active session"""
+
+
+class InvalidDelivery(ValueError):
+    """Delivery that cannot be applied to the session's current state"""
+
+
+def _env_number(name, default, cast):
+    try:
+        return cast(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class LiveSession:
+    """Running state of one match"""
+
+    __slots__ = (
+        'session_id', 'match_id', 'context', 'inning', 'target',
+        'runs', 'wickets', 'legal_balls', 'deliveries',
+        'last_active', 'last_prediction', 'subscribers',
+    )
+
+    def __init__(self, session_id, match_id, context=None, inning=1, target=None, now=0.0):
+        self.session_id = session_id
+        self.match_id = match_id
+        self.context = dict(context or {})
+        self.inning = inning
+        self.target = target
+        self.runs = 0
+        self.wickets = 0
+        self.legal_balls = 0
+        self.deliveries = 0
+        self.last_active = now
+        self.last_prediction = None
+        self.subscribers = set()
+
+    @property
+    def overs(self):
+        """Overs in cricket notation (10.3 = ten overs and three balls)"""
+        return self.legal_balls // 6 + (self.legal_balls % 6) / 10.0
+
+    @property
+    def complete(self):
+        if self.legal_balls >= MAX_LEGAL_BALLS or self.wickets >= MAX_WICKETS:
+            return True
+        # Chase target reached, with the live predictor's convention (runs >= target)
+        return self.inning == 2 and self.runs >= self.target
+
+    def add_delivery(self, runs, extras=None, wicket=False):
+        """Apply one delivery (``runs`` = total runs off the ball, extras included)"""
+        if extras is not None and extras not in EXTRAS:
+            raise InvalidDelivery(f"Extras must be one of: {', '.join(EXTRAS)}")
+        if runs < 0:
+            raise InvalidDelivery("Runs cannot be negative")
+        if self.complete:
+            raise InvalidDelivery("Innings is complete")
+        self.runs += runs
+        self.wickets += 1 if wicket else 0
+        self.legal_balls += 0 if extras in UNCOUNTED_EXTRAS else 1
+        self.deliveries += 1
+
+    def start_chase(self, target=None):
+        """Move to the second innings, chasing ``target`` (default: runs so far)"""
+        if self.inning != 1:
+            raise InvalidDelivery("Session is already in the second innings")
+        self.target = self.runs if target is None else target
+        self.inning = 2
+        self.runs = self.wickets = self.legal_balls = self.deliveries = 0
+        if self.context:
+            ctx = self.context
+            ctx['battingTeam'], ctx['bowlingTeam'] = ctx.get('bowlingTeam'), ctx.get('battingTeam')
+
+    def state(self):
+        """Current running totals"""
+        overs_bowled = self.legal_balls / 6.0
+        return {
+            "sessionId": self.session_id,
+            "matchId": self.match_id,
+            "inning": self.inning,
+            "runs": self.runs,
+            "wickets": self.wickets,
+            "overs": round(self.overs, 1),
+            "legal_balls": self.legal_balls,
+            "deliveries": self.deliveries,
+            "target": self.target,
+            "run_rate": round(self.runs / overs_bowled, 2) if overs_bowled else 0.0,
+            "complete": self.complete,
+        }
+
+    def subscribe(self):
+        """Queue receiving every published prediction (None when the session ends)"""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, message):
+        """Push to every subscriber; a full queue drops its oldest message"""
+        for queue in list(self.subscribers):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+
+async def predict_session(session):
+    """Prediction for the session's current state"""
+    # Snapshot first: another delivery may arrive while we await the model
+    state = session.state()
+    overs = session.overs
+
+    with timed("live.session_predict"):
+        if session.inning == 1:
+            state.update(await _first_innings(session.context, overs, state["runs"], state["wickets"],
+                                              state["complete"]))
+        else:
+            state.update(await _chase(state["target"], overs, state["runs"], state["wickets"], state["complete"]))
+    return state
+
+async def _first_innings(context, overs, runs, wickets, complete=False):
+    from app.core.predictor_live import project_first_innings_score
+    if complete:
+        # All out or 20 overs bowled: no more runs to project
+        return {"projected_score": runs, "notes": "innings finished, final score"}
+    if context.get('battingTeam') and context.get('bowlingTeam'):
+        try:
+            from app.core.micro_batcher import predict_score_batched
+            result = await predict_score_batched({
+                **context, 'currentRuns': runs, 'wickets': wickets, 'overs': overs,
+            })
+            return {
+                "projected_score": round(max(runs, result['predicted_score'])),
+                "notes": "used model",
+            }
+        except Exception as e:
+            print(f"Model prediction failed: {e}")
+    return {
+        "projected_score": project_first_innings_score(overs, runs, wickets),
+        "notes": "used heuristic",
+    }
+
+async def _chase(target, overs, runs, wickets, complete=False):
+    from app.core.predictor_live import chase_win_probability
+    from app.core.chase_table import get_loaded_chase_table
+    required_runs = target - runs
+    overs_remaining = 20.0 - overs
+    if complete:
+        # Target reached, all out or overs used up: the result is known
+        return {
+            "required_runs": max(0, required_runs),
+            "required_run_rate": 0.0,
+            "win_prob": 1.0 if required_runs <= 0 else 0.0,
+            "notes": "chase finished, scored without historical data",
+        }
+    table = get_loaded_chase_table()
+    if table is not None:
+        # Constant-time box sum: cheaper inline than a worker pool round trip
+        win_prob = chase_win_probability(required_runs, overs_remaining, wickets, table)
+    else:
+        win_prob = await run_blocking(chase_win_probability, required_runs, overs_remaining, wickets)
+    required_rr = required_runs / overs_remaining if overs_remaining > 0 else 0.0
+    return {
+        "required_runs": max(0, required_runs),
+        "required_run_rate": round(max(0.0, required_rr), 2),
+        "win_prob": round(win_prob, 3),
+        "notes": "used historical data",
+    }
+
+
+class LiveSessionManager:
+    """
+    Open sessions of one worker, least recently active first.
+
+    Every lookup moves the session to the end of the ordered dict, so idle
+    eviction only inspects sessions at the front and stops at the first one
+    that is still active.
+    """
+
+    def __init__(self, max_sessions=None, idle_seconds=None, clock=time.monotonic):
+        if max_sessions is None:
+            max_sessions = _env_number("ML_LIVE_MAX_SESSIONS", DEFAULT_MAX_SESSIONS, int)
+        if idle_seconds is None:
+            idle_seconds = _env_number("ML_LIVE_IDLE_SECONDS", DEFAULT_IDLE_SECONDS, float)
+        self.max_sessions = max(1, max_sessions)
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self._sessions = OrderedDict()
+        self.opened = 0
+        self.closed = 0
+        self.evicted = 0
+        self.deliveries = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def open(self, match_id, context=None, inning=1, target=None):
+        if len(self._sessions) >= self.max_sessions:
+            self.evict_idle()
+        if len(self._sessions) >= self.max_sessions:
+            raise SessionLimitReached(
+                f"All {self.max_sessions} live sessions are active"
+            )
+        if inning == 2 and target is None:
+            raise InvalidDelivery("A second innings session needs a target")
+        session = LiveSession(uuid.uuid4().hex, match_id, context, inning, target, self.clock())
+        self._sessions[session.session_id] = session
+        self.opened += 1
+        return session
+
+    def get(self, session_id):
+        """Session by id, marked as active"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise SessionNotFound(f"Session {session_id} not found")
+        session.last_active = self.clock()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def add_delivery(self, session_id, runs, extras=None, wicket=False):
+        session = self.get(session_id)
+        session.add_delivery(runs, extras, wicket)
+        self.deliveries += 1
+        return session
+
+    def close(self, session_id):
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            raise SessionNotFound(f"Session {session_id} not found")
+        self.closed += 1
+        session.publish(None)
+        return session
+
+    def evict_idle(self, now=None):
+        """Drop sessions idle for longer than ``idle_seconds``; returns the count"""
+        now = self.clock() if now is None else now
+        evicted = 0
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_active < self.idle_seconds:
+                break
+            del self._sessions[session_id]
+            session.publish(None)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def stats(self):
+        return {
+            "active": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "idle_seconds": self.idle_seconds,
+            "opened": self.opened,
+            "closed": self.closed,
+            "evicted": self.evicted,
+            "deliveries": self.deliveries,
+            "subscribers": sum(len(s.subscribers) for s in self._sessions.values()),
+        }
+
+
+_manager = None
+
+def get_session_manager():
+    """Get or create the process-wide session manager"""
+    global _manager
+    if _manager is None:
+        _manager = LiveSessionManager()
+    return _manager
+
+async def _sweep_forever(interval):
+    while True:
+        await asyncio.sleep(interval)
+        evicted = get_session_manager().evict_idle()
+        if evicted:
+            print(f"Evicted {evicted} idle live sessions")
+
+def start_session_sweeper(interval=SWEEP_INTERVAL_SECONDS):
+    """Start the periodic idle-session sweep on the running event loop"""
+    return asyncio.get_running_loop().create_task(_sweep_forever(interval))
@@ -0,0 +1,211 @@
+"""
+Per-match context index for live predictions.
+
+Everything the live predictor needs to know about a match (teams in batting
+order, venue, season and the first-innings total the chase is against) is
+gathered once from the matches and deliveries data into flat arrays, with a
+dictionary from match id to row. A live request is then one dictionary
+lookup instead of a boolean mask over the matches frame plus a filter and
+sum over the match's deliveries.
+
+Teams and venue are stored as vocabulary ids (app.core.vocabulary) and only
+the looked-up match is decoded. The batting order comes from the first
+innings deliveries; matches without any fall back to team1 batting first.
+
+When the data changes the index is extended, not rebuilt: only matches
+that are new or not yet complete are aggregated again. A match is complete
+once its first innings is over, i.e. it has second-innings deliveries or a
+recorded result; until then (a match still being played) its first-innings
+total can still grow. Like incremental training this assumes complete
+matches are not edited; if indexed matches disappear, the index is rebuilt
+from scratch.
+
+Usage:
+    python -m app.core.match_context [MATCH_ID ...]
+"""
+import sys
+import threading
+
+import numpy as np
+
+from app.core.data_loader import get_data_store
+from app.core.feature_encoding import parse_season
+from app.core.vocabulary import get_vocabulary
+from app.core.metrics import timed
+
+# First-innings total of a match without first-innings deliveries
+NO_TARGET = -1
+
+FIELDS = ('match_ids', 'season', 'batting_team', 'bowling_team', 'venue', 'target', 'complete')
+
+
+def _first_rows(ids):
+    """Positions of the first occurrence of each id, in order"""
+    _, first = np.unique(ids, return_index=True)
+    return np.sort(first)
+
+def _aggregate(store, rows):
+    """Context arrays for the matches-frame rows ``rows``"""
+    matches = store.matches
+    ids = matches['id'].to_numpy(dtype=np.int64)[rows]
+    team1 = store.codes('matches', 'team1')[rows]
+    team2 = store.codes('matches', 'team2')[rows]
+    venue = store.codes('matches', 'venue')[rows]
+    season = matches['season'].iloc[rows].map(parse_season).to_numpy(dtype=np.int16)
+    result = matches['result'].iloc[rows]
+    has_result = (matches['winner'].iloc[rows].notna() | (result == 'no result')).to_numpy()
+
+    # Balls of these matches only
+    deliveries = store.deliveries
+    delivery_ids = deliveries['match_id'].to_numpy()
+    innings = deliveries['inning'].to_numpy()
+    in_rows = np.isin(delivery_ids, ids)
+    balls = np.flatnonzero((innings == 1) & in_rows)
+    order = np.argsort(ids)
+    chased = np.isin(ids, delivery_ids[(innings == 2) & in_rows])
+    row = order[np.searchsorted(ids, delivery_ids[balls], sorter=order)]
+
+    runs = deliveries['total_runs'].to_numpy()[balls]
+    target = np.bincount(row, weights=runs, minlength=len(ids)).astype(np.int32)
+    has_balls = np.bincount(row, minlength=len(ids)) > 0
+    target[~has_balls] = NO_TARGET
+
+    batting = team1.copy()
+    bowling = team2.copy()
+    if len(balls):
+        # Teams on the first recorded ball of each match
+        matched, first_ball = np.unique(row, return_index=True)
+        batting[matched] = store.codes('deliveries', 'batting_team')[balls[first_ball]]
+        bowling[matched] = store.codes('deliveries', 'bowling_team')[balls[first_ball]]
+
+    return {
+        'match_ids': ids,
+        'season': season,
+        'batting_team': batting,
+        'bowling_team': bowling,
+        'venue': venue,
+        'target': target,
+        # First innings over: the target can no longer change
+        'complete': chased | has_result,
+    }
+
+
+class MatchContextIndex:
+    """Per-match context arrays with O(1) lookup by match id"""
+
+    def __init__(self, arrays, source=None, vocabulary=None):
+        for field in FIELDS:
+            setattr(self, field, arrays[field])
+        self.source = source
+        self.vocabulary = vocabulary or get_vocabulary()
+        self._rows = {match_id: i for i, match_id in enumerate(self.match_ids.tolist())}
+
+    def __len__(self):
+        return len(self.match_ids)
+
+    def __contains__(self, match_id):
+        return match_id in self._rows
+
+    @classmethod
+    def build(cls, store=None):
+        """Index every match of the current data"""
+        store = store or get_data_store()
+        source = (store.fingerprint('matches'), store.fingerprint('deliveries'))
+        rows = _first_rows(store.matches['id'].to_numpy())
+        return cls(_aggregate(store, rows), source, get_vocabulary(store.data_path))
+
+    def refresh(self, store=None):
+        """
+        Index for the current data, reusing the rows of complete matches.
+
+        Returns ``self`` when the data is unchanged.
+        """
+        store = store or get_data_store()
+        source = (store.fingerprint('matches'), store.fingerprint('deliveries'))
+        if source == self.source:
+            return self
+
+        ids = store.matches['id'].to_numpy()
+        current = set(ids.tolist())
+        if not current.issuperset(self._rows):
+            print("Match context index: indexed matches were removed, rebuilding")
+            return MatchContextIndex.build(store)
+
+        keep = np.flatnonzero(self.complete)
+        complete = set(self.match_ids[keep].tolist())
+        rows = _first_rows(ids)
+        rows = rows[[int(ids[r]) not in complete for r in rows]]
+        if len(rows) == 0:
+            arrays = {field: getattr(self, field) for field in FIELDS}
+            return MatchContextIndex(arrays, source, get_vocabulary(store.data_path))
+
+        fresh = _aggregate(store, rows)
+        arrays = {
+            field: np.concatenate([getattr(self, field)[keep], fresh[field]])
+            for field in FIELDS
+        }
+        print(f"Match context index: {len(rows)} matches added or updated")
+        return MatchContextIndex(arrays, source, get_vocabulary(store.data_path))
+
+    def context(self, match_id):
+        """
+        Teams in batting order, venue, season and first-innings total
+        (None until the first innings has deliveries), or None for an
+        unknown match.
+        """
+        i = self._rows.get(match_id)
+        if i is None:
+            return None
+        vocabulary = self.vocabulary
+        batting, bowling = vocabulary.decode("team", [self.batting_team[i], self.bowling_team[i]])
+        venue = vocabulary.decode("venue", [self.venue[i]])[0]
+        target = int(self.target[i])
+        # MISSING decodes to NaN
+        return {
+            "battingTeam": batting if isinstance(batting, str) else 'Unknown',
+            "bowlingTeam": bowling if isinstance(bowling, str) else 'Unknown',
+            "venue": venue if isinstance(venue, str) else 'Unknown',
+            "season": int(self.season[i]),
+            "target": None if target == NO_TARGET else target,
+        }
+
+
+# Global index instance
+_index = None
+_index_lock = threading.Lock()
+
+def get_match_context_index():
+    """
+    Get the context index for the current data.
+
+    Built on first use; when the matches or deliveries content hash changes
+    it is refreshed with the new matches only.
+    """
+    global _index
+    store = get_data_store()
+    source = (store.fingerprint('matches'), store.fingerprint('deliveries'))
+    index = _index
+    if index is not None and index.source == source:
+        return index
+
+    with _index_lock:
+        if _index is None:
+            with timed("live.context_build"):
+                _index = MatchContextIndex.build(store)
+        elif _index.source != source:
+            with timed("live.context_build"):
+                _index = _index.refresh(store)
+        return _index
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    index = get_match_context_index()
+    print(f"Indexed {len(index)} matches "
+          f"({int((index.target == NO_TARGET).sum())} without first-innings deliveries)")
+    for match_id in argv:
+        print(match_id, index.context(int(match_id)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Vectorized second-innings match-state builder.
+
+Reconstructs the state after every second-innings delivery of every match
+(runs needed, overs left, wickets down, whether the chase was won) with
+grouped cumulative sums over the whole deliveries frame instead of a Python
+loop per match. The result is a set of compact NumPy arrays that the chase
+lookup table, backtesting and calibration code can all share.
+"""
+import numpy as np
+import pandas as pd
+
+
+def wicket_flags(deliveries_df):
+    """Boolean array: True where a player was dismissed on that delivery"""
+    dismissed = deliveries_df['player_dismissed']
+    return (dismissed.notna() & (dismissed.astype(str).str.strip() != '')).to_numpy()
+
+
+def result_recorded(matches_df):
+    """Boolean array: True where the match has a winner or was declared a no result"""
+    winner = matches_df['winner']
+    has_winner = winner.notna() & (winner.astype(str).str.strip() != '')
+    return (has_winner | (matches_df['result'] == 'no result')).to_numpy()
+
+def first_innings_complete(matches_df, deliveries_df):
+    """
+    Boolean array over ``matches_df``: True once the first innings is over,
+    i.e. the match has second-innings deliveries or a recorded result
+    """
+    chased = deliveries_df.loc[deliveries_df['inning'] == 2, 'match_id'].unique()
+    return matches_df['id'].isin(chased).to_numpy() | result_recorded(matches_df)
+
+
+class ChaseStates:
+    """
+    Column arrays describing every historical second-innings state.
+
+    Attributes (one entry per delivery):
+        match_id     int32  match identifier
+        ball         int16  1-based delivery index within the innings
+        target       int16  first-innings total being chased
+        runs_needed  int16  target minus runs scored so far
+        overs_left   float64  20 - (over + ball / 10), as used by the live predictor
+        wickets      int8   wickets fallen so far
+        won          bool   whether the chasing side reached the target
+    """
+
+    __slots__ = ('match_id', 'ball', 'target', 'runs_needed', 'overs_left', 'wickets', 'won')
+
+    def __init__(self, match_id, ball, target, runs_needed, overs_left, wickets, won):
+        self.match_id = match_id
+        self.ball = ball
+        self.target = target
+        self.runs_needed = runs_needed
+        self.overs_left = overs_left
+        self.wickets = wickets
+        self.won = won
+
+    def __len__(self):
+        return len(self.match_id)
+
+    @property
+    def required_rr(self):
+        """Required run rate per state (20 when no overs are left)"""
+        rr = np.full(len(self), 20.0)
+        np.divide(self.runs_needed, self.overs_left, out=rr, where=self.overs_left > 0)
+        return rr
+
+    def select(self, mask):
+        """Return a new ChaseStates holding only the rows where ``mask`` is True"""
+        return ChaseStates(*(getattr(self, name)[mask] for name in self.__slots__))
+
+    def to_frame(self):
+        """DataFrame view of the states, mainly for inspection"""
+        return pd.DataFrame({name: getattr(self, name) for name in self.__slots__})
+
+
+def build_chase_states(deliveries_df):
+    """
+    Build every (match_id, ball, runs_needed, overs_left, wickets, won) state
+    for all second innings in one pass.
+
+    Matches without both a first and second innings are skipped.
+    """
+    inning = deliveries_df['inning'].to_numpy()
+    match_ids = deliveries_df['match_id'].to_numpy()
+    total_runs = deliveries_df['total_runs'].to_numpy()
+
+    first_mask = inning == 1
+    second_mask = inning == 2
+
+    # First-innings totals and second-innings finals per match
+    first_totals = pd.Series(total_runs[first_mask]).groupby(match_ids[first_mask]).sum()
+    second_totals = pd.Series(total_runs[second_mask]).groupby(match_ids[second_mask]).sum()
+
+    chase = deliveries_df[second_mask]
+    chase_ids = match_ids[second_mask]
+
+    # Map each second-innings ball to its match's first-innings total
+    pos = first_totals.index.get_indexer(chase_ids)
+    has_target = pos >= 0
+    if not has_target.all():
+        chase = chase[has_target]
+        chase_ids = chase_ids[has_target]
+        pos = pos[has_target]
+    target = first_totals.to_numpy()[pos]
+
+    final = second_totals.to_numpy()[second_totals.index.get_indexer(chase_ids)]
+
+    grouped = chase.groupby(chase_ids, sort=False)
+    running_runs = grouped['total_runs'].cumsum().to_numpy()
+    running_wickets = pd.Series(wicket_flags(chase), index=chase.index).groupby(chase_ids, sort=False).cumsum().to_numpy()
+    ball_index = grouped.cumcount().to_numpy() + 1
+
+    current_over = chase['over'].to_numpy() + chase['ball'].to_numpy() / 10.0
+
+    return ChaseStates(
+        match_id=chase_ids.astype(np.int32),
+        ball=ball_index.astype(np.int16),
+        target=target.astype(np.int16),
+        runs_needed=(target - running_runs).astype(np.int16),
+        overs_left=20.0 - current_over,
+        wickets=running_wickets.astype(np.int8),
+        won=final >= target,
+    )
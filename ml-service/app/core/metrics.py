@@ -0,0 +1,287 @@
+"""
+In-process metrics for the ml-service, exposed in Prometheus text format.
+
+Three kinds of metric are kept:
+    ml_requests_total / ml_request_duration_seconds   per endpoint, recorded
+        by the HTTP middleware in app.main
+    ml_stage_duration_seconds   per pipeline stage (data loading, feature
+        building, model predict, live history lookups), recorded with
+        ``timed(stage)``
+    ml_model_load_seconds / ml_model_loads_total   per model
+
+Component counters that are already kept elsewhere (prediction caches,
+worker pool, micro-batchers) are read when /ml/metrics is scraped rather
+than duplicated here.
+
+Stages timed inside a process pool (ML_EXECUTOR=process) are recorded in
+the worker processes and do not show up on the endpoint.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Request and stage latencies range from microseconds (cached feature rows)
+# to seconds (cold data loads)
+DEFAULT_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic counter"""
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value, **labels):
+        """Mirror a total kept by another component"""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with sum and count"""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def snapshot(self, **labels):
+        """(count, sum) for one label set"""
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return (entry[2], entry[1]) if entry else (0, 0.0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((key, (list(e[0]), e[1], e[2])) for key, e in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors that refresh mirrored values on scrape"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector):
+        """``collector()`` runs before every render to update mirrored metrics"""
+        self._collectors.append(collector)
+
+    def render(self):
+        """All metrics in Prometheus text exposition format"""
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+def get_registry():
+    """Get the process-wide metrics registry"""
+    return _registry
+
+
+REQUESTS = _registry.counter(
+    "ml_requests_total", "HTTP requests by endpoint, method and status code",
+    ("endpoint", "method", "status"))
+REQUEST_SECONDS = _registry.histogram(
+    "ml_request_duration_seconds", "HTTP request latency by endpoint", ("endpoint",))
+STAGE_SECONDS = _registry.histogram(
+    "ml_stage_duration_seconds", "Latency of a pipeline stage", ("stage",))
+STAGE_ERRORS = _registry.counter(
+    "ml_stage_errors_total", "Pipeline stages that raised", ("stage",))
+MODEL_LOAD_SECONDS = _registry.gauge(
+    "ml_model_load_seconds", "Duration of the most recent model load", ("model",))
+MODEL_LOADS = _registry.counter(
+    "ml_model_loads_total", "Model (re)loads", ("model",))
+
+
+@contextmanager
+def timed(stage):
+    """Record the duration of the enclosed block under ``stage``"""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+def record_request(endpoint, method, status, seconds):
+    REQUESTS.inc(endpoint=endpoint, method=method, status=status)
+    REQUEST_SECONDS.observe(seconds, endpoint=endpoint)
+
+def record_model_load(model, seconds):
+    MODEL_LOAD_SECONDS.set(seconds, model=model)
+    MODEL_LOADS.inc(model=model)
+
+
+_CACHE_HITS = _registry.counter(
+    "ml_prediction_cache_hits_total", "Prediction result cache hits", ("cache",))
+_CACHE_MISSES = _registry.counter(
+    "ml_prediction_cache_misses_total", "Prediction result cache misses", ("cache",))
+_CACHE_EVICTIONS = _registry.counter(
+    "ml_prediction_cache_evictions_total", "Prediction result cache LRU evictions", ("cache",))
+_CACHE_ENTRIES = _registry.gauge(
+    "ml_prediction_cache_entries", "Entries in the prediction result cache", ("cache",))
+_CACHE_HIT_RATIO = _registry.gauge(
+    "ml_prediction_cache_hit_ratio", "Hits / lookups of the prediction result cache", ("cache",))
+_POOL_IN_FLIGHT = _registry.gauge(
+    "ml_executor_in_flight", "Calls running or queued on the inference worker pool")
+_POOL_REJECTED = _registry.counter(
+    "ml_executor_rejected_total", "Calls rejected because the worker pool queue was full")
+_POOL_TIMED_OUT = _registry.counter(
+    "ml_executor_timed_out_total", "Calls that exceeded the request timeout")
+_BATCHES = _registry.counter(
+    "ml_batches_total", "Micro-batches sent to the model", ("model",))
+_BATCH_ITEMS = _registry.counter(
+    "ml_batch_items_total", "Requests served through micro-batches", ("model",))
+_LIVE_SESSIONS = _registry.gauge(
+    "ml_live_sessions", "Open ball-by-ball live sessions")
+_LIVE_SESSION_EVENTS = _registry.counter(
+    "ml_live_session_events_total", "Live sessions opened, closed and evicted", ("event",))
+_LIVE_DELIVERIES = _registry.counter(
+    "ml_live_deliveries_total", "Deliveries applied to live sessions")
+
+def _collect_component_stats():
+    from app.core.predictor_match_winner import get_cache_stats as get_match_cache_stats
+    from app.core.predictor_score_prediction import get_cache_stats as get_score_cache_stats
+    from app.core.executor import get_executor
+    from app.core.micro_batcher import get_batcher_stats
+    from app.core.live_sessions import get_session_manager
+
+    for cache, stats in (("match_winner", get_match_cache_stats()), ("score_prediction", get_score_cache_stats())):
+        _CACHE_HITS.set(stats["hits"], cache=cache)
+        _CACHE_MISSES.set(stats["misses"], cache=cache)
+        _CACHE_EVICTIONS.set(stats["evictions"], cache=cache)
+        _CACHE_ENTRIES.set(stats["size"], cache=cache)
+        _CACHE_HIT_RATIO.set(stats["hit_rate"], cache=cache)
+
+    pool = get_executor().stats()
+    _POOL_IN_FLIGHT.set(pool["in_flight"])
+    _POOL_REJECTED.set(pool["rejected"])
+    _POOL_TIMED_OUT.set(pool["timed_out"])
+
+    for model, stats in get_batcher_stats().items():
+        _BATCHES.set(stats["batches"], model=model)
+        _BATCH_ITEMS.set(stats["items"], model=model)
+
+    sessions = get_session_manager().stats()
+    _LIVE_SESSIONS.set(sessions["active"])
+    for event in ("opened", "closed", "evicted"):
+        _LIVE_SESSION_EVENTS.set(sessions[event], event=event)
+    _LIVE_DELIVERIES.set(sessions["deliveries"])
+
+_registry.add_collector(_collect_component_stats)
+
+def render_metrics():
+    """Prometheus text exposition of every registered metric"""
+    return _registry.render()
@@ -0,0 +1,172 @@
+"""
+Dynamic micro-batching of concurrent prediction requests.
+
+Under burst load every request to /ml/predict/match-winner or
+/ml/predict/score would otherwise make its own one-row model call. A
+``MicroBatcher`` collects requests for up to ``window`` seconds (or until
+``max_batch_size`` requests are waiting), runs the predictor's vectorized
+``predict_many`` once for the whole group on the worker pool, and resolves
+each caller's future with its own result. The first request of a group waits
+at most one window, so the added latency is bounded by the window.
+
+Configured through the environment:
+    ML_BATCH_WINDOW_MS   how long to collect a group (default 3, 0 disables batching)
+    ML_MAX_BATCH_SIZE    requests per group before it is sent immediately (default 64)
+"""
+import asyncio
+import os
+
+from app.core.executor import run_blocking
+
+DEFAULT_WINDOW_MS = 3.0
+DEFAULT_MAX_BATCH_SIZE = 64
+
+
+def _env_number(name, default, cast):
+    try:
+        return cast(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class MicroBatcher:
+    """
+    Groups single predictions into one call of ``batch_fn``.
+
+    ``batch_fn`` takes a list of inputs and returns a list of results in the
+    same order; a result that is an Exception instance is raised to that
+    caller only. It runs on the bounded worker pool, so it must be a
+    module-level function when the process pool is used.
+    """
+
+    def __init__(self, batch_fn, window_ms=None, max_batch_size=None):
+        self.batch_fn = batch_fn
+        if window_ms is None:
+            window_ms = _env_number("ML_BATCH_WINDOW_MS", DEFAULT_WINDOW_MS, float)
+        if max_batch_size is None:
+            max_batch_size = _env_number("ML_MAX_BATCH_SIZE", DEFAULT_MAX_BATCH_SIZE, int)
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+
+        self._pending = []
+        self._timer = None
+        # Running groups; the event loop only keeps weak references to tasks
+        self._tasks = set()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    @property
+    def enabled(self):
+        return self.window > 0 and self.max_batch_size > 1
+
+    async def submit(self, item):
+        """Queue ``item`` for the next group and await its result"""
+        if not self.enabled:
+            return self._unwrap((await run_blocking(self.batch_fn, [item]))[0])
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch):
+        # Callers that went away (client disconnect, timeout) are dropped
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        try:
+            results = await run_blocking(self.batch_fn, [item for item, _ in batch])
+        except BaseException as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _unwrap(result):
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "pending": len(self._pending),
+            "running_batches": len(self._tasks),
+        }
+
+
+def _match_winner_batch(input_dicts):
+    from app.core.predictor_match_winner import predict_match_winner_many
+    results = []
+    for result in predict_match_winner_many(input_dicts):
+        result = dict(result)
+        if not result.pop("success", True):
+            results.append(RuntimeError(f"Prediction failed: {result.get('error')}"))
+        else:
+            results.append(result)
+    return results
+
+def _score_batch(input_dicts):
+    from app.core.predictor_score_prediction import predict_score_many
+    return predict_score_many(input_dicts)
+
+
+# Global batcher instances
+_batchers = {}
+
+def get_batcher(name):
+    """Get or create the micro-batcher for 'match_winner' or 'score'"""
+    if name not in _batchers:
+        batch_fns = {"match_winner": _match_winner_batch, "score": _score_batch}
+        _batchers[name] = MicroBatcher(batch_fns[name])
+    return _batchers[name]
+
+async def predict_match_winner_batched(input_dict):
+    """predict_match_winner, grouped with concurrent requests"""
+    return await get_batcher("match_winner").submit(input_dict)
+
+async def predict_score_batched(input_dict):
+    """predict_score, grouped with concurrent requests"""
+    return await get_batcher("score").submit(input_dict)
+
+def get_batcher_stats():
+    return {name: batcher.stats() for name, batcher in _batchers.items()}
@@ -0,0 +1,218 @@
+"""
+Memory-mappable model artifacts.
+
+The sklearn pickles (``*_model.pkl``) are fully unpickled into every worker's
+heap, and sklearn copies tree nodes into its own buffers, so nothing is shared
+between processes. Next to each pickle we therefore save a
+``*_model.mmap.joblib`` file holding the compiled forest arrays, encoders and
+metadata, written uncompressed so ``joblib.load(..., mmap_mode='r')`` maps the
+arrays straight from the page cache. Every worker on a host then shares one
+copy of the tree arrays and starts without unpickling sklearn estimators.
+
+The mmap artifact is written by the trainers, and lazily by the predictors
+when it is missing or older than the pickle.
+
+Usage:
+    python -m app.core.model_artifacts export    # write artifacts for existing pickles
+    python -m app.core.model_artifacts rss [--workers 4]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from app.core.compiled_forest import CompiledForest, compile_forest, compiled_or_original
+
+ARTIFACT_VERSION = 1
+FOREST_ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots')
+
+MODEL_FILES = ("match_winner_model.pkl", "score_prediction_model.pkl")
+
+
+def get_models_dir():
+    return Path(__file__).parent.parent / "models"
+
+def artifact_signature(path):
+    """(mtime, size) of a model artifact, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def mmap_artifact_path(model_path):
+    """``foo_model.pkl`` -> ``foo_model.mmap.joblib``"""
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.stem + ".mmap.joblib")
+
+def save_mmap_artifact(model_data, model_path):
+    """
+    Write the memory-mappable artifact for a trained model.
+
+    ``model_data`` is the dictionary saved in the pickle (model, encoders,
+    feature_names and metrics); the sklearn model itself is replaced by its
+    compiled forest arrays.
+    """
+    forest = compile_forest(model_data['model'])
+    artifact = {key: value for key, value in model_data.items() if key != 'model'}
+    artifact['artifact_version'] = ARTIFACT_VERSION
+    artifact['forest'] = {name: getattr(forest, name) for name in FOREST_ARRAYS}
+    artifact['forest_meta'] = {
+        'max_depth': forest.max_depth,
+        'is_classifier': forest.is_classifier,
+        'classes': None if forest.classes is None else np.asarray(forest.classes),
+        'n_features': forest.n_features,
+    }
+
+    target = mmap_artifact_path(model_path)
+    fd, tmp_name = tempfile.mkstemp(prefix=".tmp-", suffix=".joblib", dir=target.parent)
+    os.close(fd)
+    # mkstemp creates 0600 files; workers may run as another user
+    os.chmod(tmp_name, 0o644)
+    try:
+        # No compression: compressed artifacts cannot be memory-mapped
+        joblib.dump(artifact, tmp_name, compress=0)
+        os.replace(tmp_name, target)
+    except Exception:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+    return target
+
+def load_mmap_artifact(model_path):
+    """
+    Load the memory-mapped artifact for ``model_path``.
+
+    Returns (artifact dict, CompiledForest), or None when the artifact is
+    missing, from another format version, or older than the pickle.
+    """
+    target = mmap_artifact_path(model_path)
+    if not target.exists():
+        return None
+    if Path(model_path).exists() and os.stat(target).st_mtime_ns < os.stat(model_path).st_mtime_ns:
+        return None
+
+    artifact = joblib.load(target, mmap_mode='r')
+    if artifact.get('artifact_version') != ARTIFACT_VERSION:
+        return None
+
+    # np.asarray drops the memmap subclass but keeps the shared mapping
+    arrays = {name: np.asarray(artifact['forest'][name]) for name in FOREST_ARRAYS}
+    forest = CompiledForest(**arrays, **artifact['forest_meta'])
+    return artifact, forest
+
+def _mmap_enabled():
+    flags = (os.environ.get("ML_MMAP_MODELS", "1"), os.environ.get("ML_COMPILED_TREES", "1"))
+    return all(flag.lower() not in ("0", "false", "no") for flag in flags)
+
+def load_model_data(model_path):
+    """
+    Load a trained model for inference.
+
+    Returns (model_data, estimator). With memory-mapped artifacts enabled
+    (the default; ML_MMAP_MODELS=0 disables) the estimator is a CompiledForest
+    over shared mapped arrays and model_data has no sklearn 'model' entry.
+    Otherwise the pickle is loaded and the estimator is its compiled forest
+    (or the sklearn model itself with ML_COMPILED_TREES=0).
+    """
+    if _mmap_enabled():
+        loaded = load_mmap_artifact(model_path)
+        if loaded is None:
+            model_data = joblib.load(model_path)
+            try:
+                save_mmap_artifact(model_data, model_path)
+                loaded = load_mmap_artifact(model_path)
+            except (OSError, ValueError) as e:
+                print(f"Could not write memory-mapped artifact for {Path(model_path).name}: {e}")
+            if loaded is None:
+                return model_data, compiled_or_original(model_data['model'])
+        return loaded
+
+    model_data = joblib.load(model_path)
+    return model_data, compiled_or_original(model_data['model'])
+
+def _rss_probe(mode, settle=2.0):
+    """Run inside a worker: load both predictors and print RSS/PSS in kB"""
+    import time
+    if mode == "pickle":
+        os.environ["ML_MMAP_MODELS"] = "0"
+    from app.core.predictor_match_winner import get_predictor as get_match_predictor
+    from app.core.predictor_score_prediction import get_predictor as get_score_predictor
+    get_match_predictor()
+    get_score_predictor()
+    # Give the other workers time to map the same files before sampling PSS
+    time.sleep(settle)
+
+    values = {}
+    for path, keys in (("/proc/self/status", ("VmRSS",)), ("/proc/self/smaps_rollup", ("Pss",))):
+        try:
+            with open(path) as fh:
+                for line in fh:
+                    name = line.split(":")[0]
+                    if name in keys:
+                        values[name] = int(line.split()[1])
+        except OSError:
+            pass
+    print(f"{values.get('VmRSS', 0)} {values.get('Pss', 0)}")
+
+def measure_rss(workers=4):
+    """
+    Start ``workers`` processes per loading mode and report mean RSS/PSS.
+
+    PSS divides shared pages between the processes mapping them, so it shows
+    the per-worker cost once the model arrays are shared.
+    """
+    results = {}
+    for mode in ("pickle", "mmap"):
+        procs = [
+            subprocess.Popen(
+                [sys.executable, "-c",
+                 f"from app.core.model_artifacts import _rss_probe; _rss_probe({mode!r})"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=Path(__file__).resolve().parents[2],
+                text=True,
+            )
+            for _ in range(workers)
+        ]
+        samples = []
+        for proc in procs:
+            for line in proc.stdout:
+                parts = line.split()
+                if len(parts) == 2 and all(p.isdigit() for p in parts):
+                    samples.append((int(parts[0]), int(parts[1])))
+            proc.wait()
+        if samples:
+            results[mode] = {
+                "rss_kb": sum(s[0] for s in samples) / len(samples),
+                "pss_kb": sum(s[1] for s in samples) / len(samples),
+            }
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage memory-mappable model artifacts")
+    parser.add_argument("command", choices=["export", "rss"])
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes for rss")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        for name in MODEL_FILES:
+            model_path = get_models_dir() / name
+            if not model_path.exists():
+                print(f"{name}: not found, skipped")
+                continue
+            target = save_mmap_artifact(joblib.load(model_path), model_path)
+            print(f"{name}: wrote {target}")
+        return 0
+
+    for mode, stats in measure_rss(args.workers).items():
+        print(f"{mode}: RSS {stats['rss_kb'] / 1024:.1f} MB, PSS {stats['pss_kb'] / 1024:.1f} MB per worker")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
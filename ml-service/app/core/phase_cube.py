@@ -0,0 +1,306 @@
+"""
+Dense phase-analysis cube over the deliveries data.
+
+Every delivery is counted once into two int32 cubes indexed by
+
+    (player, team, season, phase, measure)
+
+``batting`` is batsman x batting team and ``bowling`` is bowler x bowling
+team. The phases are the powerplay (overs 1-6), the middle overs (7-15) and
+the death overs (16-20). The measures are runs, balls, fours, sixes and
+dismissals. Batting runs are the batsman's runs. Bowling runs are every run
+conceded, extras included. As in the backend's phase pipelines, every ball
+with a dismissal counts, run outs included.
+
+Team, player and league totals are precomputed marginals. Any team, player,
+team + player or season query is therefore a slice, plus at most a sum over
+the season axis, rather than an aggregation over every delivery.
+``phase_analysis`` returns the same response as the backend's
+GET /api/analytics/phase.
+
+Player and team axes hold only the names seen in the deliveries, in
+vocabulary id order (app.core.vocabulary). The cube is built from the shared
+data on first use and rebuilt when the matches or deliveries content hash
+changes.
+
+Usage:
+    python -m app.core.phase_cube [--team TEAM] [--player PLAYER] [--season SEASON]
+"""
+import argparse
+import json
+import sys
+import threading
+
+import numpy as np
+
+from app.core.data_loader import get_data_store
+from app.core.feature_encoding import parse_season
+from app.core.vocabulary import get_vocabulary
+from app.core.metrics import timed
+
+PHASES = ("POWERPLAY", "MIDDLE", "DEATH")
+# Last over of each phase
+PHASE_ENDS = (6, 15, 20)
+
+MEASURES = ("runs", "balls", "fours", "sixes", "dismissals")
+RUNS, BALLS, FOURS, SIXES, DISMISSALS = range(len(MEASURES))
+
+
+def _phase_of(overs):
+    """Phase index of each over, -1 outside overs 1-20"""
+    overs = np.asarray(overs)
+    phase = np.searchsorted(PHASE_ENDS, overs)
+    phase[(overs < 1) | (overs > PHASE_ENDS[-1])] = -1
+    return phase
+
+def _season_slots(store, delivery_match_ids):
+    """
+    (seasons, slot per delivery). Deliveries of matches missing from the
+    matches data go to a trailing slot that only counts towards all-season
+    totals.
+    """
+    matches = store.matches
+    match_ids = matches['id'].to_numpy()
+    match_seasons = matches['season'].map(parse_season).to_numpy(dtype=np.int64)
+    seasons = np.unique(match_seasons)
+    slots = np.full(len(delivery_match_ids), len(seasons), dtype=np.int64)
+    if len(match_ids):
+        order = np.argsort(match_ids)
+        pos = np.minimum(np.searchsorted(match_ids, delivery_match_ids, sorter=order), len(match_ids) - 1)
+        row = order[pos]
+        found = match_ids[row] == delivery_match_ids
+        slots[found] = np.searchsorted(seasons, match_seasons[row[found]])
+    return seasons, slots
+
+def _count(index, shape, measures):
+    """int32 cube of ``shape`` + (measure,) summing each measure's weights at ``index``"""
+    flat = np.ravel_multi_index(index, shape)
+    size = int(np.prod(shape))
+    cube = np.empty(shape + (len(measures),), dtype=np.int32)
+    for m, weights in enumerate(measures):
+        cube[..., m] = np.bincount(flat, weights=weights, minlength=size).reshape(shape)
+    return cube
+
+
+class PhaseCube:
+    """Batting and bowling phase cubes plus their team, player and league marginals"""
+
+    def __init__(self, batting, bowling, players, teams, seasons, source=None):
+        self.batting = batting
+        self.bowling = bowling
+        self.players = tuple(players)
+        self.teams = tuple(teams)
+        self.seasons = tuple(int(s) for s in seasons)
+        self.source = source
+        self._player_index = {name: i for i, name in enumerate(self.players)}
+        self._team_index = {name: i for i, name in enumerate(self.teams)}
+        self._season_index = {season: i for i, season in enumerate(self.seasons)}
+
+        self._marginals = {}
+        for side, cube in (("batting", batting), ("bowling", bowling)):
+            self._marginals[side] = {
+                "player": cube.sum(axis=1, dtype=np.int64),
+                "team": cube.sum(axis=0, dtype=np.int64),
+                "league": cube.sum(axis=(0, 1), dtype=np.int64),
+            }
+
+    @classmethod
+    def from_store(cls, store=None):
+        """Build the cubes from the shared matches and deliveries data"""
+        store = store or get_data_store()
+        source = (store.fingerprint('matches'), store.fingerprint('deliveries'))
+        deliveries = store.deliveries
+
+        phase = _phase_of(deliveries['over'].to_numpy())
+        seasons, season = _season_slots(store, deliveries['match_id'].to_numpy())
+        batsman = store.codes('deliveries', 'batsman')
+        bowler = store.codes('deliveries', 'bowler')
+        batting_team = store.codes('deliveries', 'batting_team')
+        bowling_team = store.codes('deliveries', 'bowling_team')
+
+        keep = (phase >= 0) & (batsman >= 0) & (bowler >= 0) & (batting_team >= 0) & (bowling_team >= 0)
+        phase, season = phase[keep], season[keep]
+        batsman, bowler = batsman[keep], bowler[keep]
+        batting_team, bowling_team = batting_team[keep], bowling_team[keep]
+
+        # Compact axes: only the players and teams that appear
+        player_ids = np.unique(np.concatenate([batsman, bowler]))
+        team_ids = np.unique(np.concatenate([batting_team, bowling_team]))
+        shape = (len(player_ids), len(team_ids), len(seasons) + 1, len(PHASES))
+
+        batsman_runs = deliveries['batsman_runs'].to_numpy()[keep]
+        fours = (batsman_runs == 4).astype(np.int32)
+        sixes = (batsman_runs == 6).astype(np.int32)
+        dismissals = deliveries['player_dismissed'].notna().to_numpy()[keep].astype(np.int32)
+        total_runs = deliveries['total_runs'].to_numpy()[keep]
+
+        batting = _count(
+            (np.searchsorted(player_ids, batsman), np.searchsorted(team_ids, batting_team), season, phase),
+            shape, (batsman_runs, None, fours, sixes, dismissals))
+        bowling = _count(
+            (np.searchsorted(player_ids, bowler), np.searchsorted(team_ids, bowling_team), season, phase),
+            shape, (total_runs, None, fours, sixes, dismissals))
+
+        vocabulary = get_vocabulary(store.data_path)
+        players = vocabulary.decode("player", player_ids)
+        teams = vocabulary.decode("team", team_ids)
+        return cls(batting, bowling, players, teams, seasons, source)
+
+    @property
+    def nbytes(self):
+        return self.batting.nbytes + self.bowling.nbytes
+
+    def stats(self, side, team=None, player=None, season=None):
+        """
+        (phase, measure) totals of one side ('batting' or 'bowling') for a
+        team, player, both or the league, in one season or all (None).
+        Unknown names and seasons give zeros.
+        """
+        marginals = self._marginals[side]
+        if team is not None and player is not None:
+            p = self._player_index.get(player)
+            t = self._team_index.get(team)
+            cube = None if p is None or t is None else (self.batting if side == "batting" else self.bowling)[p, t]
+        elif team is not None:
+            t = self._team_index.get(team)
+            cube = None if t is None else marginals["team"][t]
+        elif player is not None:
+            p = self._player_index.get(player)
+            cube = None if p is None else marginals["player"][p]
+        else:
+            cube = marginals["league"]
+
+        # cube: (season, phase, measure)
+        if cube is not None and season is not None:
+            slot = self._season_index.get(season)
+            cube = None if slot is None else cube[slot]
+        elif cube is not None:
+            cube = cube.sum(axis=0, dtype=np.int64)
+        if cube is None:
+            return np.zeros((len(PHASES), len(MEASURES)), dtype=np.int64)
+        return cube
+
+
+# Response rows, matching the backend's aggregation output
+
+def _batting_row(row, with_dismissals=True):
+    runs, balls = int(row[RUNS]), int(row[BALLS])
+    stat = {
+        "runsScored": runs,
+        "ballsFaced": balls,
+        "fours": int(row[FOURS]),
+        "sixes": int(row[SIXES]),
+    }
+    if with_dismissals:
+        wickets = int(row[DISMISSALS])
+        stat["wicketsLost"] = wickets
+    stat["strikeRate"] = runs / balls * 100 if balls else 0
+    if with_dismissals:
+        stat["avg"] = runs / wickets if wickets else runs
+    return stat
+
+def _bowling_row(row):
+    runs, balls = int(row[RUNS]), int(row[BALLS])
+    return {
+        "runsConceded": runs,
+        "ballsBowled": balls,
+        "wicketsTaken": int(row[DISMISSALS]),
+        "economy": runs / balls * 6 if balls else 0,
+    }
+
+def _league_row(phase, row):
+    runs, balls, wickets = int(row[RUNS]), int(row[BALLS]), int(row[DISMISSALS])
+    return {
+        "_id": phase,
+        "totalRuns": runs,
+        "totalBalls": balls,
+        "totalWickets": wickets,
+        "boundaries": int(row[FOURS] + row[SIXES]),
+        "avgRunRate": runs / balls * 6,
+        "wicketRate": wickets / balls,
+    }
+
+def phase_analysis(team=None, player=None, season=None, cube=None):
+    """
+    Phase breakdown for a team, player, team + player or the whole league,
+    optionally for one season. Same response as the backend's
+    GET /api/analytics/phase.
+    """
+    cube = cube or get_phase_cube()
+    with timed("analytics.phase_query"):
+        batting = cube.stats("batting", team, player, season)
+        bowling = cube.stats("bowling", team, player, season)
+    season_label = season if season is not None else 'all'
+
+    if team is not None:
+        result = {"team": team}
+        if player is not None:
+            result["player"] = player
+        result.update({
+            "season": season_label,
+            "batting": [{"phase": phase, **_batting_row(batting[i])} for i, phase in enumerate(PHASES)],
+            "bowling": [{"phase": phase, **_bowling_row(bowling[i])} for i, phase in enumerate(PHASES)],
+        })
+        return result
+
+    if player is not None:
+        # Only phases the player batted / bowled in, null if none
+        batting_rows = [
+            {"_id": phase, **_batting_row(batting[i], with_dismissals=False)}
+            for i, phase in enumerate(PHASES) if batting[i, BALLS]
+        ]
+        bowling_rows = [
+            {"_id": phase, **_bowling_row(bowling[i])}
+            for i, phase in enumerate(PHASES) if bowling[i, BALLS]
+        ]
+        return {
+            "player": player,
+            "season": season_label,
+            "batting": batting_rows or None,
+            "bowling": bowling_rows or None,
+        }
+
+    # League: every ball once, runs including extras
+    return {
+        "season": season_label,
+        "leagueStats": [_league_row(phase, bowling[i]) for i, phase in enumerate(PHASES) if bowling[i, BALLS]],
+    }
+
+
+# Global cube instance
+_cube = None
+_cube_lock = threading.Lock()
+
+def get_phase_cube():
+    """
+    Get the phase cube for the current data, building it on first use and
+    whenever the matches or deliveries content hash changes.
+    """
+    global _cube
+    store = get_data_store()
+    source = (store.fingerprint('matches'), store.fingerprint('deliveries'))
+    cube = _cube
+    if cube is not None and cube.source == source:
+        return cube
+
+    with _cube_lock:
+        if _cube is None or _cube.source != source:
+            with timed("analytics.phase_cube_build"):
+                _cube = PhaseCube.from_store(store)
+            print(f"Phase cube built: {len(_cube.players)} players, {len(_cube.teams)} teams, "
+                  f"{len(_cube.seasons)} seasons ({_cube.nbytes / 2**20:.1f} MiB)")
+        return _cube
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Phase analysis from the precomputed cube")
+    parser.add_argument("--team", default=None)
+    parser.add_argument("--player", default=None)
+    parser.add_argument("--season", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(phase_analysis(args.team, args.player, args.season), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
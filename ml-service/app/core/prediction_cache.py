@@ -0,0 +1,100 @@
+"""
+Bounded, thread-safe result cache for the model predictors.
+
+Entries are evicted least-recently-used once ``maxsize`` is reached and,
+when a TTL is set, expire ``ttl`` seconds after they were stored. Hit, miss
+and eviction counters are kept so the cache can be sized from real traffic.
+
+Defaults come from the environment:
+    PREDICTION_CACHE_SIZE  maximum entries per predictor (default 4096, 0 disables)
+    PREDICTION_CACHE_TTL   seconds before an entry expires (default 0, no expiry)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_CACHE_TTL = 0.0
+
+
+def _env_number(name, default, cast):
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        print(f"Ignoring invalid {name}={value!r}, using {default}")
+        return default
+
+
+class PredictionCache:
+    """LRU cache with optional TTL and hit/miss counters"""
+
+    def __init__(self, maxsize=None, ttl=None):
+        if maxsize is None:
+            maxsize = _env_number("PREDICTION_CACHE_SIZE", DEFAULT_CACHE_SIZE, int)
+        if ttl is None:
+            ttl = _env_number("PREDICTION_CACHE_TTL", DEFAULT_CACHE_TTL, float)
+        self.maxsize = max(0, maxsize)
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value for ``key`` or None"""
+        if self.maxsize == 0:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize == 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (e.g. after the model was reloaded)"""
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Counters and settings, for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -4,8 +4,11 @@ from typing import Dict, Any, Optional, Tuple
 import os
 from pathlib import Path
 
-from app.core.data_loader import load_matches_data, load_deliveries_data
 from app.core.predictor_score_prediction import predict_score
+from app.core.chase_table import get_chase_table, ChaseProbabilityTable
+from app.core.chase_neighbours import get_neighbour_index
+from app.core.match_context import get_match_context_index
+from app.core.metrics import timed
 
 
 def predict_live_match_state(
@@ -29,25 +32,20 @@ def predict_live_match_state(
         Dictionary with prediction results
     """
     try:
-        # Load data
-        matches_df = load_matches_data()
-        deliveries_df = load_deliveries_data()
-        
-        # Find match details
-        match_info = matches_df[matches_df['match_id'] == match_id]
-        if match_info.empty:
+        # Find match details (teams, venue, season, first innings total)
+        with timed("live.match_lookup"):
+            context = get_match_context_index().context(match_id)
+        if context is None:
             # Use heuristic if match not found
             return _heuristic_prediction(inning, overs, current_runs, wickets)
         
-        match_row = match_info.iloc[0]
-        
         if inning == 1:
             return _predict_first_innings_score(
-                match_row, overs, current_runs, wickets, deliveries_df
+                context, overs, current_runs, wickets
             )
         else:
             return _predict_chase_probability(
-                match_row, overs, current_runs, wickets, deliveries_df
+                context, overs, current_runs, wickets
             )
             
     except Exception as e:
@@ -56,12 +54,47 @@ def predict_live_match_state(
         return _heuristic_prediction(inning, overs, current_runs, wickets)
 
 
+def get_match_context(match_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Score model inputs for a match (teams in batting order, venue, season)
+    plus the first innings total as ``target``, or None if the match is
+    unknown.
+    """
+    with timed("live.match_lookup"):
+        return get_match_context_index().context(match_id)
+
+
+def project_first_innings_score(overs: float, current_runs: int, wickets: int) -> int:
+    """Heuristic projected first innings total."""
+    return _heuristic_first_innings_score(overs, current_runs, wickets)["predicted_final_score"]
+
+
+def chase_win_probability(
+    required_runs: int,
+    overs_remaining: float,
+    wickets: int,
+    table: Optional[ChaseProbabilityTable] = None
+) -> float:
+    """
+    Win probability of a chase state from similar historical situations,
+    heuristic when there are too few of them or no data.
+    
+    ``table`` defaults to the chase table of the current data.
+    """
+    if overs_remaining <= 0 or required_runs <= 0:
+        return 1.0 if required_runs <= 0 else 0.0
+    try:
+        return _calculate_chase_probability_from_history(required_runs, overs_remaining, wickets, table)
+    except Exception as e:
+        print(f"Historical analysis failed: {e}")
+        return _heuristic_chase_probability_value(required_runs, overs_remaining, wickets)
+
+
 def _predict_first_innings_score(
-    match_row: pd.Series,
+    context: Dict[str, Any],
     overs: float,
     current_runs: int,
-    wickets: int,
-    deliveries_df: pd.DataFrame
+    wickets: int
 ) -> Dict[str, Any]:
     """Predict final first innings score."""
     
@@ -71,15 +104,15 @@ def _predict_first_innings_score(
         models_path = Path(__file__).resolve().parents[1] / "models"
         if (models_path / "score_prediction_model.pkl").exists():
             # Use the existing score predictor
-            prediction_result = predict_score(
-                battingTeam=match_row.get('team1', 'Unknown'),
-                bowlingTeam=match_row.get('team2', 'Unknown'),
-                venue=match_row.get('venue', 'Unknown'),
-                season=int(match_row.get('season', 2019)),
-                currentRuns=current_runs,
-                wickets=wickets,
-                overs=overs
-            )
+            prediction_result = predict_score({
+                "battingTeam": context['battingTeam'],
+                "bowlingTeam": context['bowlingTeam'],
+                "venue": context['venue'],
+                "season": context['season'],
+                "currentRuns": current_runs,
+                "wickets": wickets,
+                "overs": overs
+            })
             
             return {
                 "ok": True,
@@ -95,24 +128,15 @@ def _predict_first_innings_score(
 
 
 def _predict_chase_probability(
-    match_row: pd.Series,
+    context: Dict[str, Any],
     overs: float,
     current_runs: int,
-    wickets: int,
-    deliveries_df: pd.DataFrame
+    wickets: int
 ) -> Dict[str, Any]:
     """Predict chase win probability."""
     
-    # Get target from match data or estimate
-    target = match_row.get('firstInningsScore', 160)  # Default if not available
-    if pd.isna(target) or target == 0:
-        # Try to get from deliveries
-        match_deliveries = deliveries_df[deliveries_df['match_id'] == match_row['match_id']]
-        if not match_deliveries.empty:
-            first_innings = match_deliveries[match_deliveries['inning'] == 1]
-            target = first_innings['total_runs'].sum() if not first_innings.empty else 160
-        else:
-            target = 160
+    # First innings total from the context index
+    target = context['target'] or 160  # Default if not available
     
     required_runs = target - current_runs
     overs_remaining = 20.0 - overs
@@ -139,9 +163,9 @@ def _predict_chase_probability(
     # Try historical analysis
     try:
         win_prob = _calculate_chase_probability_from_history(
-            deliveries_df, required_runs, overs_remaining, wickets
+            required_runs, overs_remaining, wickets
         )
-        return {
+        result = {
             "ok": True,
             "type": "inning2",
             "predicted_win_prob": round(win_prob, 3),
@@ -151,79 +175,55 @@ def _predict_chase_probability(
         print(f"Historical analysis failed: {e}")
         # Fall back to heuristic
         return _heuristic_chase_probability(required_runs, overs_remaining, wickets)
+    
+    # Enrich with nearest historical situations (optional)
+    try:
+        result.update(_similar_situations(required_runs, overs_remaining, wickets, target))
+    except Exception as e:
+        print(f"Neighbour lookup failed: {e}")
+    
+    return result
+
+
+def _similar_situations(
+    required_runs: int,
+    overs_remaining: float,
+    wickets: int,
+    target: int
+) -> Dict[str, Any]:
+    """Neighbour-weighted win probability and closest historical matches."""
+    
+    with timed("live.neighbours"):
+        index = get_neighbour_index()
+        neighbour_prob, used = index.win_probability(required_runs, overs_remaining, wickets, target)
+        if used == 0:
+            return {}
+        similar = index.similar_matches(required_runs, overs_remaining, wickets, target)
+    
+    return {
+        "neighbour_win_prob": round(neighbour_prob, 3),
+        "similar_matches": similar
+    }
 
 
 def _calculate_chase_probability_from_history(
-    deliveries_df: pd.DataFrame,
     required_runs: int,
     overs_remaining: float,
-    wickets: int
+    wickets: int,
+    table: Optional[ChaseProbabilityTable] = None
 ) -> float:
     """Calculate win probability based on historical similar situations."""
     
-    # Define similar situations (bucketing)
-    over_bucket = int(overs_remaining)  # Round down overs remaining
-    wicket_bucket = min(wickets, 7)  # Cap at 7 wickets
-    required_rr = required_runs / overs_remaining if overs_remaining > 0 else 20
-    rr_bucket = round(required_rr)  # Round required run rate
-    
-    # Find similar situations in historical data
-    # Group deliveries by match and inning to get match states
-    match_states = []
+    # Similar situations (±2 overs, ±1 wicket, ±2 RRR) come from the
+    # precomputed lookup table instead of scanning every match
+    with timed("live.history"):
+        wins, samples = (table or get_chase_table()).lookup(required_runs, overs_remaining, wickets)
     
-    for match_id in deliveries_df['match_id'].unique():
-        match_deliveries = deliveries_df[deliveries_df['match_id'] == match_id]
-        
-        # Get second innings only
-        second_innings = match_deliveries[match_deliveries['inning'] == 2]
-        if second_innings.empty:
-            continue
-            
-        # Get first innings total
-        first_innings = match_deliveries[match_deliveries['inning'] == 1]
-        if first_innings.empty:
-            continue
-            
-        first_innings_total = first_innings['total_runs'].sum()
-        
-        # Track running totals and wickets
-        running_runs = 0
-        running_wickets = 0
-        
-        for _, delivery in second_innings.iterrows():
-            running_runs += delivery['total_runs']
-            if pd.notna(delivery['player_dismissed']) and delivery['player_dismissed'] != '':
-                running_wickets += 1
-            
-            current_over = delivery['over'] + (delivery['ball'] / 10.0)
-            overs_left = 20.0 - current_over
-            runs_needed = first_innings_total - running_runs
-            
-            if overs_left > 0 and overs_left <= 15:  # Only consider meaningful states
-                state_rr = runs_needed / overs_left if overs_left > 0 else 20
-                
-                # Check if this state is similar to our query
-                if (abs(overs_left - overs_remaining) <= 2 and
-                    abs(running_wickets - wickets) <= 1 and
-                    abs(state_rr - required_rr) <= 2):
-                    
-                    # Determine if team won from this state
-                    final_runs = second_innings['total_runs'].sum()
-                    won = final_runs >= first_innings_total
-                    
-                    match_states.append({
-                        'overs_left': overs_left,
-                        'wickets': running_wickets,
-                        'required_rr': state_rr,
-                        'won': won
-                    })
-    
-    if len(match_states) < 5:  # Not enough data, use heuristic
+    if samples < 5:  # Not enough data, use heuristic
         return _heuristic_chase_probability_value(required_runs, overs_remaining, wickets)
     
     # Calculate win percentage from similar states
-    wins = sum(1 for state in match_states if state['won'])
-    win_probability = wins / len(match_states)
+    win_probability = wins / samples
     
     return max(0.0, min(1.0, win_probability))  # Clamp between 0 and 1
 
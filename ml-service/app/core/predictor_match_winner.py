@@ -3,18 +3,32 @@ import numpy as np
 from pathlib import Path
 import sys
 import os
+import threading
+import time
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.core.features_match_winner import build_single_feature_row
+from app.core.prediction_cache import PredictionCache
+from app.core.model_artifacts import load_model_data, artifact_signature
+from app.core.metrics import timed, record_model_load
+from app.core.features_match_winner import build_single_feature_row, build_feature_matrix, compile_encoders
+
+REQUIRED_KEYS = ('team1', 'team2', 'venue', 'tossWinner', 'tossDecision', 'season')
+
+# Result cache shared by every predictor instance in this process
+_cache = PredictionCache()
 
 class MatchWinnerPredictor:
     def __init__(self):
         self.model_data = None
         self.model = None
+        self.estimator = None
         self.encoders = None
+        self.transformer = None
         self.feature_names = None
+        self.model_path = None
+        self.model_signature = None
         self._load_model()
     
     def _load_model(self):
@@ -29,14 +43,29 @@ class MatchWinnerPredictor:
             )
         
         try:
-            self.model_data = joblib.load(model_path)
-            self.model = self.model_data['model']
+            self.model_path = model_path
+            self.model_signature = artifact_signature(model_path)
+            # Compiled forest over memory-mapped arrays where available,
+            # shared between workers (same predict API as the sklearn model)
+            start = time.perf_counter()
+            self.model_data, self.estimator = load_model_data(model_path)
+            self.model = self.model_data.get('model')
             self.encoders = self.model_data['encoders']
+            # Compile encoders once so requests only do dict lookups
+            self.transformer = compile_encoders(self.encoders)
             self.feature_names = self.model_data['feature_names']
+            # Results computed with a previous artifact are no longer valid
+            _cache.clear()
+            record_model_load("match_winner", time.perf_counter() - start)
             print("Match winner model loaded successfully")
         except Exception as e:
             raise RuntimeError(f"Failed to load match winner model: {str(e)}")
     
+    def is_stale(self):
+        """True if the model artifact on disk changed since it was loaded"""
+        signature = artifact_signature(self.model_path)
+        return signature is not None and signature != self.model_signature
+    
     def predict_match_winner(self, input_dict):
         """
         Predict match winner probabilities
@@ -53,40 +82,121 @@ class MatchWinnerPredictor:
         Returns:
             Dictionary with team1_win_prob and team2_win_prob
         """
-        if self.model is None:
+        if self.estimator is None:
             raise RuntimeError("Model not loaded. Please check model file.")
         
         try:
             # Build feature row
-            feature_row = build_single_feature_row(input_dict, self.encoders)
+            with timed("match_winner.build_features"):
+                feature_row = build_single_feature_row(input_dict, self.transformer)
+            
+            # The encoded row is the normalized input: unseen names and
+            # equivalent season formats share one cache entry
+            cache_key = (tuple(feature_row[0]), input_dict['team1'], input_dict['team2'])
+            cached = _cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
             
             # Get prediction probabilities
-            probabilities = self.model.predict_proba(feature_row)[0]
+            with timed("match_winner.predict"):
+                probabilities = self.estimator.predict_proba(feature_row)[0]
             
-            # probabilities[0] = probability of team2 winning (class 0)
-            # probabilities[1] = probability of team1 winning (class 1)
-            team1_win_prob = float(probabilities[1])
-            team2_win_prob = float(probabilities[0])
+            result = self._format_result(input_dict, probabilities)
+            _cache.put(cache_key, result)
             
-            return {
-                "team1_win_prob": team1_win_prob,
-                "team2_win_prob": team2_win_prob,
-                "prediction": input_dict['team1'] if team1_win_prob > team2_win_prob else input_dict['team2'],
-                "confidence": max(team1_win_prob, team2_win_prob)
-            }
+            return dict(result)
             
         except Exception as e:
             raise RuntimeError(f"Prediction failed: {str(e)}")
+    
+    def _format_result(self, input_dict, probabilities):
+        # probabilities[0] = probability of team2 winning (class 0)
+        # probabilities[1] = probability of team1 winning (class 1)
+        team1_win_prob = float(probabilities[1])
+        team2_win_prob = float(probabilities[0])
+        
+        return {
+            "team1_win_prob": team1_win_prob,
+            "team2_win_prob": team2_win_prob,
+            "prediction": input_dict['team1'] if team1_win_prob > team2_win_prob else input_dict['team2'],
+            "confidence": max(team1_win_prob, team2_win_prob)
+        }
+    
+    def predict_many(self, input_dicts):
+        """
+        Predict match winner probabilities for many fixtures at once
+        
+        All valid fixtures are encoded into one matrix; those not in the
+        result cache are scored with a single predict_proba call. Invalid
+        fixtures do not fail the batch.
+        
+        Args:
+            input_dicts: List of dictionaries shaped like predict_match_winner input
+        
+        Returns:
+            List (same order as input) of result dictionaries with "success": True,
+            or {"success": False, "error": ...} for fixtures that could not be scored
+        """
+        if self.estimator is None:
+            raise RuntimeError("Model not loaded. Please check model file.")
+        
+        results = [None] * len(input_dicts)
+        valid_positions = []
+        for i, input_dict in enumerate(input_dicts):
+            missing = [key for key in REQUIRED_KEYS if key not in input_dict]
+            if missing:
+                results[i] = {"success": False, "error": f"Missing fields: {', '.join(missing)}"}
+            else:
+                valid_positions.append(i)
+        
+        if valid_positions:
+            valid_inputs = [input_dicts[i] for i in valid_positions]
+            with timed("match_winner.build_features"):
+                feature_matrix = build_feature_matrix(valid_inputs, self.transformer)
+            
+            # Serve repeated fixtures from the result cache and score the rest
+            # with one predict_proba call
+            misses = []
+            for j, (input_dict, row) in enumerate(zip(valid_inputs, feature_matrix)):
+                cached = _cache.get((tuple(row), input_dict['team1'], input_dict['team2']))
+                if cached is not None:
+                    results[valid_positions[j]] = dict(cached, success=True)
+                else:
+                    misses.append(j)
+            
+            if misses:
+                with timed("match_winner.predict"):
+                    probabilities = self.estimator.predict_proba(feature_matrix[misses])
+                for j, row in zip(misses, probabilities):
+                    input_dict = valid_inputs[j]
+                    result = self._format_result(input_dict, row)
+                    _cache.put((tuple(feature_matrix[j]), input_dict['team1'], input_dict['team2']), result)
+                    results[valid_positions[j]] = dict(result, success=True)
+        
+        return results
 
 # Global predictor instance
 _predictor = None
+_predictor_lock = threading.Lock()
 
 def get_predictor():
-    """Get or create the global predictor instance"""
+    """
+    Get or create the global predictor instance, reloading it when the
+    model artifact on disk changed
+    """
     global _predictor
-    if _predictor is None:
-        _predictor = MatchWinnerPredictor()
-    return _predictor
+    predictor = _predictor
+    if predictor is not None and not predictor.is_stale():
+        return predictor
+    
+    with _predictor_lock:
+        if _predictor is None or _predictor.is_stale():
+            _predictor = MatchWinnerPredictor()
+        return _predictor
+
+def get_cache_stats():
+    """Hit/miss counters of the match winner result cache"""
+    return _cache.stats()
 
 def predict_match_winner(input_dict):
     """
@@ -100,3 +210,16 @@ def predict_match_winner(input_dict):
     """
     predictor = get_predictor()
     return predictor.predict_match_winner(input_dict)
+
+def predict_match_winner_many(input_dicts):
+    """
+    Convenience function for batch match winner prediction
+    
+    Args:
+        input_dicts: List of dictionaries with match details
+    
+    Returns:
+        List of per-fixture prediction results
+    """
+    predictor = get_predictor()
+    return predictor.predict_many(input_dicts)
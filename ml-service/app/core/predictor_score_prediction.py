@@ -3,18 +3,32 @@ import numpy as np
 from pathlib import Path
 import sys
 import os
+import threading
+import time
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.core.features_score_prediction import build_single_feature_row
+from app.core.prediction_cache import PredictionCache
+from app.core.model_artifacts import load_model_data, artifact_signature
+from app.core.metrics import timed, record_model_load
+from app.core.features_score_prediction import build_single_feature_row, build_feature_matrix, build_feature_grid, compile_encoders
+
+PROJECTION_MODES = ('curve', 'grid')
+
+# Result cache shared by every predictor instance in this process
+_cache = PredictionCache()
 
 class ScorePredictor:
     def __init__(self):
         self.model_data = None
         self.model = None
+        self.estimator = None
         self.encoders = None
+        self.transformer = None
         self.feature_names = None
+        self.model_path = None
+        self.model_signature = None
         self._load_model()
     
     def _load_model(self):
@@ -29,14 +43,29 @@ class ScorePredictor:
             )
         
         try:
-            self.model_data = joblib.load(model_path)
-            self.model = self.model_data['model']
+            self.model_path = model_path
+            self.model_signature = artifact_signature(model_path)
+            # Compiled forest over memory-mapped arrays where available,
+            # shared between workers (same predict API as the sklearn model)
+            start = time.perf_counter()
+            self.model_data, self.estimator = load_model_data(model_path)
+            self.model = self.model_data.get('model')
             self.encoders = self.model_data['encoders']
+            # Compile encoders once so requests only do dict lookups
+            self.transformer = compile_encoders(self.encoders)
             self.feature_names = self.model_data['feature_names']
+            # Results computed with a previous artifact are no longer valid
+            _cache.clear()
+            record_model_load("score_prediction", time.perf_counter() - start)
             print("Score prediction model loaded successfully")
         except Exception as e:
             raise RuntimeError(f"Failed to load score prediction model: {str(e)}")
     
+    def is_stale(self):
+        """True if the model artifact on disk changed since it was loaded"""
+        signature = artifact_signature(self.model_path)
+        return signature is not None and signature != self.model_signature
+    
     def predict_score(self, input_dict):
         """
         Predict final first innings score
@@ -54,56 +83,200 @@ class ScorePredictor:
         Returns:
             Dictionary with predicted_score
         """
-        if self.model is None:
+        if self.estimator is None:
             raise RuntimeError("Model not loaded. Please check model file.")
         
         try:
             # Build feature row
-            feature_row = build_single_feature_row(input_dict, self.encoders)
-            
-            # Get prediction
-            predicted_score = self.model.predict(feature_row)[0]
+            with timed("score_prediction.build_features"):
+                feature_row = build_single_feature_row(input_dict, self.transformer)
             
-            # Ensure reasonable bounds
-            predicted_score = max(50, min(300, predicted_score))
+            # The encoded row is the normalized input: unseen names and
+            # equivalent season formats share one cache entry
+            cache_key = (tuple(feature_row[0]), input_dict.get('currentRuns', 0))
+            cached = _cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
             
-            # Calculate additional insights
-            current_runs = input_dict.get('currentRuns', 0)
-            current_overs = input_dict.get('overs', 0)
-            wickets = input_dict.get('wickets', 0)
-            
-            # Calculate projected additional runs
-            additional_runs = max(0, predicted_score - current_runs)
-            
-            # Calculate current run rate
-            current_run_rate = current_runs / max(current_overs, 0.1) if current_overs > 0 else 0
+            # Get prediction
+            with timed("score_prediction.predict"):
+                predicted_score = self.estimator.predict(feature_row)[0]
             
-            # Calculate required run rate for remaining overs
-            remaining_overs = max(0, 20 - current_overs)
-            required_run_rate = additional_runs / max(remaining_overs, 0.1) if remaining_overs > 0 else 0
+            result = self._format_result(input_dict, predicted_score)
+            _cache.put(cache_key, result)
             
-            return {
-                "predicted_score": float(predicted_score),
-                "current_runs": current_runs,
-                "additional_runs_needed": float(additional_runs),
-                "current_run_rate": float(current_run_rate),
-                "required_run_rate": float(required_run_rate),
-                "wickets_in_hand": max(0, 10 - wickets),
-                "overs_remaining": float(remaining_overs)
-            }
+            return dict(result)
             
         except Exception as e:
             raise RuntimeError(f"Prediction failed: {str(e)}")
 
+    def _format_result(self, input_dict, predicted_score):
+        # Ensure reasonable bounds
+        predicted_score = max(50, min(300, predicted_score))
+        
+        # Calculate additional insights
+        current_runs = input_dict.get('currentRuns', 0)
+        current_overs = input_dict.get('overs', 0)
+        wickets = input_dict.get('wickets', 0)
+        
+        # Calculate projected additional runs
+        additional_runs = max(0, predicted_score - current_runs)
+        
+        # Calculate current run rate
+        current_run_rate = current_runs / max(current_overs, 0.1) if current_overs > 0 else 0
+        
+        # Calculate required run rate for remaining overs
+        remaining_overs = max(0, 20 - current_overs)
+        required_run_rate = additional_runs / max(remaining_overs, 0.1) if remaining_overs > 0 else 0
+        
+        return {
+            "predicted_score": float(predicted_score),
+            "current_runs": current_runs,
+            "additional_runs_needed": float(additional_runs),
+            "current_run_rate": float(current_run_rate),
+            "required_run_rate": float(required_run_rate),
+            "wickets_in_hand": max(0, 10 - wickets),
+            "overs_remaining": float(remaining_overs)
+        }
+    
+    def predict_many(self, input_dicts):
+        """
+        Predict final first innings scores for many match states at once
+        
+        States not in the result cache are encoded into one matrix and
+        scored with a single predict call. Invalid states do not fail the
+        batch.
+        
+        Args:
+            input_dicts: List of dictionaries shaped like predict_score input
+        
+        Returns:
+            List (same order as input) of result dictionaries like predict_score,
+            or a RuntimeError for states that could not be scored
+        """
+        if self.estimator is None:
+            raise RuntimeError("Model not loaded. Please check model file.")
+        
+        results = [None] * len(input_dicts)
+        with timed("score_prediction.build_features"):
+            positions, feature_matrix = self._feature_rows(input_dicts, results)
+        
+        # Positions in feature_matrix of the states not in the result cache
+        misses = []
+        for j, (i, row) in enumerate(zip(positions, feature_matrix)):
+            cached = _cache.get((tuple(row), input_dicts[i].get('currentRuns', 0)))
+            if cached is not None:
+                results[i] = dict(cached)
+            else:
+                misses.append(j)
+        
+        if misses:
+            try:
+                with timed("score_prediction.predict"):
+                    predictions = self.estimator.predict(feature_matrix[misses])
+            except Exception as e:
+                raise RuntimeError(f"Prediction failed: {str(e)}")
+            for j, predicted_score in zip(misses, predictions):
+                i = positions[j]
+                try:
+                    result = self._format_result(input_dicts[i], predicted_score)
+                except Exception as e:
+                    results[i] = RuntimeError(f"Prediction failed: {str(e)}")
+                    continue
+                _cache.put((tuple(feature_matrix[j]), input_dicts[i].get('currentRuns', 0)), result)
+                results[i] = dict(result)
+        
+        return results
+    
+    def _feature_rows(self, input_dicts, results):
+        """
+        (positions, feature matrix) of the states that could be encoded.
+        Encoding errors are stored in ``results`` at the state's position.
+        """
+        try:
+            return list(range(len(input_dicts))), build_feature_matrix(input_dicts, self.transformer)
+        except Exception:
+            pass
+        
+        # Encode one by one so a malformed state only fails itself
+        positions, rows = [], []
+        for i, input_dict in enumerate(input_dicts):
+            try:
+                rows.append(build_single_feature_row(input_dict, self.transformer)[0])
+                positions.append(i)
+            except Exception as e:
+                results[i] = RuntimeError(f"Prediction failed: {str(e)}")
+        return positions, np.array(rows)
+
+    def predict_projection(self, input_dict, mode='curve'):
+        """
+        Predict final scores for a whole set of (overs, wickets) states in one
+        batched model call
+        
+        Args:
+            input_dict: Base state, same keys as predict_score
+            mode: 'curve' - current overs, then every whole over up to 20 at the
+                            current wickets
+                  'grid'  - every over 1-20 for every wickets value 0-9
+        
+        Returns:
+            List of dictionaries with overs, wickets and predicted_score
+        """
+        if self.estimator is None:
+            raise RuntimeError("Model not loaded. Please check model file.")
+        
+        if mode not in PROJECTION_MODES:
+            raise ValueError(f"Mode must be one of: {', '.join(PROJECTION_MODES)}")
+        
+        if mode == 'curve':
+            current_overs = float(input_dict.get('overs', 0))
+            overs_values = [current_overs] + [
+                float(o) for o in range(int(current_overs) + 1, 21)
+            ]
+            wickets_values = [int(input_dict.get('wickets', 0))]
+        else:
+            overs_values = [float(o) for o in range(1, 21)]
+            wickets_values = list(range(0, 10))
+        
+        try:
+            with timed("score_prediction.build_features"):
+                feature_grid = build_feature_grid(input_dict, self.transformer, overs_values, wickets_values)
+            with timed("score_prediction.predict"):
+                predictions = np.clip(self.estimator.predict(feature_grid), 50, 300)
+        except Exception as e:
+            raise RuntimeError(f"Prediction failed: {str(e)}")
+        
+        points = []
+        for i, predicted_score in enumerate(predictions):
+            points.append({
+                "overs": overs_values[i // len(wickets_values)],
+                "wickets": wickets_values[i % len(wickets_values)],
+                "predicted_score": float(predicted_score)
+            })
+        return points
+
 # Global predictor instance
 _predictor = None
+_predictor_lock = threading.Lock()
 
 def get_predictor():
-    """Get or create the global predictor instance"""
+    """
+    Get or create the global predictor instance, reloading it when the
+    model artifact on disk changed
+    """
     global _predictor
-    if _predictor is None:
-        _predictor = ScorePredictor()
-    return _predictor
+    predictor = _predictor
+    if predictor is not None and not predictor.is_stale():
+        return predictor
+    
+    with _predictor_lock:
+        if _predictor is None or _predictor.is_stale():
+            _predictor = ScorePredictor()
+        return _predictor
+
+def get_cache_stats():
+    """Hit/miss counters of the score result cache"""
+    return _cache.stats()
 
 def predict_score(input_dict):
     """
@@ -117,3 +290,31 @@ def predict_score(input_dict):
     """
     predictor = get_predictor()
     return predictor.predict_score(input_dict)
+
+def predict_score_many(input_dicts):
+    """
+    Convenience function for batch score prediction
+    
+    Args:
+        input_dicts: List of dictionaries with match state details
+    
+    Returns:
+        List of per-state prediction results
+    """
+    predictor = get_predictor()
+    return predictor.predict_many(input_dicts)
+
+
+def predict_score_projection(input_dict, mode='curve'):
+    """
+    Convenience function for a projected-score curve or scenario grid
+    
+    Args:
+        input_dict: Dictionary with match state details
+        mode: 'curve' or 'grid'
+    
+    Returns:
+        List of projected points
+    """
+    predictor = get_predictor()
+    return predictor.predict_projection(input_dict, mode)
@@ -11,17 +11,32 @@ import os
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.core.data_loader import load_matches_data
-from app.core.features_match_winner import build_training_data
+from app.core.model_artifacts import save_mmap_artifact
+from app.core.incremental_training import training_rows, ingest_entry
+from app.core.feature_cache import load_training_data
 
-def train_match_winner_model():
-    """Train and save the match winner prediction model"""
+# RandomForest hyper-parameters of the shipped model
+MODEL_PARAMS = {
+    'n_estimators': 100,
+    'max_depth': 10,
+    'min_samples_split': 5,
+    'min_samples_leaf': 2,
+    'random_state': 42,
+    'n_jobs': -1,
+}
+
+def train_match_winner_model(params=None):
+    """
+    Train and save the match winner prediction model
     
-    print("Loading matches data...")
-    matches_df = load_matches_data()
+    Args:
+        params: RandomForest hyper-parameters overriding MODEL_PARAMS, e.g. the
+            best candidate of app.core.hyperparameter_search
+    """
+    model_params = {**MODEL_PARAMS, **(params or {})}
     
     print("Building training features...")
-    X, y, encoders = build_training_data(matches_df)
+    X, y, encoders = load_training_data("match_winner")
     
     if len(X) == 0:
         raise ValueError("No training data available")
@@ -35,15 +50,8 @@ def train_match_winner_model():
     print(f"Test set: {X_test.shape[0]} samples")
     
     # Train model
-    print("Training RandomForest model...")
-    model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=10,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        random_state=42,
-        n_jobs=-1
-    )
+    print(f"Training RandomForest model with {model_params}...")
+    model = RandomForestClassifier(**model_params)
     
     model.fit(X_train, y_train)
     
@@ -75,13 +83,21 @@ def train_match_winner_model():
         'encoders': encoders,
         'feature_names': feature_names,
         'accuracy': accuracy,
-        'feature_importance': importance_df.to_dict('records')
+        'feature_importance': importance_df.to_dict('records'),
+        'model_params': model_params,
+        # Lets incremental training pick up from here
+        'training_rows': training_rows(X, y),
+        'ingest_log': [ingest_entry('full', len(X), len(model.estimators_))]
     }
     
     model_path = models_dir / "match_winner_model.pkl"
     joblib.dump(model_data, model_path)
     
+    # Memory-mappable copy of the tree arrays, shared by all workers
+    mmap_path = save_mmap_artifact(model_data, model_path)
+    
     print(f"\nModel saved to: {model_path}")
+    print(f"Memory-mapped artifact saved to: {mmap_path}")
     print(f"Model training completed successfully!")
     
     return model, encoders, accuracy
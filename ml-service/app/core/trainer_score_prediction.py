@@ -11,17 +11,32 @@ import os
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.core.data_loader import load_all_data
-from app.core.features_score_prediction import build_training_data
+from app.core.model_artifacts import save_mmap_artifact
+from app.core.incremental_training import training_rows, ingest_entry
+from app.core.feature_cache import load_training_data
 
-def train_score_prediction_model():
-    """Train and save the score prediction model"""
+# RandomForest hyper-parameters of the shipped model
+MODEL_PARAMS = {
+    'n_estimators': 100,
+    'max_depth': 15,
+    'min_samples_split': 5,
+    'min_samples_leaf': 2,
+    'random_state': 42,
+    'n_jobs': -1,
+}
+
+def train_score_prediction_model(params=None):
+    """
+    Train and save the score prediction model
     
-    print("Loading data...")
-    matches_df, deliveries_df = load_all_data()
+    Args:
+        params: RandomForest hyper-parameters overriding MODEL_PARAMS, e.g. the
+            best candidate of app.core.hyperparameter_search
+    """
+    model_params = {**MODEL_PARAMS, **(params or {})}
     
     print("Building training features...")
-    X, y, encoders = build_training_data(deliveries_df, matches_df)
+    X, y, encoders = load_training_data("score_prediction")
     
     if len(X) == 0:
         raise ValueError("No training data available")
@@ -35,15 +50,8 @@ def train_score_prediction_model():
     print(f"Test set: {X_test.shape[0]} samples")
     
     # Train model
-    print("Training RandomForest regression model...")
-    model = RandomForestRegressor(
-        n_estimators=100,
-        max_depth=15,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        random_state=42,
-        n_jobs=-1
-    )
+    print(f"Training RandomForest regression model with {model_params}...")
+    model = RandomForestRegressor(**model_params)
     
     model.fit(X_train, y_train)
     
@@ -88,13 +96,21 @@ def train_score_prediction_model():
         'mae': mae,
         'rmse': rmse,
         'r2_score': r2,
-        'feature_importance': importance_df.to_dict('records')
+        'feature_importance': importance_df.to_dict('records'),
+        'model_params': model_params,
+        # Lets incremental training pick up from here
+        'training_rows': training_rows(X, y),
+        'ingest_log': [ingest_entry('full', len(X), len(model.estimators_))]
     }
     
     model_path = models_dir / "score_prediction_model.pkl"
     joblib.dump(model_data, model_path)
     
+    # Memory-mappable copy of the tree arrays, shared by all workers
+    mmap_path = save_mmap_artifact(model_data, model_path)
+    
     print(f"\nModel saved to: {model_path}")
+    print(f"Memory-mapped artifact saved to: {mmap_path}")
     print(f"Model training completed successfully!")
     
     return model, encoders, mae
@@ -0,0 +1,193 @@
+"""
+Project-wide interned vocabulary for team, venue and player names.
+
+Every name is mapped once to a stable int32 id within its domain. Ids are
+append-only: a new name gets the next free id and existing ids never change,
+so codes written to the data cache, feature builds or indexes stay valid as
+data is added. All team columns share one domain, including the franchise
+aliases (``team1_orig``, ``team1_hist``, ...), so comparing e.g. ``winner``
+with ``team1`` is an integer comparison.
+
+The vocabulary is persisted as ``data/cache/vocabulary.json`` next to the
+columnar data cache, which stores these columns as vocabulary codes.
+Missing values are encoded as ``MISSING`` (-1).
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.core.data_loader import get_data_path
+
+VOCABULARY_FILE = "vocabulary.json"
+VOCABULARY_VERSION = 1
+MISSING = -1
+
+DOMAINS = ("team", "venue", "player")
+
+COLUMN_DOMAINS = {
+    # matches
+    'team1': "team",
+    'team2': "team",
+    'toss_winner': "team",
+    'winner': "team",
+    'team1_orig': "team",
+    'team2_orig': "team",
+    'winner_orig': "team",
+    'team1_hist': "team",
+    'team2_hist': "team",
+    'winner_hist': "team",
+    'venue': "venue",
+    'player_of_match': "player",
+    # deliveries
+    'batting_team': "team",
+    'bowling_team': "team",
+    'batsman': "player",
+    'non_striker': "player",
+    'bowler': "player",
+    'player_dismissed': "player",
+    'fielder': "player",
+}
+
+
+def domain_of(column):
+    """Vocabulary domain of a column name, or None for other columns"""
+    return COLUMN_DOMAINS.get(column)
+
+
+class Vocabulary:
+    """
+    Append-only name <-> int32 id mapping per domain.
+
+    Args:
+        names: Optional dictionary of domain -> list of names (id = position)
+    """
+
+    def __init__(self, names=None):
+        names = names or {}
+        self._lock = threading.Lock()
+        self._names = {domain: [str(n) for n in names.get(domain, [])] for domain in DOMAINS}
+        self._ids = {domain: {n: i for i, n in enumerate(self._names[domain])} for domain in DOMAINS}
+        self._name_arrays = {}
+        self.dirty = False
+
+    def size(self, domain):
+        return len(self._names[domain])
+
+    def names(self, domain):
+        """Names of a domain in id order"""
+        return tuple(self._names[domain])
+
+    def lookup(self, domain, name):
+        """Id of a single name, MISSING if it is not in the vocabulary"""
+        if name is None or (isinstance(name, float) and name != name):
+            return MISSING
+        return self._ids[domain].get(str(name), MISSING)
+
+    def _intern(self, domain, name):
+        with self._lock:
+            ids = self._ids[domain]
+            code = ids.get(name)
+            if code is None:
+                code = len(self._names[domain])
+                self._names[domain].append(name)
+                ids[name] = code
+                self.dirty = True
+            return code
+
+    def encode(self, domain, values):
+        """
+        int32 ids for a column of names, interning unseen names.
+
+        Each distinct value is looked up once (via ``pd.factorize``), so the
+        cost is one dictionary lookup per distinct name plus a vectorized take.
+        """
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        ids = self._ids[domain]
+        table = np.empty(len(uniques) + 1, dtype=np.int32)
+        for i, name in enumerate(uniques):
+            name = str(name)
+            code = ids.get(name)
+            table[i] = code if code is not None else self._intern(domain, name)
+        # Sentinel -1 from factorize indexes the trailing MISSING
+        table[-1] = MISSING
+        return table[codes]
+
+    def decode(self, domain, codes):
+        """Object array of names for ``codes`` (NaN for MISSING)"""
+        names = self._name_arrays.get(domain)
+        if names is None or len(names) != self.size(domain) + 1:
+            names = np.array(list(self._names[domain]) + [np.nan], dtype=object)
+            self._name_arrays[domain] = names
+        return names.take(codes)
+
+    def digest(self, domain, size=None):
+        """Hash of the first ``size`` names of a domain (default: all)"""
+        names = self._names[domain][:size]
+        return hashlib.sha256("\n".join(names).encode()).hexdigest()[:16]
+
+    def to_dict(self):
+        return {
+            "version": VOCABULARY_VERSION,
+            "domains": {domain: list(self._names[domain]) for domain in DOMAINS},
+        }
+
+    def save(self, path):
+        """Write the vocabulary atomically"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=path.parent)
+        # mkstemp creates 0600 files; workers may run as another user
+        os.chmod(tmp_name, 0o644)
+        try:
+            with os.fdopen(fd, "w") as fh:
+                json.dump(self.to_dict(), fh)
+            os.replace(tmp_name, path)
+        except Exception:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        """Vocabulary from ``path``; an empty one if missing or unreadable"""
+        try:
+            with open(path) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return cls()
+        if data.get("version") != VOCABULARY_VERSION:
+            return cls()
+        return cls(data.get("domains", {}))
+
+
+def get_vocabulary_path(data_path=None):
+    return Path(data_path or get_data_path()) / "cache" / VOCABULARY_FILE
+
+_vocabularies = {}
+_vocabularies_lock = threading.Lock()
+
+def get_vocabulary(data_path=None):
+    """Process-wide vocabulary of a data directory (loaded once)"""
+    path = get_vocabulary_path(data_path).resolve()
+    vocabulary = _vocabularies.get(path)
+    if vocabulary is None:
+        with _vocabularies_lock:
+            vocabulary = _vocabularies.get(path)
+            if vocabulary is None:
+                vocabulary = Vocabulary.load(path)
+                _vocabularies[path] = vocabulary
+    return vocabulary
+
+def save_vocabulary(data_path=None):
+    """Persist the vocabulary of a data directory if names were added"""
+    vocabulary = get_vocabulary(data_path)
+    if vocabulary.dirty:
+        vocabulary.save(get_vocabulary_path(data_path))
+    return vocabulary
@@ -0,0 +1,155 @@
+"""
+Model warm-up and readiness tracking.
+
+At startup the service loads both model artifacts, compiles their encoders
+and runs one dummy inference each, so the first real request does not pay
+the unpickle cost. The live-prediction data (data store, chase table and
+neighbour index) is warmed too, but as optional components: the live
+endpoint falls back to heuristics without them.
+
+Warm-up runs in a background thread so liveness checks keep answering; the
+readiness endpoint reports not-ready until it has finished.
+
+Set ML_WARMUP=0 to skip warm-up (the service is then ready immediately and
+models load lazily on first use).
+"""
+import os
+import threading
+import time
+
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+
+
+class WarmupState:
+    """Progress of the startup warm-up, shared with the readiness endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.status = PENDING
+        self.components = {}
+        self.started_at = None
+        self.finished_at = None
+
+    def set_component(self, name, status, seconds=None, error=None):
+        entry = {"status": status}
+        if seconds is not None:
+            entry["seconds"] = round(seconds, 3)
+        if error is not None:
+            entry["error"] = error
+        with self._lock:
+            self.components[name] = entry
+
+    @property
+    def ready(self):
+        return self.status == READY
+
+    def snapshot(self):
+        with self._lock:
+            duration = None
+            if self.started_at is not None and self.finished_at is not None:
+                duration = round(self.finished_at - self.started_at, 3)
+            return {
+                "status": self.status,
+                "components": dict(self.components),
+                "warmup_seconds": duration,
+            }
+
+
+_state = WarmupState()
+
+def get_warmup_state():
+    """Get the process-wide warm-up state"""
+    return _state
+
+
+def _warm_match_winner():
+    from app.core.predictor_match_winner import get_predictor
+    predictor = get_predictor()
+    encoders = predictor.encoders
+    team = encoders['team1'].classes_[0] if 'team1' in encoders else 'Unknown'
+    dummy = {
+        "team1": team,
+        "team2": team,
+        "venue": encoders['venue'].classes_[0] if 'venue' in encoders else 'Unknown',
+        "tossWinner": team,
+        "tossDecision": "bat",
+        "season": 2019,
+    }
+    # Call the model directly so the dummy row stays out of the result cache
+    predictor.estimator.predict_proba(predictor.transformer.transform_one(dummy))
+
+def _warm_score_prediction():
+    from app.core.predictor_score_prediction import get_predictor
+    predictor = get_predictor()
+    encoders = predictor.encoders
+    team = encoders['batting_team'].classes_[0] if 'batting_team' in encoders else 'Unknown'
+    dummy = {
+        "battingTeam": team,
+        "bowlingTeam": team,
+        "venue": encoders['venue'].classes_[0] if 'venue' in encoders else 'Unknown',
+        "season": 2019,
+        "currentRuns": 60,
+        "wickets": 2,
+        "overs": 8.0,
+    }
+    predictor.estimator.predict(predictor.transformer.transform_one(dummy))
+
+def _warm_live_data():
+    from app.core.data_loader import load_all_data
+    from app.core.chase_table import get_chase_table
+    from app.core.chase_neighbours import get_neighbour_index
+    from app.core.match_context import get_match_context_index
+    load_all_data()
+    get_chase_table()
+    get_neighbour_index()
+    get_match_context_index()
+
+def _warm_phase_cube():
+    from app.core.phase_cube import get_phase_cube
+    get_phase_cube()
+
+# (name, function, required for readiness)
+WARMUP_STEPS = [
+    ("match_winner_model", _warm_match_winner, True),
+    ("score_prediction_model", _warm_score_prediction, True),
+    ("live_data", _warm_live_data, False),
+    ("phase_cube", _warm_phase_cube, False),
+]
+
+
+def run_warmup(state=None):
+    """Run every warm-up step and record the outcome in ``state``"""
+    state = state or _state
+    state.status = RUNNING
+    state.started_at = time.monotonic()
+    failed = False
+
+    for name, step, required in WARMUP_STEPS:
+        start = time.perf_counter()
+        try:
+            step()
+            state.set_component(name, READY, time.perf_counter() - start)
+        except FileNotFoundError as e:
+            # Untrained model / missing data: endpoints already answer 503 or
+            # fall back to heuristics, so this does not block readiness
+            state.set_component(name, "not_available", time.perf_counter() - start, str(e))
+        except Exception as e:
+            state.set_component(name, FAILED, time.perf_counter() - start, str(e))
+            failed = failed or required
+
+    state.finished_at = time.monotonic()
+    state.status = FAILED if failed else READY
+    print(f"Warm-up finished: {state.status} in {state.finished_at - state.started_at:.2f}s")
+    return state
+
+def start_warmup():
+    """Start warm-up in a background thread (or mark ready if disabled)"""
+    if os.environ.get("ML_WARMUP", "1").lower() in ("0", "false", "no"):
+        _state.status = READY
+        return None
+    thread = threading.Thread(target=run_warmup, name="ml-warmup", daemon=True)
+    thread.start()
+    return thread
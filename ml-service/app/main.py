@@ -1,17 +1,52 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from app.core.warmup import start_warmup
+from app.core.executor import shutdown_executor
+from app.core.live_sessions import start_session_sweeper
+from app.core.metrics import record_request
 from app.routes.health import router as health_router
 from app.routes.predict import router as predict_router
 from app.routes.predict_live import router as predict_live_router
+from app.routes.live_sessions import router as live_sessions_router
+from app.routes.analytics import router as analytics_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm the models in the background; /ml/ready reports progress
+    start_warmup()
+    sweeper = start_session_sweeper()
+    yield
+    sweeper.cancel()
+    shutdown_executor()
 
 app = FastAPI(
     title="IPL Analytics ML Service", 
     version="1.0.0",
-    description="Machine Learning service for IPL match predictions and score forecasting"
+    description="Machine Learning service for IPL match predictions and score forecasting",
+    lifespan=lifespan
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to bound label cardinality
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        record_request(endpoint, request.method, status, time.perf_counter() - start)
+
 app.include_router(health_router, prefix="/ml")
 app.include_router(predict_router, prefix="/ml/predict")
 app.include_router(predict_live_router, prefix="/ml/predict")
+app.include_router(live_sessions_router, prefix="/ml/predict")
+app.include_router(analytics_router, prefix="/ml/analytics")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+
+from app.core.phase_cube import phase_analysis
+from app.core.executor import run_blocking
+from app.routes.errors import EXECUTOR_ERRORS, executor_error
+
+router = APIRouter()
+
+@router.get("/phase")
+async def phase_analysis_endpoint(
+    team: Optional[str] = Query(None, description="Team name"),
+    player: Optional[str] = Query(None, description="Player name"),
+    season: Optional[int] = Query(None, description="Season year (default: all seasons)")
+):
+    """
+    Powerplay / middle / death breakdown for a team, player, team + player
+    or the whole league, from the precomputed phase cube. Same response as
+    the backend's /api/analytics/phase.
+    """
+    try:
+        return await run_blocking(phase_analysis, team, player, season)
+    except EXECUTOR_ERRORS as e:
+        raise executor_error(e, timeout_error="Phase analysis timed out")
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=f"Data not available: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -0,0 +1,30 @@
+"""
+HTTP errors shared by the routes that run work on the bounded worker pool.
+"""
+import asyncio
+
+from fastapi import HTTPException
+
+from app.core.executor import ExecutorOverloaded
+
+# Exceptions raised by run_blocking itself rather than by the work it ran
+EXECUTOR_ERRORS = (ExecutorOverloaded, asyncio.TimeoutError)
+
+
+def executor_error(e, structured=False, timeout_error="Prediction timed out"):
+    """
+    HTTPException for a request the worker pool could not serve: 503 when it
+    is overloaded, 504 when the request timed out.
+
+    ``structured`` gives the {"success", "error", "message"} detail of the
+    /ml/predict routes instead of a plain string.
+    """
+    if isinstance(e, ExecutorOverloaded):
+        status, error, message = 503, "Service busy", str(e)
+    else:
+        status, error, message = 504, timeout_error, "The prediction did not finish within the request timeout."
+    if structured:
+        return HTTPException(status_code=status, detail={"success": False, "error": error, "message": message})
+    if status == 503:
+        return HTTPException(status_code=status, detail=f"{error}: {message}")
+    return HTTPException(status_code=status, detail=error)
@@ -1,7 +1,28 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.core.warmup import get_warmup_state
+from app.core.metrics import render_metrics
 
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
     return {"status": "ml-ok"}
+
+@router.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until model warm-up has finished successfully"""
+    state = get_warmup_state()
+    return JSONResponse(
+        status_code=200 if state.ready else 503,
+        content=state.snapshot()
+    )
+
+@router.get("/metrics")
+async def metrics():
+    """Request, stage, cache and model-load metrics in Prometheus text format"""
+    return PlainTextResponse(
+        render_metrics(),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,197 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, Literal
+import asyncio
+import json
+
+from app.core.live_sessions import (
+    get_session_manager,
+    predict_session,
+    SessionNotFound,
+    SessionLimitReached,
+    InvalidDelivery,
+)
+from app.core.predictor_live import get_match_context
+from app.core.executor import run_blocking
+from app.routes.errors import EXECUTOR_ERRORS, executor_error
+
+router = APIRouter()
+
+KEEPALIVE_SECONDS = 15.0
+
+# Request models
+class LiveSessionRequest(BaseModel):
+    matchId: int = Field(..., description="Match ID")
+    inning: int = Field(1, ge=1, le=2, description="Inning to start in (1 or 2)")
+    target: Optional[int] = Field(None, ge=0, description="First innings total (defaults to the recorded one when starting in inning 2)")
+    battingTeam: Optional[str] = Field(None, description="Defaults to team1 of the match")
+    bowlingTeam: Optional[str] = Field(None, description="Defaults to team2 of the match")
+    venue: Optional[str] = None
+    season: Optional[int] = None
+
+class DeliveryRequest(BaseModel):
+    runs: int = Field(0, ge=0, le=12, description="Total runs off the delivery, extras included")
+    extras: Optional[Literal["wide", "noball", "bye", "legbye", "penalty"]] = None
+    wicket: bool = False
+
+class InningsBreakRequest(BaseModel):
+    target: Optional[int] = Field(None, ge=0, description="Defaults to the first innings runs")
+
+# Response model
+class LiveSessionResponse(BaseModel):
+    sessionId: str
+    matchId: int
+    inning: int
+    runs: int
+    wickets: int
+    overs: float
+    legal_balls: int
+    deliveries: int
+    target: Optional[int] = None
+    run_rate: float
+    complete: bool
+    projected_score: Optional[int] = None     # For inning 1
+    required_runs: Optional[int] = None       # For inning 2
+    required_run_rate: Optional[float] = None  # For inning 2
+    win_prob: Optional[float] = None          # For inning 2
+    notes: str
+
+
+def _http_error(e):
+    if isinstance(e, SessionNotFound):
+        return HTTPException(status_code=404, detail=str(e))
+    if isinstance(e, InvalidDelivery):
+        return HTTPException(status_code=400, detail=str(e))
+    if isinstance(e, SessionLimitReached):
+        return HTTPException(status_code=503, detail=f"Service busy: {str(e)}")
+    if isinstance(e, EXECUTOR_ERRORS):
+        return executor_error(e)
+    return HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+async def _predict_and_publish(session):
+    prediction = await predict_session(session)
+    # Concurrent deliveries can finish out of order; keep the latest state
+    last = session.last_prediction
+    if last is None or (prediction["inning"], prediction["deliveries"]) >= (last["inning"], last["deliveries"]):
+        session.last_prediction = prediction
+    session.publish(prediction)
+    return prediction
+
+@router.post("/live/sessions", response_model=LiveSessionResponse)
+async def open_live_session(request: LiveSessionRequest):
+    """
+    Open a ball-by-ball session for a match.
+
+    Missing team/venue/season fields (and the target of a second innings
+    session) are filled from the match data; without them the first innings
+    projection uses the run-rate heuristic.
+    """
+    try:
+        context = {
+            key: value for key, value in {
+                "battingTeam": request.battingTeam,
+                "bowlingTeam": request.bowlingTeam,
+                "venue": request.venue,
+                "season": request.season,
+            }.items() if value is not None
+        }
+        target = request.target
+        if len(context) < 4 or (request.inning == 2 and target is None):
+            try:
+                known = await run_blocking(get_match_context, request.matchId) or {}
+            except (FileNotFoundError, KeyError):
+                known = {}
+            known_target = known.pop("target", None)
+            context = {**known, **context}
+            if target is None and request.inning == 2:
+                target = known_target
+
+        session = get_session_manager().open(
+            request.matchId, context, inning=request.inning, target=target
+        )
+        return await _predict_and_publish(session)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise _http_error(e)
+
+@router.get("/live/sessions")
+async def live_session_stats():
+    """Open session count and lifetime counters of this worker"""
+    return get_session_manager().stats()
+
+@router.get("/live/sessions/{session_id}", response_model=LiveSessionResponse)
+async def get_live_session(session_id: str):
+    """Latest prediction of a session"""
+    try:
+        session = get_session_manager().get(session_id)
+        return session.last_prediction or await _predict_and_publish(session)
+    except Exception as e:
+        raise _http_error(e)
+
+@router.post("/live/sessions/{session_id}/deliveries", response_model=LiveSessionResponse)
+async def add_live_delivery(session_id: str, request: DeliveryRequest):
+    """Apply one delivery and return (and publish) the updated prediction"""
+    try:
+        session = get_session_manager().add_delivery(
+            session_id, request.runs, extras=request.extras, wicket=request.wicket
+        )
+        return await _predict_and_publish(session)
+    except Exception as e:
+        raise _http_error(e)
+
+@router.post("/live/sessions/{session_id}/innings", response_model=LiveSessionResponse)
+async def start_live_chase(session_id: str, request: InningsBreakRequest):
+    """Innings break: switch the session to the chase"""
+    try:
+        session = get_session_manager().get(session_id)
+        session.start_chase(request.target)
+        return await _predict_and_publish(session)
+    except Exception as e:
+        raise _http_error(e)
+
+@router.delete("/live/sessions/{session_id}")
+async def close_live_session(session_id: str):
+    try:
+        get_session_manager().close(session_id)
+        return {"ok": True, "sessionId": session_id}
+    except Exception as e:
+        raise _http_error(e)
+
+@router.get("/live/sessions/{session_id}/events")
+async def live_session_events(session_id: str, request: Request):
+    """
+    Server-sent events: the current prediction, then one ``prediction``
+    event per delivery until the session is closed or evicted.
+    """
+    try:
+        session = get_session_manager().get(session_id)
+    except Exception as e:
+        raise _http_error(e)
+    queue = session.subscribe()
+
+    async def stream():
+        try:
+            if session.last_prediction is not None:
+                yield f"event: prediction\ndata: {json.dumps(session.last_prediction)}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    yield "event: closed\ndata: {}\n\n"
+                    break
+                yield f"event: prediction\ndata: {json.dumps(message)}\n\n"
+        finally:
+            session.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
@@ -1,17 +1,22 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ValidationError
+from typing import Optional, List, Dict, Any
 import sys
 import os
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.core.predictor_match_winner import predict_match_winner
-from app.core.predictor_score_prediction import predict_score
+from app.core.predictor_match_winner import predict_match_winner_many
+from app.core.predictor_score_prediction import predict_score_projection
+from app.core.executor import run_blocking
+from app.core.micro_batcher import predict_match_winner_batched, predict_score_batched
+from app.routes.errors import EXECUTOR_ERRORS, executor_error
 
 router = APIRouter()
 
+MAX_BATCH_SIZE = 1000
+
 # Request models
 class MatchWinnerRequest(BaseModel):
     team1: str
@@ -21,6 +26,10 @@ class MatchWinnerRequest(BaseModel):
     tossDecision: str
     season: int
 
+class MatchWinnerBatchRequest(BaseModel):
+    # Items are validated one by one so a bad fixture doesn't fail the batch
+    fixtures: List[Dict[str, Any]]
+
 class ScorePredictionRequest(BaseModel):
     battingTeam: str
     bowlingTeam: str
@@ -30,6 +39,9 @@ class ScorePredictionRequest(BaseModel):
     wickets: int = 0
     overs: float = 0.0
 
+class ScoreProjectionRequest(ScorePredictionRequest):
+    mode: str = "curve"  # "curve" (every over to 20) or "grid" (20 overs x 10 wickets)
+
 # Response models
 class MatchWinnerResponse(BaseModel):
     team1_win_prob: float
@@ -38,6 +50,21 @@ class MatchWinnerResponse(BaseModel):
     confidence: float
     success: bool = True
 
+class MatchWinnerBatchItem(BaseModel):
+    index: int
+    success: bool
+    team1_win_prob: Optional[float] = None
+    team2_win_prob: Optional[float] = None
+    prediction: Optional[str] = None
+    confidence: Optional[float] = None
+    error: Optional[str] = None
+
+class MatchWinnerBatchResponse(BaseModel):
+    results: List[MatchWinnerBatchItem]
+    count: int
+    failed: int
+    success: bool = True
+
 class ScorePredictionResponse(BaseModel):
     predicted_score: float
     current_runs: int
@@ -48,6 +75,17 @@ class ScorePredictionResponse(BaseModel):
     overs_remaining: float
     success: bool = True
 
+class ScoreProjectionPoint(BaseModel):
+    overs: float
+    wickets: int
+    predicted_score: float
+
+class ScoreProjectionResponse(BaseModel):
+    mode: str
+    points: List[ScoreProjectionPoint]
+    count: int
+    success: bool = True
+
 class ErrorResponse(BaseModel):
     success: bool = False
     error: str
@@ -77,10 +115,75 @@ async def predict_match_winner_endpoint(request: MatchWinnerRequest):
         }
         
         # Get prediction
-        result = predict_match_winner(input_dict)
+        result = await predict_match_winner_batched(input_dict)
         
         return MatchWinnerResponse(**result)
         
+    except EXECUTOR_ERRORS as e:
+        raise executor_error(e, structured=True)
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "success": False,
+                "error": "Model not available",
+                "message": "Match winner prediction model not found. Please train the model first."
+            }
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "error": "Prediction failed",
+                "message": str(e)
+            }
+        )
+
+@router.post("/match-winner/batch", response_model=MatchWinnerBatchResponse)
+async def predict_match_winner_batch_endpoint(request: MatchWinnerBatchRequest):
+    """
+    Predict the winner of many fixtures in one call
+    
+    - **fixtures**: List of objects with the same fields as /match-winner
+    
+    All valid fixtures are scored with a single model call. Fixtures that
+    fail validation are reported per item and do not fail the batch.
+    """
+    if len(request.fixtures) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "error": "Invalid input",
+                "message": f"At most {MAX_BATCH_SIZE} fixtures per batch"
+            }
+        )
+    
+    try:
+        results = [None] * len(request.fixtures)
+        valid_positions = []
+        input_dicts = []
+        for i, fixture in enumerate(request.fixtures):
+            try:
+                item = MatchWinnerRequest(**fixture)
+            except ValidationError as e:
+                fields = ", ".join(str(err["loc"][0]) for err in e.errors() if err["loc"])
+                results[i] = {"success": False, "error": f"Invalid fixture fields: {fields}"}
+                continue
+            valid_positions.append(i)
+            input_dicts.append(item.model_dump())
+        
+        batch_results = await run_blocking(predict_match_winner_many, input_dicts)
+        for i, result in zip(valid_positions, batch_results):
+            results[i] = result
+        
+        items = [MatchWinnerBatchItem(index=i, **result) for i, result in enumerate(results)]
+        failed = sum(1 for item in items if not item.success)
+        return MatchWinnerBatchResponse(results=items, count=len(items), failed=failed)
+        
+    except EXECUTOR_ERRORS as e:
+        raise executor_error(e, structured=True)
     except FileNotFoundError as e:
         raise HTTPException(
             status_code=503,
@@ -100,6 +203,29 @@ async def predict_match_winner_endpoint(request: MatchWinnerRequest):
             }
         )
 
+def _score_input_dict(request):
+    """Validate a score request and convert it to the predictor's input dictionary"""
+    # Validate input ranges
+    if request.wickets < 0 or request.wickets > 10:
+        raise ValueError("Wickets must be between 0 and 10")
+    
+    if request.overs < 0 or request.overs > 20:
+        raise ValueError("Overs must be between 0 and 20")
+    
+    if request.currentRuns < 0:
+        raise ValueError("Current runs cannot be negative")
+    
+    # Convert request to dictionary
+    return {
+        "battingTeam": request.battingTeam,
+        "bowlingTeam": request.bowlingTeam,
+        "venue": request.venue,
+        "season": request.season,
+        "currentRuns": request.currentRuns,
+        "wickets": request.wickets,
+        "overs": request.overs
+    }
+
 @router.post("/score", response_model=ScorePredictionResponse)
 async def predict_score_endpoint(request: ScorePredictionRequest):
     """
@@ -114,32 +240,63 @@ async def predict_score_endpoint(request: ScorePredictionRequest):
     - **overs**: Current overs completed (default: 0.0)
     """
     try:
-        # Validate input ranges
-        if request.wickets < 0 or request.wickets > 10:
-            raise ValueError("Wickets must be between 0 and 10")
-        
-        if request.overs < 0 or request.overs > 20:
-            raise ValueError("Overs must be between 0 and 20")
-        
-        if request.currentRuns < 0:
-            raise ValueError("Current runs cannot be negative")
-        
-        # Convert request to dictionary
-        input_dict = {
-            "battingTeam": request.battingTeam,
-            "bowlingTeam": request.bowlingTeam,
-            "venue": request.venue,
-            "season": request.season,
-            "currentRuns": request.currentRuns,
-            "wickets": request.wickets,
-            "overs": request.overs
-        }
+        input_dict = _score_input_dict(request)
         
         # Get prediction
-        result = predict_score(input_dict)
+        result = await predict_score_batched(input_dict)
         
         return ScorePredictionResponse(**result)
         
+    except EXECUTOR_ERRORS as e:
+        raise executor_error(e, structured=True)
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "success": False,
+                "error": "Model not available",
+                "message": "Score prediction model not found. Please train the model first."
+            }
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "error": "Invalid input",
+                "message": str(e)
+            }
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "error": "Prediction failed",
+                "message": str(e)
+            }
+        )
+
+@router.post("/score/projection", response_model=ScoreProjectionResponse)
+async def predict_score_projection_endpoint(request: ScoreProjectionRequest):
+    """
+    Project the final first innings score over a grid of match states
+    
+    Takes the same fields as /score plus:
+    
+    - **mode**: "curve" for the current state and every whole over up to 20
+      at the current wickets, or "grid" for every over 1-20 x wickets 0-9
+    
+    The whole grid is evaluated with one batched model call.
+    """
+    try:
+        input_dict = _score_input_dict(request)
+        points = await run_blocking(predict_score_projection, input_dict, request.mode)
+        
+        return ScoreProjectionResponse(mode=request.mode, points=points, count=len(points))
+        
+    except EXECUTOR_ERRORS as e:
+        raise executor_error(e, structured=True)
     except FileNotFoundError as e:
         raise HTTPException(
             status_code=503,
@@ -168,6 +325,28 @@ async def predict_score_endpoint(request: ScorePredictionRequest):
             }
         )
 
+@router.get("/cache")
+async def prediction_cache_stats():
+    """Hit/miss counters of the prediction result caches"""
+    from app.core.predictor_match_winner import get_cache_stats as get_match_cache_stats
+    from app.core.predictor_score_prediction import get_cache_stats as get_score_cache_stats
+    
+    return {
+        "match_winner": get_match_cache_stats(),
+        "score_prediction": get_score_cache_stats()
+    }
+
+@router.get("/executor")
+async def executor_stats():
+    """Worker pool usage and micro-batching statistics"""
+    from app.core.executor import get_executor
+    from app.core.micro_batcher import get_batcher_stats
+
+    return {
+        "pool": get_executor().stats(),
+        "batching": get_batcher_stats()
+    }
+
 @router.get("/status")
 async def prediction_status():
     """Check the status of prediction models"""
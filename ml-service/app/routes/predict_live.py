@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List
 import sys
 import os
 
@@ -8,6 +8,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.core.predictor_live import predict_live_match_state
+from app.core.executor import run_blocking
+from app.routes.errors import EXECUTOR_ERRORS, executor_error
 
 router = APIRouter()
 
@@ -19,12 +21,23 @@ class LivePredictionRequest(BaseModel):
     currentRuns: int = Field(..., ge=0, description="Current runs scored")
     wickets: int = Field(..., ge=0, le=10, description="Current wickets fallen")
 
-# Response model
+# Response models
+class SimilarMatch(BaseModel):
+    match_id: int
+    overs_left: float
+    wickets: int
+    runs_needed: int
+    target: int
+    won: bool
+    distance: float
+
 class LivePredictionResponse(BaseModel):
     ok: bool
     type: str  # "inning1" or "inning2"
     predicted_final_score: Optional[int] = None  # For inning 1
     predicted_win_prob: Optional[float] = None   # For inning 2
+    neighbour_win_prob: Optional[float] = None   # For inning 2, nearest historical states
+    similar_matches: Optional[List[SimilarMatch]] = None  # For inning 2
     notes: str
 
 @router.post("/live", response_model=LivePredictionResponse)
@@ -50,7 +63,8 @@ async def predict_live(request: LivePredictionRequest):
             raise HTTPException(status_code=400, detail="Current runs cannot be negative")
         
         # Get prediction
-        result = predict_live_match_state(
+        result = await run_blocking(
+            predict_live_match_state,
             match_id=request.matchId,
             inning=request.inning,
             overs=request.overs,
@@ -65,6 +79,8 @@ async def predict_live(request: LivePredictionRequest):
         
     except HTTPException:
         raise
+    except EXECUTOR_ERRORS as e:
+        raise executor_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
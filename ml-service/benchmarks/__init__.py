@@ -0,0 +1,12 @@
+"""
+Benchmark suite for the ml-service.
+
+Times data loading (cold, warm and hot), training-data construction,
+training, single-row and batched inference, and the live prediction paths.
+Data-dependent cases run at several data scales built from the shipped CSVs.
+Results are written as JSON so two runs can be compared.
+
+Usage (from ml-service/):
+    python -m benchmarks run [--scales 1,4] [--only load.] [--skip-heavy] [--synthetic]
+    python -m benchmarks compare BASELINE.json CANDIDATE.json [--threshold 0.1]
+"""
@@ -0,0 +1,273 @@
+"""
+Benchmark cases.
+
+Each case is registered with ``@case(name, scaled=..., heavy=...)`` and
+prepares a ``Benchmark``: the callable to time, an optional untimed ``setup``
+run before every sample (forces a cold path), and the number of items one
+call handles (for per-item figures of batched cases).
+
+Scaled cases receive a ``ScaleContext`` for one dataset; unscaled cases
+(inference, live request path) run once against the shipped models and data.
+"""
+import shutil
+from collections import namedtuple
+from itertools import cycle
+
+from app.core.data_loader import DataStore
+from app.core.vocabulary import get_vocabulary
+
+Benchmark = namedtuple("Benchmark", ["run", "setup", "items"], defaults=[None, 1])
+Case = namedtuple("Case", ["name", "prepare", "scaled", "heavy"])
+
+CASES = []
+BATCH_SIZE = 256
+
+
+def case(name, scaled=True, heavy=False):
+    """Register a benchmark case"""
+    def register(prepare):
+        CASES.append(Case(name, prepare, scaled, heavy))
+        return prepare
+    return register
+
+
+class ScaleContext:
+    """A scaled dataset and the intermediate results shared by its cases"""
+
+    def __init__(self, scale, data_dir):
+        self.scale = scale
+        self.data_dir = data_dir
+        self._store = None
+        self._training = {}
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = DataStore(self.data_dir)
+        return self._store
+
+    @property
+    def vocabulary(self):
+        return get_vocabulary(self.data_dir)
+
+    @property
+    def matches(self):
+        return self.store.matches
+
+    @property
+    def deliveries(self):
+        return self.store.deliveries
+
+    def training_data(self, model):
+        if model not in self._training:
+            if model == "match_winner":
+                from app.core.features_match_winner import build_training_data
+                self._training[model] = build_training_data(self.matches, vocabulary=self.vocabulary)
+            else:
+                from app.core.features_score_prediction import build_training_data
+                self._training[model] = build_training_data(
+                    self.deliveries, self.matches, vocabulary=self.vocabulary)
+        return self._training[model]
+
+    def rows(self):
+        return {"matches": len(self.matches), "deliveries": len(self.deliveries)}
+
+    def clear_cache(self):
+        shutil.rmtree(self.data_dir / "cache", ignore_errors=True)
+
+
+# Data loading
+
+def _cold_load(name):
+    def prepare(ctx):
+        return Benchmark(
+            run=lambda: getattr(DataStore(ctx.data_dir), name),
+            setup=ctx.clear_cache,
+        )
+    return prepare
+
+def _warm_load(name):
+    def prepare(ctx):
+        # Column cache on disk, nothing in memory
+        getattr(DataStore(ctx.data_dir), name)
+        return Benchmark(run=lambda: getattr(DataStore(ctx.data_dir), name))
+    return prepare
+
+def _hot_load(name):
+    def prepare(ctx):
+        store = DataStore(ctx.data_dir)
+        getattr(store, name)
+        return Benchmark(run=lambda: getattr(store, name))
+    return prepare
+
+for _name in ("matches", "deliveries"):
+    case(f"load.{_name}.cold")(_cold_load(_name))
+    case(f"load.{_name}.warm")(_warm_load(_name))
+    case(f"load.{_name}.hot")(_hot_load(_name))
+
+
+# Training data and training
+
+@case("features.match_winner.training")
+def _match_winner_training_data(ctx):
+    from app.core.features_match_winner import build_training_data
+    matches, vocabulary = ctx.matches, ctx.vocabulary
+    return Benchmark(run=lambda: build_training_data(matches, vocabulary=vocabulary))
+
+@case("features.score_prediction.training")
+def _score_training_data(ctx):
+    from app.core.features_score_prediction import build_training_data
+    matches, deliveries, vocabulary = ctx.matches, ctx.deliveries, ctx.vocabulary
+    return Benchmark(run=lambda: build_training_data(deliveries, matches, vocabulary=vocabulary))
+
+@case("train.match_winner", heavy=True)
+def _train_match_winner(ctx):
+    from sklearn.ensemble import RandomForestClassifier
+    from app.core.trainer_match_winner import MODEL_PARAMS
+    X, y, _ = ctx.training_data("match_winner")
+    return Benchmark(run=lambda: RandomForestClassifier(**MODEL_PARAMS).fit(X, y))
+
+@case("train.score_prediction", heavy=True)
+def _train_score(ctx):
+    from sklearn.ensemble import RandomForestRegressor
+    from app.core.trainer_score_prediction import MODEL_PARAMS
+    X, y, _ = ctx.training_data("score_prediction")
+    return Benchmark(run=lambda: RandomForestRegressor(**MODEL_PARAMS).fit(X, y))
+
+
+# Live lookup structures
+
+@case("live.chase_states")
+def _chase_states(ctx):
+    from app.core.match_states import build_chase_states
+    deliveries = ctx.deliveries
+    return Benchmark(run=lambda: build_chase_states(deliveries))
+
+@case("live.chase_table.build")
+def _chase_table(ctx):
+    from app.core.chase_table import ChaseProbabilityTable
+    deliveries = ctx.deliveries
+    return Benchmark(run=lambda: ChaseProbabilityTable.from_deliveries(deliveries))
+
+@case("live.neighbour_index.build", heavy=True)
+def _neighbour_index(ctx):
+    from app.core.chase_neighbours import ChaseNeighbourIndex
+    deliveries = ctx.deliveries
+    return Benchmark(run=lambda: ChaseNeighbourIndex.from_deliveries(deliveries))
+
+@case("live.match_context.build")
+def _match_context(ctx):
+    from app.core.match_context import MatchContextIndex
+    store = ctx.store
+    return Benchmark(run=lambda: MatchContextIndex.build(store))
+
+
+
+# Analytics
+
+@case("analytics.phase_cube.build")
+def _phase_cube(ctx):
+    from app.core.phase_cube import PhaseCube
+    store = ctx.store
+    return Benchmark(run=lambda: PhaseCube.from_store(store))
+
+@case("analytics.phase_query")
+def _phase_query(ctx):
+    from app.core.phase_cube import PhaseCube, phase_analysis
+    cube = PhaseCube.from_store(ctx.store)
+    queries = cycle([
+        (team, player, season)
+        for team in (None, cube.teams[0])
+        for player in (None, cube.players[0])
+        for season in (None, cube.seasons[-1])
+    ])
+    return Benchmark(run=lambda: phase_analysis(*next(queries), cube=cube))
+
+
+# Inference (shipped models)
+
+def _match_winner_inputs(encoders, n):
+    teams = list(encoders['team1'].classes_)
+    venues = list(encoders['venue'].classes_)
+    inputs = []
+    for i in range(n):
+        team1 = teams[i % len(teams)]
+        team2 = teams[(i * 7 + 1) % len(teams)]
+        inputs.append({
+            "team1": team1,
+            "team2": team2,
+            "venue": venues[i % len(venues)],
+            "tossWinner": team1 if i % 2 else team2,
+            "tossDecision": "bat" if i % 3 else "field",
+            "season": 2008 + i % 12,
+        })
+    return inputs
+
+def _score_inputs(encoders, n):
+    teams = list(encoders['batting_team'].classes_)
+    venues = list(encoders['venue'].classes_)
+    inputs = []
+    for i in range(n):
+        overs = 1.0 + (i % 180) / 10.0
+        inputs.append({
+            "battingTeam": teams[i % len(teams)],
+            "bowlingTeam": teams[(i * 5 + 1) % len(teams)],
+            "venue": venues[i % len(venues)],
+            "season": 2008 + i % 12,
+            "currentRuns": int(overs * 7.5),
+            "wickets": i % 10,
+            "overs": overs,
+        })
+    return inputs
+
+@case("predict.match_winner.single", scaled=False)
+def _predict_match_winner_single(ctx):
+    from app.core.predictor_match_winner import get_predictor
+    predictor = get_predictor()
+    inputs = cycle(_match_winner_inputs(predictor.encoders, BATCH_SIZE))
+    return Benchmark(run=lambda: predictor.predict_match_winner(next(inputs)))
+
+@case("predict.match_winner.batch", scaled=False)
+def _predict_match_winner_batch(ctx):
+    from app.core.predictor_match_winner import get_predictor
+    predictor = get_predictor()
+    inputs = _match_winner_inputs(predictor.encoders, BATCH_SIZE)
+    return Benchmark(run=lambda: predictor.predict_many(inputs), items=BATCH_SIZE)
+
+@case("predict.score_prediction.single", scaled=False)
+def _predict_score_single(ctx):
+    from app.core.predictor_score_prediction import get_predictor
+    predictor = get_predictor()
+    inputs = cycle(_score_inputs(predictor.encoders, BATCH_SIZE))
+    return Benchmark(run=lambda: predictor.predict_score(next(inputs)))
+
+@case("predict.score_prediction.batch", scaled=False)
+def _predict_score_batch(ctx):
+    from app.core.predictor_score_prediction import get_predictor
+    predictor = get_predictor()
+    inputs = _score_inputs(predictor.encoders, BATCH_SIZE)
+    return Benchmark(run=lambda: predictor.predict_many(inputs), items=BATCH_SIZE)
+
+@case("predict.score_prediction.projection_grid", scaled=False)
+def _predict_score_grid(ctx):
+    from app.core.predictor_score_prediction import get_predictor
+    predictor = get_predictor()
+    input_dict = _score_inputs(predictor.encoders, 1)[0]
+    return Benchmark(run=lambda: predictor.predict_projection(input_dict, 'grid'), items=200)
+
+
+# Live request path (shipped data)
+
+def _live_case(inning, overs, current_runs, wickets):
+    def prepare(ctx):
+        from app.core.data_loader import load_matches_data
+        from app.core.predictor_live import predict_live_match_state
+        match_id = int(load_matches_data()['id'].iloc[0])
+        kwargs = dict(match_id=match_id, inning=inning, overs=overs,
+                      current_runs=current_runs, wickets=wickets)
+        predict_live_match_state(**kwargs)  # builds the chase table / index if needed
+        return Benchmark(run=lambda: predict_live_match_state(**kwargs))
+    return prepare
+
+case("live.first_innings", scaled=False)(_live_case(1, 10.0, 85, 2))
+case("live.chase", scaled=False)(_live_case(2, 12.0, 95, 3))
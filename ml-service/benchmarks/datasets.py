@@ -0,0 +1,117 @@
+"""
+Scaled copies of the matches/deliveries datasets.
+
+Scale 1 is the shipped data. Whole multiples replicate every match with its
+id shifted into a new range, so ``match_id`` stays unique; a fractional part
+adds (or, below 1, keeps only) a seeded random sample of matches. Scaled
+datasets are written once per source digest and reused by later runs.
+
+With ``synthetic=True`` the data is simulated instead (see
+benchmarks.synthetic), with ``scale`` times as many matches as the shipped
+matches file.
+"""
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.core.data_loader import get_data_path, file_digest, MATCHES_FILE, DELIVERIES_FILE
+
+
+def get_default_workdir():
+    return Path(__file__).parent / ".data"
+
+def _id_stride(matches_df):
+    """Power of ten above the largest match id"""
+    return 10 ** len(str(int(matches_df['id'].max())))
+
+def scale_frames(matches_df, deliveries_df, scale, seed=0):
+    """Return (matches, deliveries) with roughly ``scale`` times as many matches"""
+    if scale <= 0:
+        raise ValueError("Scale must be positive")
+
+    whole = int(scale)
+    fraction = scale - whole
+    stride = _id_stride(matches_df)
+    ids = matches_df['id'].to_numpy()
+
+    copies = [(copy, ids) for copy in range(whole)]
+    if fraction > 0:
+        rng = np.random.default_rng(seed)
+        sample_size = max(1, int(round(fraction * len(ids))))
+        copies.append((whole, rng.choice(ids, sample_size, replace=False)))
+
+    match_parts, delivery_parts = [], []
+    for copy, selected in copies:
+        offset = copy * stride
+        matches = matches_df[matches_df['id'].isin(selected)].copy()
+        deliveries = deliveries_df[deliveries_df['match_id'].isin(selected)].copy()
+        matches['id'] += offset
+        deliveries['match_id'] += offset
+        match_parts.append(matches)
+        delivery_parts.append(deliveries)
+
+    return (
+        pd.concat(match_parts, ignore_index=True),
+        pd.concat(delivery_parts, ignore_index=True),
+    )
+
+def _count_rows(path):
+    with open(path, "rb") as fh:
+        return max(0, sum(1 for _ in fh) - 1)
+
+def build_synthetic_dataset(scale, workdir=None, source_dir=None, seed=0):
+    """Write (or reuse) a simulated dataset with ``scale`` x the shipped match count"""
+    from benchmarks.synthetic import generate, DEFAULT_MATCHES
+
+    source_dir = Path(source_dir or get_data_path())
+    workdir = Path(workdir or get_default_workdir())
+    matches_path = source_dir / MATCHES_FILE
+    base = _count_rows(matches_path) if matches_path.exists() else DEFAULT_MATCHES
+    n_matches = max(1, int(round(scale * base)))
+    target = workdir / f"synthetic-{n_matches}-s{seed}"
+
+    if (target / MATCHES_FILE).exists() and (target / DELIVERIES_FILE).exists():
+        return target
+
+    tmp = target.with_name(target.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    generate(tmp, n_matches, seed=seed)
+    shutil.rmtree(target, ignore_errors=True)
+    tmp.rename(target)
+    return target
+
+def build_scaled_dataset(scale, workdir=None, source_dir=None, seed=0, synthetic=False):
+    """
+    Write (or reuse) a scaled dataset and return its directory.
+
+    The directory holds files named like the shipped ones, so a
+    ``DataStore(directory)`` loads it exactly as it loads ``data/``.
+    """
+    source_dir = Path(source_dir or get_data_path())
+    if not synthetic and not (source_dir / DELIVERIES_FILE).exists():
+        print(f"{DELIVERIES_FILE} not found in {source_dir}, using synthetic data")
+        synthetic = True
+    if synthetic:
+        return build_synthetic_dataset(scale, workdir, source_dir, seed)
+
+    workdir = Path(workdir or get_default_workdir())
+    source_key = file_digest(source_dir / DELIVERIES_FILE)[:12]
+    target = workdir / f"{source_key}-x{scale:g}"
+
+    if (target / MATCHES_FILE).exists() and (target / DELIVERIES_FILE).exists():
+        return target
+
+    matches_df = pd.read_csv(source_dir / MATCHES_FILE)
+    deliveries_df = pd.read_csv(source_dir / DELIVERIES_FILE)
+    matches, deliveries = scale_frames(matches_df, deliveries_df, scale, seed)
+
+    tmp = target.with_name(target.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    matches.to_csv(tmp / MATCHES_FILE, index=False)
+    deliveries.to_csv(tmp / DELIVERIES_FILE, index=False)
+    shutil.rmtree(target, ignore_errors=True)
+    tmp.rename(target)
+    return target
@@ -0,0 +1,224 @@
+"""
+Benchmark runner and result comparison.
+
+Fast cases are repeated inside each sample until it lasts at least
+``min_time`` seconds (like ``timeit``'s autorange); cases with a setup step
+or a slow call take one call per sample. Reported times are per call.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+RESULTS_FORMAT_VERSION = 1
+DEFAULT_SCALES = "1,4"
+
+
+def _time_sample(bench, number):
+    if bench.setup is not None:
+        bench.setup()
+    start = time.perf_counter()
+    for _ in range(number):
+        bench.run()
+    return (time.perf_counter() - start) / number
+
+def measure(bench, repeat=5, min_time=0.05, max_number=10000, warmup=True):
+    """Per-call timing statistics for a prepared Benchmark"""
+    if warmup:
+        # Untimed first call: lazy model loads, imports, allocator warm-up
+        _time_sample(bench, 1)
+    number = 1
+    first = _time_sample(bench, 1)
+    if bench.setup is None and first < min_time:
+        number = min(max_number, max(1, int(min_time / max(first, 1e-9))))
+
+    samples = [_time_sample(bench, number) for _ in range(repeat)]
+    samples.sort()
+    median = statistics.median(samples)
+    return {
+        "median_s": median,
+        "min_s": samples[0],
+        "mean_s": statistics.fmean(samples),
+        "p95_s": samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+        "samples": len(samples),
+        "number": number,
+        "items": bench.items,
+        "per_item_s": median / bench.items,
+    }
+
+def _environment():
+    import numpy
+    import pandas
+    import sklearn
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=Path(__file__).parent, timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": commit,
+    }
+
+def run_benchmarks(scales, repeat=5, only=None, skip_heavy=False, workdir=None,
+                   synthetic=False, log=print):
+    """Run every selected case and return the results document"""
+    from benchmarks.cases import CASES, ScaleContext
+    from benchmarks.datasets import build_scaled_dataset
+
+    pattern = re.compile(only) if only else None
+    selected = [
+        c for c in CASES
+        if (pattern is None or pattern.search(c.name)) and not (skip_heavy and c.heavy)
+    ]
+    results = []
+
+    def run_case(benchmark_case, ctx, scale, rows):
+        # Trainers and loaders print progress on every call
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                bench = benchmark_case.prepare(ctx)
+                if benchmark_case.heavy:
+                    stats = measure(bench, repeat=1, warmup=False)
+                else:
+                    stats = measure(bench, repeat=repeat)
+                error = None
+            except Exception as e:
+                stats, error = {}, f"{type(e).__name__}: {e}"
+        entry = {"case": benchmark_case.name, "scale": scale, "rows": rows, **stats}
+        if error:
+            entry["error"] = error
+            log(f"  {benchmark_case.name:<42} FAILED {error}")
+        else:
+            log(f"  {benchmark_case.name:<42} {_format_seconds(stats['median_s']):>10}"
+                f"  (x{stats['number']}, {stats['samples']} samples)")
+        results.append(entry)
+
+    scaled_cases = [c for c in selected if c.scaled]
+    for scale in scales if scaled_cases else []:
+        log(f"scale x{scale:g}: preparing dataset")
+        data_dir = build_scaled_dataset(scale, workdir=workdir, synthetic=synthetic)
+        ctx = ScaleContext(scale, data_dir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows = ctx.rows()
+        log(f"scale x{scale:g}: {rows['matches']} matches, {rows['deliveries']} deliveries")
+        for benchmark_case in scaled_cases:
+            run_case(benchmark_case, ctx, scale, rows)
+
+    unscaled_cases = [c for c in selected if not c.scaled]
+    if unscaled_cases:
+        log("shipped models and data")
+        for benchmark_case in unscaled_cases:
+            run_case(benchmark_case, None, None, None)
+
+    return {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": _environment(),
+        "settings": {
+            "scales": scales, "repeat": repeat, "only": only,
+            "skip_heavy": skip_heavy, "synthetic": synthetic,
+        },
+        "results": results,
+    }
+
+def _format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+def compare_results(baseline, candidate, threshold=0.1):
+    """
+    Compare the median per-call times of two result documents.
+
+    Returns a list of (case, scale, baseline_s, candidate_s, ratio, flag)
+    where flag is "slower"/"faster" when the ratio moves beyond
+    ``threshold`` and "" otherwise.
+    """
+    def index(document):
+        return {
+            (r["case"], r["scale"]): r["median_s"]
+            for r in document["results"] if "median_s" in r
+        }
+
+    base, cand = index(baseline), index(candidate)
+    rows = []
+    for key in sorted(base.keys() & cand.keys(), key=lambda k: (k[1] is not None, k[1] or 0, k[0])):
+        ratio = cand[key] / base[key] if base[key] else float("inf")
+        flag = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else ""
+        rows.append((key[0], key[1], base[key], cand[key], ratio, flag))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="ml-service benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the benchmark suite")
+    run.add_argument("--scales", default=DEFAULT_SCALES,
+                     help=f"Comma-separated data scales (default {DEFAULT_SCALES})")
+    run.add_argument("--repeat", type=int, default=5, help="Samples per case")
+    run.add_argument("--only", default=None, help="Regex selecting case names")
+    run.add_argument("--skip-heavy", action="store_true", help="Skip training and index builds")
+    run.add_argument("--output", default=None, help="Results file (default benchmarks/results/<time>.json)")
+    run.add_argument("--workdir", default=None, help="Where scaled datasets are kept")
+    run.add_argument("--synthetic", action="store_true",
+                     help="Use simulated data (benchmarks.synthetic) instead of replicated matches")
+    run.add_argument("--with-cache", action="store_true",
+                     help="Keep the prediction result caches enabled")
+
+    compare = sub.add_parser("compare", help="Compare two result files")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.add_argument("--threshold", type=float, default=0.1,
+                         help="Relative change reported as slower/faster (default 0.1)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        with open(args.candidate) as fh:
+            candidate = json.load(fh)
+        rows = compare_results(baseline, candidate, args.threshold)
+        for name, scale, base_s, cand_s, ratio, flag in rows:
+            scale_label = "-" if scale is None else f"x{scale:g}"
+            print(f"{name:<42} {scale_label:>6} {_format_seconds(base_s):>10} -> "
+                  f"{_format_seconds(cand_s):>10}  {ratio:5.2f}x {flag}")
+        return 1 if any(row[5] == "slower" for row in rows) else 0
+
+    if not args.with_cache:
+        # Repeated inputs would otherwise only measure cache hits; must be
+        # set before the predictor modules create their caches
+        os.environ["PREDICTION_CACHE_SIZE"] = "0"
+
+    scales = [float(s) for s in args.scales.split(",") if s.strip()]
+    document = run_benchmarks(
+        scales, repeat=args.repeat, only=args.only,
+        skip_heavy=args.skip_heavy, workdir=args.workdir, synthetic=args.synthetic,
+    )
+
+    output = Path(args.output) if args.output else (
+        Path(__file__).parent / "results" / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as fh:
+        json.dump(document, fh, indent=2)
+    print(f"Results written to {output}")
+    return 1 if any("error" in r for r in document["results"]) else 0
@@ -0,0 +1,379 @@
+"""
+Synthetic ball-by-ball IPL data for scale testing.
+
+Writes a ``matches_cleaned_original_mode.csv`` and a
+``deliveries_cleaned_original_mode.csv`` with the same columns and value
+formats as the shipped files, so a ``DataStore`` pointed at the output
+directory loads them like the real data.
+
+Matches are simulated one at a time and streamed to both files, so memory
+use does not grow with the number of matches. The simulation is simple but
+keeps the distributions that matter for the features and the live
+predictor:
+
+    * runs per legal ball by phase (powerplay, middle, death overs)
+    * wicket rate by phase, with IPL-like dismissal kinds
+    * wides, no-balls, byes, leg-byes and the rare penalty
+    * a second innings that stops once the target is passed or the side is
+      all out, and a super over (innings 3 and 4, ``is_super_over`` = 1)
+      after a tie
+    * occasional no-result matches without deliveries
+
+Season lineups, venues and the *_orig / *_hist team names follow the real
+league. Seasons after 2019 reuse the 2019 lineup. DL-adjusted matches are
+not simulated (``dl_applied`` is always 0).
+
+Usage (from ml-service/):
+    python -m benchmarks.synthetic --matches 50000 --seasons 12 --seed 7 --out /tmp/ipl-synth
+"""
+import argparse
+import csv
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from app.core.data_loader import MATCHES_FILE, DELIVERIES_FILE
+
+MATCH_COLUMNS = [
+    'id', 'season', 'city', 'date', 'team1', 'team2', 'toss_winner', 'toss_decision',
+    'result', 'dl_applied', 'winner', 'win_by_runs', 'win_by_wickets', 'player_of_match',
+    'venue', 'umpire1', 'umpire2', 'umpire3', 'season_num', 'team1_orig', 'team2_orig',
+    'winner_orig', 'team1_hist', 'team2_hist', 'winner_hist',
+]
+DELIVERY_COLUMNS = [
+    'match_id', 'inning', 'batting_team', 'bowling_team', 'over', 'ball', 'batsman',
+    'non_striker', 'bowler', 'is_super_over', 'wide_runs', 'bye_runs', 'legbye_runs',
+    'noball_runs', 'penalty_runs', 'batsman_runs', 'extra_runs', 'total_runs',
+    'player_dismissed', 'dismissal_kind', 'fielder',
+]
+
+FIRST_SEASON = 2008
+DEFAULT_MATCHES = 756
+
+# Team -> (home city, home venue)
+HOMES = {
+    'Chennai Super Kings': ('Chennai', 'MA Chidambaram Stadium, Chepauk'),
+    'Mumbai Indians': ('Mumbai', 'Wankhede Stadium'),
+    'Kolkata Knight Riders': ('Kolkata', 'Eden Gardens'),
+    'Royal Challengers Bangalore': ('Bangalore', 'M Chinnaswamy Stadium'),
+    'Rajasthan Royals': ('Jaipur', 'Sawai Mansingh Stadium'),
+    'Kings XI Punjab': ('Chandigarh', 'Punjab Cricket Association Stadium, Mohali'),
+    'Delhi Daredevils': ('Delhi', 'Feroz Shah Kotla'),
+    'Delhi Capitals': ('Delhi', 'Feroz Shah Kotla'),
+    'Deccan Chargers': ('Hyderabad', 'Rajiv Gandhi International Stadium, Uppal'),
+    'Sunrisers Hyderabad': ('Hyderabad', 'Rajiv Gandhi International Stadium, Uppal'),
+    'Kochi Tuskers Kerala': ('Kochi', 'Nehru Stadium'),
+    'Pune Warriors': ('Pune', 'Subrata Roy Sahara Stadium'),
+    'Gujarat Lions': ('Rajkot', 'Saurashtra Cricket Association Stadium'),
+    'Rising Pune Supergiant': ('Pune', 'Maharashtra Cricket Association Stadium'),
+    'Rising Pune Supergiants': ('Pune', 'Maharashtra Cricket Association Stadium'),
+}
+NEUTRAL_VENUES = [
+    ('Dubai', 'Dubai International Cricket Stadium'),
+    ('Abu Dhabi', 'Sheikh Zayed Stadium'),
+    ('Durban', 'Kingsmead'),
+    ('Centurion', 'SuperSport Park'),
+]
+
+# Historical franchise names, as in the *_hist columns
+HIST_NAMES = {
+    'Rising Pune Supergiant': 'Rising Pune Supergiants',
+    'Pune Warriors': 'Pune Warriors India',
+}
+
+_CORE = [
+    'Chennai Super Kings', 'Mumbai Indians', 'Kolkata Knight Riders',
+    'Royal Challengers Bangalore', 'Rajasthan Royals', 'Kings XI Punjab',
+]
+SEASON_TEAMS = {
+    2008: _CORE + ['Delhi Daredevils', 'Deccan Chargers'],
+    2009: _CORE + ['Delhi Daredevils', 'Deccan Chargers'],
+    2010: _CORE + ['Delhi Daredevils', 'Deccan Chargers'],
+    2011: _CORE + ['Delhi Daredevils', 'Deccan Chargers', 'Kochi Tuskers Kerala', 'Pune Warriors'],
+    2012: _CORE + ['Delhi Daredevils', 'Deccan Chargers', 'Pune Warriors'],
+    2013: _CORE + ['Delhi Daredevils', 'Sunrisers Hyderabad', 'Pune Warriors'],
+    2014: _CORE + ['Delhi Daredevils', 'Sunrisers Hyderabad'],
+    2015: _CORE + ['Delhi Daredevils', 'Sunrisers Hyderabad'],
+    2016: ['Mumbai Indians', 'Kolkata Knight Riders', 'Royal Challengers Bangalore', 'Kings XI Punjab',
+           'Delhi Daredevils', 'Sunrisers Hyderabad', 'Gujarat Lions', 'Rising Pune Supergiants'],
+    2017: ['Mumbai Indians', 'Kolkata Knight Riders', 'Royal Challengers Bangalore', 'Kings XI Punjab',
+           'Delhi Daredevils', 'Sunrisers Hyderabad', 'Gujarat Lions', 'Rising Pune Supergiant'],
+    2018: _CORE + ['Delhi Daredevils', 'Sunrisers Hyderabad'],
+    2019: _CORE + ['Delhi Capitals', 'Sunrisers Hyderabad'],
+}
+
+# Relative weights of RUN_VALUES off the bat per legal ball, by phase.
+# Roughly the 2008-2019 IPL rates: ~7.5 rpo in the powerplay and middle
+# overs, ~9.5 at the death
+RUN_VALUES = (0, 1, 2, 3, 4, 5, 6)
+RUN_WEIGHTS = {
+    'powerplay': (44.0, 30.0, 5.5, 0.4, 14.5, 0.05, 5.0),
+    'middle': (35.0, 43.0, 7.5, 0.4, 9.0, 0.05, 4.5),
+    'death': (30.0, 38.0, 8.5, 0.3, 13.0, 0.05, 8.5),
+}
+# Chance that a legal ball takes a wicket, by phase
+WICKET_RATE = {'powerplay': 0.040, 'middle': 0.045, 'death': 0.075}
+DISMISSALS = (
+    ('caught', 0.610), ('bowled', 0.170), ('run out', 0.095), ('lbw', 0.060),
+    ('stumped', 0.035), ('caught and bowled', 0.025), ('hit wicket', 0.004),
+    ('retired hurt', 0.001),
+)
+# Per-delivery extras: wide, no-ball, leg-bye, bye, penalty
+WIDE_RATE = 0.033
+NOBALL_RATE = 0.004
+LEGBYE_RATE = 0.016
+BYE_RATE = 0.0025
+PENALTY_RATE = 0.0002
+
+NO_RESULT_RATE = 0.005
+TOSS_FIELD_RATE = 0.61
+HOME_VENUE_RATE = 0.9
+SQUAD_SIZE = 11
+
+
+def _phase(over):
+    if over <= 6:
+        return 'powerplay'
+    if over <= 15:
+        return 'middle'
+    return 'death'
+
+def _cumulative(weights):
+    total, result = 0.0, []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+_RUN_CUM = {phase: _cumulative(weights) for phase, weights in RUN_WEIGHTS.items()}
+_DISMISSAL_KINDS = [kind for kind, _ in DISMISSALS]
+_DISMISSAL_CUM = _cumulative([weight for _, weight in DISMISSALS])
+
+
+def _squad(team):
+    initials = "".join(word[0] for word in team.split())
+    return [f"{initials} Player {i + 1}" for i in range(SQUAD_SIZE)]
+
+
+class _Innings:
+    """Simulates one innings and writes its deliveries"""
+
+    def __init__(self, rng, writer, match_id, inning, batting, bowling, overs, max_wickets,
+                 target=None, super_over=False):
+        self.rng = rng
+        self.writer = writer
+        self.match_id = match_id
+        self.inning = inning
+        self.batting = batting
+        self.bowling = bowling
+        self.overs = overs
+        self.max_wickets = max_wickets
+        self.target = target
+        self.super_over = 1 if super_over else 0
+        self.runs = 0
+        self.wickets = 0
+        self.batter_runs = {}
+
+    def play(self):
+        rng = self.rng
+        batters = _squad(self.batting)
+        # Bowlers come from the tail of the fielding side
+        fielders = _squad(self.bowling)
+        bowlers = fielders[-6:]
+        striker, non_striker, next_in = batters[0], batters[1], 2
+        previous_bowler = None
+
+        for over in range(1, self.overs + 1):
+            bowler = rng.choice([b for b in bowlers if b != previous_bowler])
+            previous_bowler = bowler
+            phase = 'death' if self.super_over else _phase(over)
+            legal = 0
+            ball = 0
+            while legal < 6:
+                ball += 1
+                wide = noball = bye = legbye = penalty = batsman_runs = 0
+                dismissed = kind = fielder = ''
+
+                draw = rng.random()
+                if draw < WIDE_RATE:
+                    wide = 5 if rng.random() < 0.02 else 1
+                elif draw < WIDE_RATE + NOBALL_RATE:
+                    noball = 1
+                    batsman_runs = RUN_VALUES[self._bisect(_RUN_CUM[phase])]
+                else:
+                    legal += 1
+                    draw = rng.random()
+                    if draw < LEGBYE_RATE:
+                        legbye = 4 if rng.random() < 0.12 else 1
+                    elif draw < LEGBYE_RATE + BYE_RATE:
+                        bye = 4 if rng.random() < 0.2 else 1
+                    elif rng.random() < WICKET_RATE[phase]:
+                        kind = _DISMISSAL_KINDS[self._bisect(_DISMISSAL_CUM)]
+                        dismissed = striker
+                        if kind == 'run out':
+                            batsman_runs = 1 if rng.random() < 0.3 else 0
+                            if rng.random() < 0.35:
+                                dismissed = non_striker
+                            fielder = rng.choice(fielders[:-1])
+                        elif kind == 'caught':
+                            fielder = rng.choice(fielders)
+                        elif kind == 'stumped':
+                            fielder = fielders[0]
+                    else:
+                        batsman_runs = RUN_VALUES[self._bisect(_RUN_CUM[phase])]
+                if rng.random() < PENALTY_RATE:
+                    penalty = 5
+
+                extras = wide + noball + bye + legbye + penalty
+                total = batsman_runs + extras
+                self.writer.writerow((
+                    self.match_id, self.inning, self.batting, self.bowling, over, ball,
+                    striker, non_striker, bowler, self.super_over, wide, bye, legbye,
+                    noball, penalty, batsman_runs, extras, total, dismissed, kind, fielder,
+                ))
+                self.runs += total
+                self.batter_runs[striker] = self.batter_runs.get(striker, 0) + batsman_runs
+
+                if (batsman_runs + bye + legbye) % 2 == 1:
+                    striker, non_striker = non_striker, striker
+
+                if dismissed:
+                    if kind != 'retired hurt':
+                        self.wickets += 1
+                    if self.wickets >= self.max_wickets or next_in >= len(batters):
+                        return self
+                    if dismissed == striker:
+                        striker = batters[next_in]
+                    else:
+                        non_striker = batters[next_in]
+                    next_in += 1
+
+                if self.target is not None and self.runs >= self.target:
+                    return self
+
+            striker, non_striker = non_striker, striker
+        return self
+
+    def _bisect(self, cumulative):
+        draw = self.rng.random() * cumulative[-1]
+        for i, bound in enumerate(cumulative):
+            if draw < bound:
+                return i
+        return len(cumulative) - 1
+
+
+def _season_schedule(n_matches, seasons, first_season=FIRST_SEASON):
+    """Yield (season year, match date) for ``n_matches`` spread over ``seasons``"""
+    per_season, remainder = divmod(n_matches, seasons)
+    for s in range(seasons):
+        count = per_season + (1 if s < remainder else 0)
+        year = first_season + s
+        start = date(year, 4, 5)
+        for i in range(count):
+            # About two matches a day over an eight-week window
+            yield year, start + timedelta(days=(i * 56) // max(count, 1))
+
+def generate(out_dir, n_matches, seasons=12, seed=0, first_season=FIRST_SEASON):
+    """
+    Write synthetic matches and deliveries CSVs into ``out_dir``.
+
+    Returns a dict with the number of matches and deliveries written.
+    """
+    if n_matches <= 0 or seasons <= 0:
+        raise ValueError("n_matches and seasons must be positive")
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    umpires = [f"Umpire {i + 1}" for i in range(40)]
+    n_deliveries = 0
+
+    class _CountingWriter:
+        def __init__(self, writer):
+            self.writer = writer
+
+        def writerow(self, row):
+            nonlocal n_deliveries
+            n_deliveries += 1
+            self.writer.writerow(row)
+
+    with open(out_dir / MATCHES_FILE, "w", newline="") as matches_fh, \
+            open(out_dir / DELIVERIES_FILE, "w", newline="") as deliveries_fh:
+        matches_writer = csv.writer(matches_fh)
+        deliveries_writer = _CountingWriter(csv.writer(deliveries_fh))
+        matches_writer.writerow(MATCH_COLUMNS)
+        deliveries_writer.writer.writerow(DELIVERY_COLUMNS)
+
+        for match_id, (year, match_date) in enumerate(
+                _season_schedule(n_matches, seasons, first_season), start=1):
+            teams = SEASON_TEAMS.get(year, SEASON_TEAMS[max(SEASON_TEAMS)])
+            team1, team2 = rng.sample(teams, 2)
+            city, venue = HOMES[team1] if rng.random() < HOME_VENUE_RATE else rng.choice(NEUTRAL_VENUES)
+            toss_winner = rng.choice((team1, team2))
+            toss_decision = 'field' if rng.random() < TOSS_FIELD_RATE else 'bat'
+            toss_loser = team2 if toss_winner == team1 else team1
+            batting_first = toss_winner if toss_decision == 'bat' else toss_loser
+            chasing = toss_loser if batting_first == toss_winner else toss_winner
+
+            result, winner, win_by_runs, win_by_wickets, player_of_match = 'normal', '', 0, 0, ''
+            if rng.random() < NO_RESULT_RATE:
+                result = 'no result'
+            else:
+                first = _Innings(rng, deliveries_writer, match_id, 1, batting_first, chasing,
+                                 20, 10).play()
+                second = _Innings(rng, deliveries_writer, match_id, 2, chasing, batting_first,
+                                  20, 10, target=first.runs + 1).play()
+                if second.runs > first.runs:
+                    winner, win_by_wickets = chasing, 10 - second.wickets
+                elif second.runs < first.runs:
+                    winner, win_by_runs = batting_first, first.runs - second.runs
+                else:
+                    result = 'tie'
+                    winner = _super_over(rng, deliveries_writer, match_id, chasing, batting_first)
+                batter_runs = first.batter_runs if winner == batting_first else second.batter_runs
+                player_of_match = max(batter_runs, key=batter_runs.get) if batter_runs else ''
+
+            ump1, ump2, ump3 = rng.sample(umpires, 3)
+            matches_writer.writerow((
+                match_id, f"IPL-{year}", city, match_date.strftime("%d-%m-%Y"), team1, team2,
+                toss_winner, toss_decision, result, 0, winner, win_by_runs, win_by_wickets,
+                player_of_match, venue, ump1, ump2, ump3 if rng.random() < 0.15 else '', year,
+                team1, team2, winner, HIST_NAMES.get(team1, team1), HIST_NAMES.get(team2, team2),
+                HIST_NAMES.get(winner, winner),
+            ))
+
+    return {"matches": n_matches, "deliveries": n_deliveries}
+
+def _super_over(rng, writer, match_id, first_batting, second_batting):
+    """Play super overs (innings 3 and 4) until a winner emerges"""
+    inning = 3
+    while True:
+        first = _Innings(rng, writer, match_id, inning, first_batting, second_batting,
+                         1, 2, super_over=True).play()
+        second = _Innings(rng, writer, match_id, inning + 1, second_batting, first_batting,
+                          1, 2, target=first.runs + 1, super_over=True).play()
+        if first.runs != second.runs:
+            return first_batting if first.runs > second.runs else second_batting
+        # Tied again: another super over (as under the 2020 rules)
+        inning += 2
+        first_batting, second_batting = second_batting, first_batting
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic IPL matches and deliveries")
+    parser.add_argument("--matches", type=int, default=DEFAULT_MATCHES,
+                        help=f"Number of matches (default {DEFAULT_MATCHES})")
+    parser.add_argument("--seasons", type=int, default=12, help="Seasons from 2008 (default 12)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default 0)")
+    parser.add_argument("--out", required=True, help="Output directory")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    counts = generate(args.out, args.matches, seasons=args.seasons, seed=args.seed)
+    print(f"Wrote {counts['matches']} matches and {counts['deliveries']} deliveries "
+          f"to {args.out} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())